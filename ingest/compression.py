@@ -0,0 +1,53 @@
+import gzip
+from typing import Callable
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+
+try:
+    import zstandard
+except ImportError:  # zstd bodies are rejected without it
+    zstandard = None
+
+SUPPORTED_ENCODINGS = ["identity", "gzip"] + (["zstd"] if zstandard else [])
+
+
+def decompress(body: bytes, encoding: str) -> bytes:
+    encoding = encoding.strip().lower()
+    if encoding in ("", "identity"):
+        return body
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "zstd" and zstandard:
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    raise HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Unsupported Content-Encoding '{encoding}'. Supported: {', '.join(SUPPORTED_ENCODINGS)}"
+    )
+
+class DecompressingRequest(Request):
+    """Request whose body is transparently decoded from its Content-Encoding"""
+
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            try:
+                self._body = decompress(body, self.headers.get("content-encoding", ""))
+            except HTTPException:
+                raise
+            except Exception as e:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Could not decompress request body: {str(e)}"
+                )
+        return self._body
+
+class DecompressingRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            request = DecompressingRequest(request.scope, request.receive)
+            return await original_route_handler(request)
+
+        return route_handler
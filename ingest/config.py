@@ -10,7 +10,7 @@ SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.8"))
 # When STATIC is set, all POST requests will be blocked
 STATIC_MODE = os.getenv("STATIC", "").lower() in ("true", "1", "yes", "on")
 
-SUPPORTED_STORES = ["coles", "aldi", "woolworths"]
+SUPPORTED_STORES = ["coles", "aldi", "woolworths", "iga"]
 
 API_VERSION = "1.0.0"
 API_TITLE = "Grocery Product Data Consolidation API"
@@ -0,0 +1,25 @@
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+except ImportError:  # the stdlib encoder is used without it
+    orjson = None
+
+DefaultResponse = ORJSONResponse if orjson else JSONResponse
+
+
+def dumps(obj: Any) -> str:
+    """JSON column serializer, orjson when available"""
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj)
+
+
+def loads(data: str | bytes) -> Any:
+    """JSON column deserializer, orjson when available"""
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,20 +1,26 @@
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.responses import JSONResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from datetime import date, datetime
 from typing import List
 
 from models import get_db, create_tables, Product, StoreProduct, PriceHistory
-from schemas import ProductCreateRequest, ProductResponse, ProductInfo, StoreProductInfo, ProductWithStores, StoreProductWithHistory, PriceHistoryInfo, PriceUpdateRequest, PriceUpdateResponse, ProductSearchResult, ProductSearchResponse
+from schemas import ProductCreateRequest, ProductResponse, ProductInfo, StoreProductInfo, ProductWithStores, StoreProductWithHistory, PriceHistoryInfo, PriceUpdateRequest, PriceUpdateResponse, ProductSearchResult, ProductSearchResponse, ProductBatchRequest, PriceUpdateBatchRequest, BatchItemResult, BatchResponse
 from processors import ProcessorFactory
 from matcher import ProductMatcher
+from compression import DecompressingRoute
+from fastjson import DefaultResponse
 from config import API_TITLE, API_DESCRIPTION, API_VERSION, STATIC_MODE
 
 app = FastAPI(
     title=API_TITLE,
     description=API_DESCRIPTION,
-    version=API_VERSION
+    version=API_VERSION,
+    default_response_class=DefaultResponse
 )
+# Accept gzip/zstd request bodies on every route declared below
+app.router.route_class = DecompressingRoute
 
 @app.middleware("http")
 async def static_mode_middleware(request: Request, call_next):
@@ -34,109 +40,115 @@ async def static_mode_middleware(request: Request, call_next):
 async def startup_event():
     create_tables()
 
-@app.post("/api/products", response_model=ProductResponse)
-async def create_product(
-    product_request: ProductCreateRequest,
-    db: Session = Depends(get_db)
-):
-    try:
-        processor = ProcessorFactory.get_processor(product_request.store)
+def upsert_product(product_request: ProductCreateRequest, db: Session) -> ProductResponse:
+    """Match or create the product and its store product. The caller commits."""
+    processor = ProcessorFactory.get_processor(product_request.store)
+    
+    name, brand, category, size, unit, image_url, description = processor.process(
+        product_request.details
+    )
+    
+    if not name:
+        name = product_request.name
+    
+    normalized_category = ProcessorFactory.normalize_category(category)
+    
+    matcher = ProductMatcher(db)
+    existing_product = matcher.find_matching_product(name, brand, normalized_category, size)
+    
+    if existing_product:
+        product_id = existing_product.id
+        action = "updated"
+        matched_existing = True
         
-        name, brand, category, size, unit, image_url, description = processor.process(
-            product_request.details
+        existing_product.updated_at = datetime.utcnow()
+        if not existing_product.image_url and image_url:
+            existing_product.image_url = image_url
+        if not existing_product.description and description:
+            existing_product.description = description
+    else:
+        new_product = Product(
+            name=name,
+            brand=brand,
+            category=normalized_category,
+            size=size,
+            unit=unit,
+            image_url=image_url,
+            description=description
         )
+        db.add(new_product)
+        db.flush()
         
-        if not name:
-            name = product_request.name
-        
-        normalized_category = ProcessorFactory.normalize_category(category)
-        
-        matcher = ProductMatcher(db)
-        existing_product = matcher.find_matching_product(name, brand, normalized_category, size)
-        
-        if existing_product:
-            product_id = existing_product.id
-            action = "updated"
-            matched_existing = True
-            
-            existing_product.updated_at = datetime.utcnow()
-            if not existing_product.image_url and image_url:
-                existing_product.image_url = image_url
-            if not existing_product.description and description:
-                existing_product.description = description
-        else:
-            new_product = Product(
-                name=name,
-                brand=brand,
-                category=normalized_category,
-                size=size,
-                unit=unit,
-                image_url=image_url,
-                description=description
-            )
-            db.add(new_product)
-            db.flush()
-            
-            product_id = new_product.id
-            action = "created"
-            matched_existing = False
-        
-        existing_store_product = db.query(StoreProduct).filter(
-            StoreProduct.store == product_request.store,
-            StoreProduct.store_product_id == product_request.id
-        ).first()
-        
-        if existing_store_product:
-            old_price = existing_store_product.current_price
-            if old_price != product_request.price:
-                latest_price_history = db.query(PriceHistory).filter(
-                    PriceHistory.store_product_id == existing_store_product.id,
-                    PriceHistory.end_date.is_(None)
-                ).first()
-                
-                if latest_price_history:
-                    latest_price_history.end_date = date.today()
-                
-                new_price_history = PriceHistory(
-                    store_product_id=existing_store_product.id,
-                    price=product_request.price,
-                    start_date=date.today()
-                )
-                db.add(new_price_history)
+        product_id = new_product.id
+        action = "created"
+        matched_existing = False
+    
+    existing_store_product = db.query(StoreProduct).filter(
+        StoreProduct.store == product_request.store,
+        StoreProduct.store_product_id == product_request.id
+    ).first()
+    
+    if existing_store_product:
+        old_price = existing_store_product.current_price
+        if old_price != product_request.price:
+            latest_price_history = db.query(PriceHistory).filter(
+                PriceHistory.store_product_id == existing_store_product.id,
+                PriceHistory.end_date.is_(None)
+            ).first()
             
-            existing_store_product.current_price = product_request.price
-            existing_store_product.product_id = product_id
-            existing_store_product.store_name = product_request.name
-            existing_store_product.raw_details = product_request.details
-            existing_store_product.updated_at = datetime.utcnow()
-        else:
-            new_store_product = StoreProduct(
-                store=product_request.store,
-                store_product_id=product_request.id,
-                product_id=product_id,
-                store_name=product_request.name,
-                current_price=product_request.price,
-                raw_details=product_request.details
-            )
-            db.add(new_store_product)
-            db.flush()
+            if latest_price_history:
+                latest_price_history.end_date = date.today()
             
-            initial_price_history = PriceHistory(
-                store_product_id=new_store_product.id,
+            new_price_history = PriceHistory(
+                store_product_id=existing_store_product.id,
                 price=product_request.price,
                 start_date=date.today()
             )
-            db.add(initial_price_history)
+            db.add(new_price_history)
         
-        db.commit()
-        
-        return ProductResponse(
-            status="success",
+        existing_store_product.current_price = product_request.price
+        existing_store_product.product_id = product_id
+        existing_store_product.store_name = product_request.name
+        # unchanged details are left alone so the JSON column isn't rewritten
+        if existing_store_product.raw_details != product_request.details:
+            existing_store_product.raw_details = product_request.details
+        existing_store_product.updated_at = datetime.utcnow()
+    else:
+        new_store_product = StoreProduct(
+            store=product_request.store,
+            store_product_id=product_request.id,
             product_id=product_id,
-            action=action,
-            matched_existing=matched_existing,
-            message=f"Product {action} successfully"
+            store_name=product_request.name,
+            current_price=product_request.price,
+            raw_details=product_request.details
         )
+        db.add(new_store_product)
+        db.flush()
+        
+        initial_price_history = PriceHistory(
+            store_product_id=new_store_product.id,
+            price=product_request.price,
+            start_date=date.today()
+        )
+        db.add(initial_price_history)
+    
+    return ProductResponse(
+        status="success",
+        product_id=product_id,
+        action=action,
+        matched_existing=matched_existing,
+        message=f"Product {action} successfully"
+    )
+
+@app.post("/api/products", response_model=ProductResponse)
+async def create_product(
+    product_request: ProductCreateRequest,
+    db: Session = Depends(get_db)
+):
+    try:
+        response = upsert_product(product_request, db)
+        db.commit()
+        return response
         
     except Exception as e:
         db.rollback()
@@ -145,6 +157,58 @@ async def create_product(
             detail=f"An error occurred: {str(e)}"
         )
 
+@app.post("/api/products/batch", response_model=BatchResponse)
+async def create_products_batch(
+    batch: ProductBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Create or update many products in one request.
+    
+    Each product is committed on its own, so one bad product doesn't fail
+    the rest. A product that can never be stored reports a 4xx status code,
+    one that failed unexpectedly none. The request body may be gzip or zstd
+    compressed.
+    """
+    results = []
+    for index, product_request in enumerate(batch.products):
+        try:
+            response = upsert_product(product_request, db)
+            db.commit()
+            results.append(BatchItemResult(
+                index=index,
+                status="success",
+                product_id=response.product_id,
+                action=response.action
+            ))
+        except HTTPException as e:
+            db.rollback()
+            results.append(BatchItemResult(
+                index=index, status="error", status_code=e.status_code, detail=e.detail
+            ))
+        except ValidationError as e:
+            db.rollback()
+            results.append(BatchItemResult(
+                index=index,
+                status="error",
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=str(e)
+            ))
+        except ValueError as e:
+            # e.g. a store without a processor, sending it again won't help
+            db.rollback()
+            results.append(BatchItemResult(
+                index=index,
+                status="error",
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            ))
+        except Exception as e:
+            db.rollback()
+            results.append(BatchItemResult(index=index, status="error", detail=str(e)))
+    
+    return batch_response(results)
+
 @app.get("/api/products", response_model=List[ProductInfo])
 async def get_products(
     store: str = None,
@@ -370,13 +434,9 @@ async def get_store_product_details(product_id: int, store: str, db: Session = D
         price_history=price_history_info
     )
 
-@app.post("/api/price-update", response_model=PriceUpdateResponse)
-async def update_product_price(
-    price_update: PriceUpdateRequest,
-    db: Session = Depends(get_db)
-):
+def apply_price_update(price_update: PriceUpdateRequest, db: Session) -> PriceUpdateResponse:
     """
-    Update the price for a specific store product.
+    Update the price for a specific store product. The caller commits.
     
     This endpoint:
     1. Finds the store product by store and store_product_id
@@ -390,60 +450,67 @@ async def update_product_price(
     Returns:
         Details about the price update including old/new prices
     """
-    try:
-        # Find the store product
-        store_product = db.query(StoreProduct).filter(
-            StoreProduct.store == price_update.store,
-            StoreProduct.store_product_id == price_update.store_product_id
-        ).first()
-        
-        if not store_product:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Product with ID {price_update.store_product_id} not found at {price_update.store}"
-            )
-        
-        old_price = store_product.current_price
-        
-        # Only proceed if price is actually different
-        if old_price == price_update.new_price:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"New price {price_update.new_price} is the same as current price"
-            )
-        
-        # End the current price history record
-        current_price_history = db.query(PriceHistory).filter(
-            PriceHistory.store_product_id == store_product.id,
-            PriceHistory.end_date.is_(None)
-        ).first()
-        
-        if current_price_history:
-            current_price_history.end_date = date.today()
-        
-        # Create new price history record
-        new_price_history = PriceHistory(
-            store_product_id=store_product.id,
-            price=price_update.new_price,
-            start_date=date.today()
+    # Find the store product
+    store_product = db.query(StoreProduct).filter(
+        StoreProduct.store == price_update.store,
+        StoreProduct.store_product_id == price_update.store_product_id
+    ).first()
+    
+    if not store_product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Product with ID {price_update.store_product_id} not found at {price_update.store}"
         )
-        db.add(new_price_history)
-        db.flush()  # Get the ID
-        
-        # Update the store product current price
-        store_product.current_price = price_update.new_price
-        store_product.updated_at = datetime.utcnow()
-        
-        db.commit()
-        
-        return PriceUpdateResponse(
-            status="success",
-            message=f"Price updated from ${old_price} to ${price_update.new_price}",
-            store_product_id=store_product.id,
-            old_price=old_price,
-            new_price=price_update.new_price,
-            price_history_id=new_price_history.id
+    
+    old_price = store_product.current_price
+    
+    # Only proceed if price is actually different
+    if old_price == price_update.new_price:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"New price {price_update.new_price} is the same as current price"
         )
+    
+    # End the current price history record
+    current_price_history = db.query(PriceHistory).filter(
+        PriceHistory.store_product_id == store_product.id,
+        PriceHistory.end_date.is_(None)
+    ).first()
+    
+    if current_price_history:
+        current_price_history.end_date = date.today()
+    
+    # Create new price history record
+    new_price_history = PriceHistory(
+        store_product_id=store_product.id,
+        price=price_update.new_price,
+        start_date=date.today()
+    )
+    db.add(new_price_history)
+    db.flush()  # Get the ID
+    
+    # Update the store product current price
+    store_product.current_price = price_update.new_price
+    store_product.updated_at = datetime.utcnow()
+    
+    return PriceUpdateResponse(
+        status="success",
+        message=f"Price updated from ${old_price} to ${price_update.new_price}",
+        store_product_id=store_product.id,
+        old_price=old_price,
+        new_price=price_update.new_price,
+        price_history_id=new_price_history.id
+    )
+
+@app.post("/api/price-update", response_model=PriceUpdateResponse)
+async def update_product_price(
+    price_update: PriceUpdateRequest,
+    db: Session = Depends(get_db)
+):
+    try:
+        response = apply_price_update(price_update, db)
+        db.commit()
+        return response
         
     except Exception as e:
         db.rollback()
@@ -454,6 +521,49 @@ async def update_product_price(
             detail=f"An error occurred while updating price: {str(e)}"
         )
 
+@app.post("/api/price-update/batch", response_model=BatchResponse)
+async def update_product_prices_batch(
+    batch: PriceUpdateBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Apply many price updates in one request.
+    
+    Each update is committed on its own and reports the status code the
+    single update endpoint would have returned. The request body may be
+    gzip or zstd compressed.
+    """
+    results = []
+    for index, price_update in enumerate(batch.updates):
+        try:
+            response = apply_price_update(price_update, db)
+            db.commit()
+            results.append(BatchItemResult(
+                index=index,
+                status="success",
+                product_id=response.store_product_id,
+                action="updated"
+            ))
+        except HTTPException as e:
+            db.rollback()
+            results.append(BatchItemResult(
+                index=index, status="error", status_code=e.status_code, detail=e.detail
+            ))
+        except Exception as e:
+            db.rollback()
+            results.append(BatchItemResult(index=index, status="error", detail=str(e)))
+    
+    return batch_response(results)
+
+def batch_response(results: List[BatchItemResult]) -> BatchResponse:
+    failed = sum(1 for result in results if result.status != "success")
+    return BatchResponse(
+        status="success" if not failed else "partial",
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
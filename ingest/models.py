@@ -3,6 +3,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, date
 from config import DATABASE_URL
+from fastjson import dumps, loads
 
 Base = declarative_base()
 
@@ -53,7 +54,7 @@ class PriceHistory(Base):
     
     store_product = relationship("StoreProduct", back_populates="price_history")
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, json_serializer=dumps, json_deserializer=loads)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def get_db():
@@ -2,10 +2,33 @@ from typing import Dict, Any, Optional, Tuple
 import re
 
 class BaseProcessor:
+    # whether sizes like "6 pack" get the unit "pack"
+    counts_packs = False
+
     def process(self, data: Dict[str, Any]) -> Tuple[str, str, str, str, str, str]:
         raise NotImplementedError
+    
+    def _extract_unit(self, size: str) -> str:
+        if not size:
+            return ""
+        
+        size_lower = size.lower()
+        if "ml" in size_lower:
+            return "ml"
+        elif "kg" in size_lower:
+            return "kg"
+        elif "g" in size_lower and "kg" not in size_lower:
+            return "g"
+        elif "l" in size_lower and "ml" not in size_lower:
+            return "l"
+        elif self.counts_packs and ("pack" in size_lower or "pk" in size_lower):
+            return "pack"
+        else:
+            return ""
 
 class ColesProcessor(BaseProcessor):
+    counts_packs = True
+
     def process(self, data: Dict[str, Any]) -> Tuple[str, str, str, str, str, str]:
         name = data.get("name", "")
         brand = data.get("brand", "")
@@ -29,24 +52,6 @@ class ColesProcessor(BaseProcessor):
         unit = self._extract_unit(size)
         
         return name, brand, category, size, unit, image_url, description
-    
-    def _extract_unit(self, size: str) -> str:
-        if not size:
-            return ""
-        
-        size_lower = size.lower()
-        if "ml" in size_lower:
-            return "ml"
-        elif "kg" in size_lower:
-            return "kg"
-        elif "g" in size_lower and "kg" not in size_lower:
-            return "g"
-        elif "l" in size_lower and "ml" not in size_lower:
-            return "l"
-        elif "pack" in size_lower or "pk" in size_lower:
-            return "pack"
-        else:
-            return ""
 
 class AldiProcessor(BaseProcessor):
     def process(self, data: Dict[str, Any]) -> Tuple[str, str, str, str, str, str]:
@@ -63,22 +68,6 @@ class AldiProcessor(BaseProcessor):
         unit = self._extract_unit(size)
         
         return name, brand, category, size, unit, image_url, description
-    
-    def _extract_unit(self, size: str) -> str:
-        if not size:
-            return ""
-        
-        size_lower = size.lower()
-        if "ml" in size_lower:
-            return "ml"
-        elif "kg" in size_lower:
-            return "kg"
-        elif "g" in size_lower and "kg" not in size_lower:
-            return "g"
-        elif "l" in size_lower and "ml" not in size_lower:
-            return "l"
-        else:
-            return ""
 
 class WoolworthsProcessor(BaseProcessor):
     def process(self, data: Dict[str, Any]) -> Tuple[str, str, str, str, str, str]:
@@ -91,28 +80,17 @@ class WoolworthsProcessor(BaseProcessor):
         unit = self._extract_unit(size)
         
         return name, brand, category, size, unit, image_url, description
-    
-    def _extract_unit(self, size: str) -> str:
-        if not size:
-            return ""
-        
-        size_lower = size.lower()
-        if "ml" in size_lower:
-            return "ml"
-        elif "kg" in size_lower:
-            return "kg"
-        elif "g" in size_lower and "kg" not in size_lower:
-            return "g"
-        elif "l" in size_lower and "ml" not in size_lower:
-            return "l"
-        else:
-            return ""
+
+class IGAProcessor(WoolworthsProcessor):
+    # same detail fields as Woolworths, sizes may be packs
+    counts_packs = True
 
 class ProcessorFactory:
     _processors = {
         "coles": ColesProcessor(),
         "aldi": AldiProcessor(),
-        "woolworths": WoolworthsProcessor()
+        "woolworths": WoolworthsProcessor(),
+        "iga": IGAProcessor()
     }
     
     @classmethod
@@ -48,6 +48,9 @@ class ProductCreateRequest(BaseModel):
             raise ValueError('Price must be non-negative')
         return round(v, 2)
 
+class ProductBatchRequest(BaseModel):
+    products: List[ProductCreateRequest] = Field(..., description="Products to create or update")
+
 class ProductResponse(BaseModel):
     status: str
     product_id: int
@@ -126,6 +129,9 @@ class PriceUpdateRequest(BaseModel):
             raise ValueError('Price must be non-negative')
         return round(v, 2)
 
+class PriceUpdateBatchRequest(BaseModel):
+    updates: List[PriceUpdateRequest] = Field(..., description="Price updates to apply")
+
 class PriceUpdateResponse(BaseModel):
     status: str
     message: str
@@ -134,6 +140,20 @@ class PriceUpdateResponse(BaseModel):
     new_price: float
     price_history_id: int
 
+class BatchItemResult(BaseModel):
+    index: int
+    status: str
+    product_id: Optional[int] = None
+    action: Optional[str] = None
+    status_code: Optional[int] = None
+    detail: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    status: str
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
 class ProductSearchResult(BaseModel):
     id: int
     name: str
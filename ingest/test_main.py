@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from models import Base, get_db
 from main import app
@@ -215,6 +215,37 @@ def test_get_store_product_details(client):
     assert data["current_price"] == 5.00
     assert len(data["price_history"]) >= 1
 
+def test_repost_with_same_details_skips_json_rewrite(client):
+    product_data = {
+        "store": "coles",
+        "id": "same123",
+        "name": "Same Product",
+        "price": 5.00,
+        "details": {"brand": "TestBrand", "size": "1L"}
+    }
+    client.post("/api/products", json=product_data)
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        # same details in a different key order, new price
+        product_data["details"] = {"size": "1L", "brand": "TestBrand"}
+        product_data["price"] = 4.50
+        response = client.post("/api/products", json=product_data)
+        assert response.status_code == 200
+        assert not any("raw_details" in s for s in statements if s.startswith("UPDATE"))
+
+        product_data["details"] = {"brand": "TestBrand", "size": "2L"}
+        product_id = client.post("/api/products", json=product_data).json()["product_id"]
+        assert any("raw_details" in s for s in statements if s.startswith("UPDATE"))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    store_products = client.get(f"/api/products/{product_id}").json()["store_products"]
+    assert store_products[0]["raw_details"] == {"brand": "TestBrand", "size": "2L"}
+
 def test_get_product_with_multiple_stores(client):
     # Create a product at Coles
     coles_data = {
@@ -386,4 +417,106 @@ def test_price_update_creates_history(client):
     prices_in_history = [ph["price"] for ph in price_history]
     expected_prices = {5.0, 6.0, 7.0, 8.5}  # All prices that should be in history
     actual_prices = set(prices_in_history)
-    assert expected_prices == actual_prices, f"Expected {expected_prices}, got {actual_prices}"
\ No newline at end of file
+    assert expected_prices == actual_prices, f"Expected {expected_prices}, got {actual_prices}"
+
+
+def test_create_products_batch(client):
+    batch = {
+        "products": [
+            {
+                "store": "coles",
+                "id": "100",
+                "name": "Full Cream Milk 2L",
+                "price": 3.10,
+                "details": {"brand": "Coles", "size": "2L"}
+            },
+            {
+                "store": "aldi",
+                "id": "200",
+                "name": "Sourdough Loaf",
+                "price": 4.49,
+                "details": {"brand": "Baker's Life", "weight": "600g"}
+            }
+        ]
+    }
+
+    response = client.post("/api/products/batch", json=batch)
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["status"] == "success"
+    assert data["succeeded"] == 2
+    assert [result["index"] for result in data["results"]] == [0, 1]
+    assert data["results"][0]["action"] == "created"
+    assert data["results"][1]["status"] == "success"
+
+def test_create_products_batch_reports_rejected_products(client, monkeypatch):
+    import main
+
+    get_processor = main.ProcessorFactory.get_processor
+
+    def only_coles(store):
+        if store != "coles":
+            raise ValueError(f"No processor found for store: {store}")
+        return get_processor(store)
+
+    monkeypatch.setattr(main.ProcessorFactory, "get_processor", only_coles)
+    response = client.post("/api/products/batch", json={"products": [
+        {"store": "coles", "id": "110", "name": "Eggs 12pk", "price": 6.00, "details": {}},
+        {"store": "aldi", "id": "210", "name": "Rye Bread", "price": 4.00, "details": {}}
+    ]})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["status"] == "partial"
+    assert [result["status_code"] for result in data["results"]] == [None, 400]
+
+
+def test_create_products_batch_gzip(client):
+    import gzip
+    import json
+
+    batch = {"products": [{
+        "store": "coles",
+        "id": "300",
+        "name": "Greek Yoghurt 1kg",
+        "price": 6.00,
+        "details": {"brand": "Chobani", "size": "1kg"}
+    }]}
+
+    response = client.post(
+        "/api/products/batch",
+        content=gzip.compress(json.dumps(batch).encode()),
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    assert response.json()["succeeded"] == 1
+
+def test_unsupported_content_encoding(client):
+    response = client.post(
+        "/api/products/batch",
+        content=b"{}",
+        headers={"Content-Type": "application/json", "Content-Encoding": "br"}
+    )
+    assert response.status_code == 415
+
+def test_price_update_batch(client):
+    client.post("/api/products", json={
+        "store": "coles",
+        "id": "400",
+        "name": "Butter 500g",
+        "price": 5.00,
+        "details": {"brand": "Western Star", "size": "500g"}
+    })
+
+    response = client.post("/api/price-update/batch", json={"updates": [
+        {"store": "coles", "store_product_id": "400", "new_price": 5.50},
+        {"store": "coles", "store_product_id": "400", "new_price": 5.50},
+        {"store": "coles", "store_product_id": "missing", "new_price": 1.00}
+    ]})
+    assert response.status_code == 200
+
+    data = response.json()
+    assert data["status"] == "partial"
+    assert data["succeeded"] == 1
+    assert [result["status_code"] for result in data["results"]] == [None, 400, 404]
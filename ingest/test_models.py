@@ -3,10 +3,16 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime, date
 from models import Base, Product, StoreProduct, PriceHistory
+from fastjson import dumps, loads
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test_models.db"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    json_serializer=dumps,
+    json_deserializer=loads
+)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 @pytest.fixture
@@ -83,6 +89,24 @@ class TestStoreProduct:
         assert store_product.raw_details == {"test": "data"}
         assert store_product.created_at is not None
     
+    def test_raw_details_round_trip(self, db_session):
+        product = Product(name="Test Product")
+        db_session.add(product)
+        db_session.flush()
+        
+        details = {"name": "Crème fraîche", "pricing": {"now": 4.5, "was": None}, "tags": [1, "a"]}
+        db_session.add(StoreProduct(
+            store="coles",
+            store_product_id="789",
+            product_id=product.id,
+            store_name="Creme",
+            raw_details=details
+        ))
+        db_session.commit()
+        db_session.expire_all()
+        
+        assert db_session.query(StoreProduct).filter_by(store_product_id="789").one().raw_details == details
+    
     def test_store_product_relationships(self, db_session):
         product = Product(name="Test Product")
         db_session.add(product)
@@ -1,5 +1,5 @@
 import pytest
-from processors import ColesProcessor, AldiProcessor, WoolworthsProcessor, ProcessorFactory
+from processors import ColesProcessor, AldiProcessor, WoolworthsProcessor, IGAProcessor, ProcessorFactory
 
 class TestColesProcessor:
     def setup_method(self):
@@ -130,6 +130,30 @@ class TestWoolworthsProcessor:
         assert image_url == "https://example.com/woolworths.jpg"
         assert description == "Test description"
 
+class TestIGAProcessor:
+    def setup_method(self):
+        self.processor = IGAProcessor()
+    
+    def test_process_complete_data(self):
+        data = {
+            "name": "Community Co Rolled Oats",
+            "brand": "Community Co",
+            "category": "Pantry",
+            "size": "750g",
+            "description": "Australian rolled oats",
+            "image_url": "https://cdn.example.com/iga.jpg"
+        }
+        
+        name, brand, category, size, unit, image_url, description = self.processor.process(data)
+        
+        assert name == "Community Co Rolled Oats"
+        assert brand == "Community Co"
+        assert category == "Pantry"
+        assert size == "750g"
+        assert unit == "g"
+        assert image_url == "https://cdn.example.com/iga.jpg"
+        assert description == "Australian rolled oats"
+
 class TestProcessorFactory:
     def test_get_coles_processor(self):
         processor = ProcessorFactory.get_processor("coles")
@@ -143,6 +167,10 @@ class TestProcessorFactory:
         processor = ProcessorFactory.get_processor("woolworths")
         assert isinstance(processor, WoolworthsProcessor)
     
+    def test_get_iga_processor(self):
+        processor = ProcessorFactory.get_processor("IGA")
+        assert isinstance(processor, IGAProcessor)
+    
     def test_invalid_store_raises_error(self):
         with pytest.raises(ValueError, match="No processor found for store"):
             ProcessorFactory.get_processor("invalid_store")
@@ -0,0 +1,53 @@
+"""
+Pages/sec parsing saved ALDI product pages: the old full html.parser tree,
+BeautifulSoup over the product regions only, and lxml with compiled XPaths.
+
+    python benchmarks/aldi_parse_bench.py [pages] [fixture.html ...]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import scrapers.aldi as aldi  # noqa: E402
+
+PAGES = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+FIXTURES = sys.argv[2:] or [
+    os.path.join(os.path.dirname(__file__), "../tests/fixtures/aldi_product.html")
+]
+contents = [open(path, "rb").read() for path in FIXTURES]
+
+
+def pages_per_sec(label: str, parse) -> float:
+    start = time.perf_counter()
+    for i in range(PAGES):
+        parse(contents[i % len(contents)], "https://www.aldi.com.au/")
+    rate = PAGES / (time.perf_counter() - start)
+    print(f"{label:<40} {rate:8.1f} pages/s")
+    return rate
+
+
+def full_tree(content, url):
+    return aldi.product_from_soup(BeautifulSoup(content, "html.parser"), url)
+
+
+def regions_only(content, url):
+    return aldi.product_from_soup(
+        BeautifulSoup(content, "html.parser", parse_only=aldi.PRODUCT_REGIONS), url
+    )
+
+
+if __name__ == "__main__":
+    size = sum(map(len, contents)) // len(contents)
+    print(f"{PAGES} pages from {len(contents)} fixtures, {size // 1024} KB each\n")
+    before = pages_per_sec("BeautifulSoup, whole page", full_tree)
+    pages_per_sec("BeautifulSoup, product regions", regions_only)
+    if aldi.lxml_html is None:
+        print("lxml is not installed, skipping the XPath path")
+    else:
+        after = pages_per_sec("lxml, compiled XPaths", aldi.parse_product_lxml)
+        print(f"{'':<40} {after / before:8.1f}x faster")
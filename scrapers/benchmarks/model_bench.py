@@ -0,0 +1,77 @@
+"""
+Per-item cost of building listing records, PriceUpdates vs PriceRecord with
+bulk validation, and of ProductInfo with a realistic details dict.
+
+    python benchmarks/model_bench.py [items]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from utils.model import (  # noqa: E402
+    PriceRecord,
+    PriceUpdates,
+    ProductInfo,
+    Store,
+    validate_price_records,
+)
+
+ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+# roughly what a listing page gives us per item
+rows = [(str(1000000 + i), "Coles", f"Brand Product {i} 500g", 3.5 + i % 7) for i in range(ITEMS)]
+# a Coles detail payload is a few KB of nested JSON
+details = {
+    "id": 1,
+    "name": "Product",
+    "pricing": {"now": 3.5, "was": 4.0, "unit": {"quantity": 1, "ofMeasureUnits": "kg"}},
+    "imageUris": [{"uri": f"/img/{i}.jpg", "type": "default"} for i in range(8)],
+    "nutrition": {f"n{i}": {"value": i, "unit": "g"} for i in range(30)},
+    "description": "x" * 500,
+}
+
+
+def per_item(label: str, fn, n: int) -> float:
+    start = time.perf_counter()
+    fn()
+    cost = (time.perf_counter() - start) / n * 1e6
+    print(f"{label:<45} {cost:8.3f} µs/item")
+    return cost
+
+
+def pydantic_listing():
+    [PriceUpdates(store_product_id=a, store=b, product_name=c, price=d) for a, b, c, d in rows]
+
+
+def record_listing():
+    validate_price_records([PriceRecord(a, b, c, d) for a, b, c, d in rows])
+
+
+listing = [PriceUpdates(store_product_id=a, store=Store.Coles, product_name=c, price=d)
+           for a, _, c, d in rows[:20_000]]
+
+
+def pydantic_info():
+    [
+        ProductInfo(
+            store_product_id=p.store_product_id,
+            store=p.store,
+            product_name=p.product_name,
+            price=p.price,
+            details=details,
+        )
+        for p in listing
+    ]
+
+
+if __name__ == "__main__":
+    print(f"{ITEMS} listing items, {len(listing)} product infos\n")
+    slow = per_item("PriceUpdates(...)", pydantic_listing, ITEMS)
+    fast = per_item("PriceRecord(...) + validate_price_records", record_listing, ITEMS)
+    print(f"{'':<45} {slow / fast:8.1f}x faster\n")
+    # pydantic only shallow-copies a plain `dict` field, so the size of the
+    # details doesn't matter and ProductInfo keeps its validation
+    per_item("ProductInfo(..., details=...)", pydantic_info, len(listing))
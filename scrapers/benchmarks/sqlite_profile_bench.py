@@ -0,0 +1,59 @@
+"""
+Inserts/sec and lookups/sec for SimpleProduct rows, default vs fast profile.
+
+    python benchmarks/sqlite_profile_bench.py [rows]
+
+Runs in a temporary directory so the real sqlite/ databases are untouched.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from database import MainDatabase  # noqa: E402
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+LOOKUPS = min(ROWS, 20_000)
+
+
+def run(profile: str) -> tuple[float, float]:
+    db = MainDatabase(f"bench_{profile}", profile=profile)
+    db.clear_data()
+
+    start = time.perf_counter()
+    with db.batch():
+        for i in range(ROWS):
+            db.add_simple_product("Coles", i, f"product {i}", 1.0 + i % 100)
+    inserts = ROWS / (time.perf_counter() - start)
+
+    ids = random.sample(range(ROWS), LOOKUPS)
+    start = time.perf_counter()
+    for i in ids:
+        db.get_product_price("Coles", i)
+    lookups = LOOKUPS / (time.perf_counter() - start)
+
+    db.close_engine()
+    return inserts, lookups
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.mkdir("sqlite")
+        # the per-row prints in MainDatabase would dominate the timings
+        sys.stdout = open(os.devnull, "w")
+        results = {profile: run(profile) for profile in ("default", "fast")}
+        sys.stdout = sys.__stdout__
+
+    print(f"{ROWS} rows, {LOOKUPS} lookups")
+    print(f"{'profile':<10}{'inserts/sec':>14}{'lookups/sec':>14}")
+    for profile, (inserts, lookups) in results.items():
+        print(f"{profile:<10}{inserts:>14.0f}{lookups:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,38 @@
 from utils.model import ApiProduct, ApiProducts
 from os import getenv
+from typing import Tuple
+from query_cache import shared_query_cache
+from quota import quota_for
 import requests
 
 MAX_PAGE_SIZE = 20
 
 def query_products(store: str, product_name: str) -> ApiProducts:
+    """Search results for `product_name`, reused from the cache while they are fresh"""
+    return shared_query_cache().get(
+        store, product_name, lambda: fetch_products(store, product_name)
+    )
+
+
+def fetch_products(store: str, product_name: str) -> Tuple[ApiProducts, bool]:
+    """
+    Every page of results for `product_name`, and whether the search
+    finished: each page answered 200 and paging was not cut short.
+    """
     prefix = ""
     if store == "Woolies Store":
         prefix = "WOOLIES"
     elif store == "Coles Store":
         prefix = "COLES"
     else:
-        return ApiProducts(api_uses=0, products=[])
+        return ApiProducts(api_uses=0, products=[]), False
 
     api_url = getenv(prefix + "_API_URL")
     api_host = getenv(prefix + "_API_HOST")
     api_key = getenv(prefix + "_API_KEY")
 
     if None in (api_url, api_host, api_key):
-        return ApiProducts(api_uses=0, products=[])
+        return ApiProducts(api_uses=0, products=[]), False
 
     params = {
         "query": product_name,
@@ -29,17 +43,26 @@ def query_products(store: str, product_name: str) -> ApiProducts:
         "x-rapidapi-host": api_host
     }
 
+    # shared with the bulk scrapers using the same key
+    quota = quota_for(api_host)
     page_count = None
     page = 1
     api_uses = 0
     products = []
-    while not page_count or page <= page_count:
+    complete = True
+    while page_count is None or page <= page_count:
+        if not quota.acquire():
+            complete = False
+            break
+        params["page"] = page
         res = requests.get(api_url, headers=headers, params=params)
+        quota.record(res)
         api_uses += 1
         if res.status_code != 200:
+            complete = False
             break
         res_json = res.json()
-        if not page_count:
+        if page_count is None:
             page_count = res_json.get("total_pages", 0)
         for product in res_json.get("results", []):
             products.append(ApiProduct(
@@ -51,4 +74,4 @@ def query_products(store: str, product_name: str) -> ApiProducts:
                 product_url=product.get("url", "")
             ))
         page += 1
-    return ApiProducts(api_uses=api_uses, products=products)
+    return ApiProducts(api_uses=api_uses, products=products), complete
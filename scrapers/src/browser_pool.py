@@ -0,0 +1,226 @@
+import queue
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Tuple
+
+from fastjson import loads
+from log import detailed_log, log
+
+# in-page fetch, so requests carry the browser's cookies and fingerprint
+# without a full page load per url
+FETCH_JS = """
+const [url, done] = arguments;
+fetch(url, {credentials: "include", headers: {accept: "application/json"}})
+    .then(r => r.text().then(body => done([r.status, body])))
+    .catch(e => done([0, String(e)]));
+"""
+PLAYWRIGHT_FETCH_JS = """
+async (url) => {
+    const r = await fetch(url, {credentials: "include", headers: {accept: "application/json"}});
+    return [r.status, await r.text()];
+}
+"""
+
+
+class BrowserFetchError(Exception):
+    pass
+
+
+class BrowserSession(ABC):
+    """
+    One long-lived headless browser sitting on `origin`, fetching JSON from
+    inside the page. Subclasses provide `_start`, `_fetch` and `_stop`.
+    """
+
+    def __init__(self, origin: str):
+        self.origin = origin
+        self.uses = 0
+        self._started = False
+
+    def fetch_json(self, url: str):
+        if not self._started:
+            self._start()
+            self._started = True
+        self.uses += 1
+        status, body = self._fetch(url)
+        if status != 200:
+            raise BrowserFetchError(f"HTTP {status} for {url}")
+        return loads(body)
+
+    def close(self):
+        if self._started:
+            self._started = False
+            try:
+                self._stop()
+            except Exception as e:
+                log(f"⚠️  closing browser failed: {e}")
+
+    @abstractmethod
+    def _start(self):
+        """Launch the browser and open `origin`"""
+
+    @abstractmethod
+    def _fetch(self, url: str) -> Tuple[int, str]:
+        """(status, body) of `url` fetched from inside the page"""
+
+    @abstractmethod
+    def _stop(self):
+        """Shut the browser down"""
+
+
+class SeleniumSession(BrowserSession):
+    """Headless Firefox driven by selenium"""
+
+    def _start(self):
+        from selenium import webdriver
+        from selenium.webdriver.firefox.options import Options
+
+        options = Options()
+        options.set_preference("devtools.jsonview.enabled", False)
+        options.add_argument("--headless")
+        self.driver = webdriver.Firefox(options=options)
+        self.driver.set_script_timeout(30)
+        # one real page load for the site's cookies, every fetch after reuses them
+        self.driver.get(self.origin)
+
+    def _fetch(self, url: str):
+        return self.driver.execute_async_script(FETCH_JS, url)
+
+    def _stop(self):
+        self.driver.quit()
+
+
+class PlaywrightSession(BrowserSession):
+    """
+    Headless Chromium driven by playwright. Playwright's sync API only works
+    on the thread that started it, so every call runs on one owned thread.
+    """
+
+    def __init__(self, origin: str, user_agent: str | None = None):
+        super().__init__(origin)
+        self.user_agent = user_agent
+        self._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="playwright")
+
+    def _start(self):
+        self._thread.submit(self._open).result()
+
+    def _open(self):
+        from playwright.sync_api import sync_playwright
+
+        self._playwright = sync_playwright().start()
+        self.browser = self._playwright.chromium.launch(headless=True)
+        self.page = None
+
+    def _new_context(self):
+        return self.browser.new_context(
+            viewport={"width": 1280, "height": 800}, user_agent=self.user_agent
+        )
+
+    def _fetch(self, url: str):
+        return self._thread.submit(self._evaluate, url).result()
+
+    def _evaluate(self, url: str):
+        if self.page is None:
+            # one real page load for the site's cookies, every fetch after reuses them
+            self.page = self._new_context().new_page()
+            self.page.goto(self.origin, wait_until="domcontentloaded")
+        return self.page.evaluate(PLAYWRIGHT_FETCH_JS, url)
+
+    def cookies_for(self, url: str) -> List[dict]:
+        """Cookies of a fresh context that visited `url`, on the same browser"""
+        if not self._started:
+            self._start()
+            self._started = True
+        return self._thread.submit(self._visit, url).result()
+
+    def _visit(self, url: str) -> List[dict]:
+        context = self._new_context()
+        try:
+            page = context.new_page()
+            page.goto(url, wait_until="networkidle")
+            return context.cookies()
+        finally:
+            context.close()
+
+    def _stop(self):
+        def stop():
+            self.browser.close()
+            self._playwright.stop()
+
+        self._thread.submit(stop).result()
+
+    def close(self):
+        super().close()
+        self._thread.shutdown(wait=False)
+
+
+class BrowserPool:
+    """
+    Up to `size` browser sessions leased one caller at a time. Sessions are
+    started on first use and kept for `max_uses` fetches; one that fails is
+    closed and replaced by a new one on the next lease.
+    """
+
+    def __init__(self, factory: Callable[[], BrowserSession], size: int = 1, max_uses: int = 1000):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_uses = max_uses
+        self.created = 0
+        self._idle: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+
+    @contextmanager
+    def lease(self) -> Iterator[BrowserSession]:
+        session = self._take()
+        healthy = False
+        try:
+            yield session
+            healthy = True
+        # the site answered, or a generator holding the lease was closed
+        # early; either way the browser itself is fine
+        except (BrowserFetchError, GeneratorExit):
+            healthy = True
+            raise
+        finally:
+            if healthy and session.uses < self.max_uses:
+                self._idle.put(session)
+            else:
+                detailed_log("retiring browser after %d fetches", session.uses)
+                session.close()
+                with self._lock:
+                    self._live -= 1
+                # wake a caller waiting for a session, it will make a new one
+                self._idle.put(None)
+
+    def fetch_json(self, url: str):
+        with self.lease() as session:
+            return session.fetch_json(url)
+
+    def close(self):
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if session:
+                session.close()
+        with self._lock:
+            self._live = 0
+
+    def _take(self) -> BrowserSession:
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = None
+                with self._lock:
+                    if self._live < self.size:
+                        self._live += 1
+                        self.created += 1
+                        return self.factory()
+                session = self._idle.get()
+            if session is not None:
+                return session
@@ -0,0 +1,148 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable
+
+from fastjson import loads
+from log import detailed_log, log
+
+NEXT_DATA = re.compile(
+    r'<script[^>]*id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL
+)
+BUILD_MANIFEST = re.compile(r"/_next/static/([^/\"']+)/_buildManifest\.js")
+
+
+def parse_build_id(html: str) -> str | None:
+    """Read the Next.js build id out of a page's __NEXT_DATA__ (or its build manifest path)"""
+    match = NEXT_DATA.search(html)
+    if match:
+        try:
+            build_id = loads(match.group(1)).get("buildId")
+            if build_id:
+                return build_id
+        except (ValueError, AttributeError):
+            pass
+    match = BUILD_MANIFEST.search(html)
+    return match.group(1) if match else None
+
+
+class BuildId:
+    """
+    The current Next.js build id of a site, discovered from its HTML.
+
+    Discovered ids are kept in a small JSON file shared by every run and
+    shard until `ttl` seconds pass. A burst of `burst` consecutive 404s
+    from `_next/data` means the site redeployed, so the id is discovered
+    again (at most once per `cooldown` seconds).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        fetch: Callable[[], str],
+        fallback: str,
+        ttl: float = 6 * 3600,
+        path: str = "sqlite/build_ids.json",
+        burst: int = 3,
+        cooldown: float = 60.0,
+    ):
+        self.host = host
+        self.fetch = fetch
+        self.fallback = fallback
+        self.ttl = ttl
+        self.path = path
+        self.burst = burst
+        self.cooldown = cooldown
+        self.rediscoveries = 0
+        self._value = None
+        self._discovered_at = 0.0
+        self._last_attempt = 0.0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self) -> str:
+        """The cached build id, discovered again once it is older than the ttl"""
+        with self._lock:
+            if self._value is None:
+                self._load()
+            stale = time.time() - self._discovered_at > self.ttl
+            if self._value is None or (
+                stale and time.monotonic() - self._last_attempt >= self.cooldown
+            ):
+                self._discover()
+            return self._value
+
+    def found(self):
+        """A `_next/data` request succeeded, ending any 404 burst"""
+        self._misses = 0
+
+    def not_found(self, stale_id: str, force: bool = False) -> bool:
+        """
+        Record a 404 for a request built with `stale_id`. Returns True when the
+        build id has changed since, so the request is worth retrying.
+        `force` skips waiting for a full burst.
+        """
+        with self._lock:
+            if self._value != stale_id:
+                return True
+            self._misses += 1
+            if not force and self._misses < self.burst:
+                return False
+            if time.monotonic() - self._last_attempt < self.cooldown:
+                return False
+            log(f"🔎 {self._misses} 404s from {self.host}, looking for a new build id")
+            self._discover()
+            if self._value == stale_id:
+                return False
+            self.rediscoveries += 1
+            return True
+
+    def _discover(self):
+        self._last_attempt = time.monotonic()
+        try:
+            build_id = parse_build_id(self.fetch())
+        except Exception as e:
+            log(f"❌ Could not fetch {self.host} to find its build id: {e}")
+            build_id = None
+        if not build_id:
+            if self._value is None:
+                log(f"⚠️  No build id found for {self.host}, using {self.fallback}")
+                self._value = self.fallback
+            # keep the current id, but retry once the cooldown has passed
+            self._discovered_at = time.time() - self.ttl
+            return
+        if build_id != self._value:
+            log(f"🆕 {self.host} build id: {build_id}")
+        self._value = build_id
+        self._discovered_at = time.time()
+        self._misses = 0
+        self._save()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entry = json.load(f).get(self.host)
+        except (OSError, ValueError):
+            return
+        if entry:
+            self._value = entry["build_id"]
+            self._discovered_at = entry["discovered_at"]
+            detailed_log("cached %s build id: %s", self.host, self._value)
+
+    def _save(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[self.host] = {"build_id": self._value, "discovered_at": self._discovered_at}
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log(f"⚠️  Could not save build id cache: {e}")
@@ -0,0 +1,172 @@
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from config import get_run_id
+from database import Base, SQLiteDatabase
+from log import log
+from sqlalchemy import Boolean, Column, Float, Integer, String
+from utils.model import PriceRecord, Store
+
+
+class CategoryCheckpoint(Base):
+    __tablename__ = "category_checkpoints"
+
+    run_id = Column(String, primary_key=True)
+    store = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    next_page = Column(Integer, nullable=False)
+    total_pages = Column(Integer)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return (
+            f"<CategoryCheckpoint(run_id='{self.run_id}', store='{self.store}', "
+            f"category='{self.category}', next_page={self.next_page}, "
+            f"completed={self.completed})>"
+        )
+
+
+class CheckpointItem(Base):
+    __tablename__ = "checkpoint_items"
+
+    run_id = Column(String, primary_key=True)
+    store = Column(String, primary_key=True)
+    category = Column(String, primary_key=True)
+    page = Column(Integer, primary_key=True)
+    position = Column(Integer, primary_key=True)
+    store_product_id = Column(Integer, nullable=False)
+    product_name = Column(String)
+    price = Column(Float)
+
+
+class Checkpoint(SQLiteDatabase):
+    """
+    Per-store, per-category page cursors for category scraping.
+
+    Every finished page is saved together with its listing items, so a run
+    that is interrupted resumes from the next page, and a rerun with the same
+    run id (by default the same day) reuses completed categories instead of
+    scraping them again. Rows from other runs are removed on startup.
+    """
+
+    def __init__(
+        self,
+        run_id: str | None = None,
+        db_name: str = "checkpoint",
+        echo: bool = False,
+        profile: str | None = None,
+    ):
+        self.run_id = run_id or get_run_id()
+        super().__init__(db_name, echo, profile)
+        self.prune()
+
+    def _setup_database(self):
+        """Setup checkpoint database with only the checkpoint tables"""
+        Base.metadata.create_all(
+            self.engine,
+            tables=[CategoryCheckpoint.__table__, CheckpointItem.__table__],
+        )
+
+    def prune(self):
+        """Remove checkpoints left behind by other runs"""
+        session = self.Session()
+        try:
+            for table in (CategoryCheckpoint, CheckpointItem):
+                session.query(table).filter(table.run_id != self.run_id).delete()
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log(f"❌ could not prune checkpoints: {e}")
+        finally:
+            session.close()
+
+    def progress(self, store: str, category: str) -> Tuple[Optional[int], Optional[int], bool]:
+        """(next page, total pages, completed) for a category, or (None, None, False) if not started"""
+        session = self.Session()
+        try:
+            row = session.get(CategoryCheckpoint, (self.run_id, store, category))
+            if row is None:
+                return None, None, False
+            return row.next_page, row.total_pages, row.completed
+        finally:
+            session.close()
+
+    def items(self, store: str, category: str) -> List[PriceRecord]:
+        """Listing items saved so far for a category, in page order"""
+        session = self.Session()
+        try:
+            rows = (
+                session.query(CheckpointItem)
+                .filter_by(run_id=self.run_id, store=store, category=category)
+                .order_by(CheckpointItem.page, CheckpointItem.position)
+                .all()
+            )
+            # rows were validated before they were saved
+            return [
+                PriceRecord(row.store_product_id, Store(store), row.product_name, row.price)
+                for row in rows
+            ]
+        finally:
+            session.close()
+
+    def save_page(
+        self,
+        store: str,
+        category: str,
+        page: int,
+        next_page: int,
+        items: Iterable[PriceRecord],
+        total_pages: int | None = None,
+    ):
+        """Store a page's items and advance the cursor in one transaction"""
+        session = self.Session()
+        try:
+            # a page that was saved but whose cursor update was lost is replaced
+            session.query(CheckpointItem).filter_by(
+                run_id=self.run_id, store=store, category=category, page=page
+            ).delete()
+            session.add_all(
+                CheckpointItem(
+                    run_id=self.run_id,
+                    store=store,
+                    category=category,
+                    page=page,
+                    position=position,
+                    store_product_id=item.store_product_id,
+                    product_name=item.product_name,
+                    price=item.price,
+                )
+                for position, item in enumerate(items)
+            )
+            self._upsert(session, store, category, next_page=next_page, total_pages=total_pages)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log(f"❌ could not checkpoint {store} {category} page {page}: {e}")
+        finally:
+            session.close()
+
+    def complete(self, store: str, category: str):
+        """Mark a category as fully scraped for this run"""
+        session = self.Session()
+        try:
+            self._upsert(session, store, category, completed=True)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log(f"❌ could not checkpoint {store} {category}: {e}")
+        finally:
+            session.close()
+
+    def _upsert(self, session, store: str, category: str, **values):
+        row = session.get(CategoryCheckpoint, (self.run_id, store, category))
+        if row is None:
+            row = CategoryCheckpoint(
+                run_id=self.run_id, store=store, category=category, next_page=0
+            )
+            session.add(row)
+        for key, value in values.items():
+            if value is not None:
+                setattr(row, key, value)
+        row.updated_at = time.time()
@@ -1,5 +1,8 @@
 import argparse
 import os
+import re
+from datetime import date
+from typing import List, Tuple
 
 
 def parse_and_set_env():
@@ -22,6 +25,100 @@ def parse_and_set_env():
     mode_group.add_argument("-m", action="store_true", help="Mock services")
     mode_group.add_argument("-r", action="store_true", help="Real services")
 
+    # Local sqlite tuning
+    parser.add_argument(
+        "--sqlite-profile",
+        choices=["default", "fast"],
+        default=os.getenv("APP_SQLITE_PROFILE", "default"),
+        help="SQLite profile for the local state databases",
+    )
+
+    # Concurrency
+    parser.add_argument(
+        "--detail-workers",
+        type=int,
+        help="Concurrent product detail fetches per store",
+    )
+    parser.add_argument(
+        "--category-workers",
+        type=int,
+        help="Categories listed concurrently by stores that support it",
+    )
+    parser.add_argument(
+        "--send-workers",
+        type=int,
+        help="Concurrent sends to the ingest target",
+    )
+
+    # Ingest transport
+    parser.add_argument(
+        "--ingest-batch-size",
+        type=int,
+        help="Products or price updates per request to ingest",
+    )
+    parser.add_argument(
+        "--ingest-compression",
+        choices=["gzip", "zstd", "none"],
+        help="Compression of batched requests to ingest",
+    )
+
+    # Request pacing
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Max requests per second to each store, the limiter adapts below it",
+    )
+
+    # Sharding
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="Worker processes to split category scraping across",
+    )
+
+    # Detail response cache
+    parser.add_argument(
+        "--http-cache-mb",
+        type=int,
+        help="Size limit of the on-disk detail response cache, 0 disables it",
+    )
+
+    # Details diffing
+    parser.add_argument(
+        "--refresh-details",
+        action="store_true",
+        help="Also fetch details of known products and resend the ones that changed",
+    )
+
+    # Run telemetry
+    parser.add_argument(
+        "--stats-dir",
+        help="Directory for the JSON run summary, defaults to ./stats",
+    )
+    parser.add_argument(
+        "--openmetrics",
+        help="Also write the run summary as OpenMetrics text to this file",
+    )
+
+    # File output
+    parser.add_argument(
+        "--export-parquet",
+        metavar="DIR",
+        help="Also write listing and detail records as partitioned Parquet under DIR",
+    )
+
+    # IGA
+    parser.add_argument(
+        "--iga-stores",
+        help="Comma separated IGA store ids to list, earlier stores win shared products",
+    )
+
+    # Checkpoints
+    parser.add_argument(
+        "--run-id",
+        help="Checkpoint run to resume, defaults to today's date",
+    )
+
     args = parser.parse_args()
 
     # Convert flags to environment variables
@@ -30,6 +127,35 @@ def parse_and_set_env():
     )
     os.environ["APP_DATABASE"] = "sqlite" if args.s else "production"
     os.environ["APP_MODE"] = "mock" if args.m else "production"
+    os.environ["APP_SQLITE_PROFILE"] = args.sqlite_profile
+    if args.detail_workers:
+        os.environ["APP_DETAIL_WORKERS"] = str(args.detail_workers)
+    if args.category_workers:
+        os.environ["APP_CATEGORY_WORKERS"] = str(args.category_workers)
+    if args.send_workers:
+        os.environ["APP_SEND_WORKERS"] = str(args.send_workers)
+    if args.ingest_batch_size:
+        os.environ["APP_INGEST_BATCH_SIZE"] = str(args.ingest_batch_size)
+    if args.ingest_compression:
+        os.environ["APP_INGEST_COMPRESSION"] = args.ingest_compression
+    if args.rate_limit:
+        os.environ["APP_RATE_LIMIT"] = str(args.rate_limit)
+    if args.shards:
+        os.environ["APP_SHARDS"] = str(args.shards)
+    if args.http_cache_mb is not None:
+        os.environ["APP_HTTP_CACHE_MB"] = str(args.http_cache_mb)
+    if args.refresh_details:
+        os.environ["APP_REFRESH_DETAILS"] = "1"
+    if args.stats_dir:
+        os.environ["APP_STATS_DIR"] = args.stats_dir
+    if args.openmetrics:
+        os.environ["APP_OPENMETRICS_PATH"] = args.openmetrics
+    if args.export_parquet:
+        os.environ["APP_EXPORT_PARQUET"] = args.export_parquet
+    if args.iga_stores:
+        os.environ["APP_IGA_STORES"] = args.iga_stores
+    if args.run_id:
+        os.environ["APP_RUN_ID"] = args.run_id
 
     return args
 
@@ -49,6 +175,156 @@ def get_mode():
     return os.getenv("APP_MODE", "production")
 
 
+def get_sqlite_profile():
+    return os.getenv("APP_SQLITE_PROFILE", "default")
+
+
+def get_detail_workers(store: str) -> int:
+    """APP_DETAIL_WORKERS_<STORE> overrides APP_DETAIL_WORKERS for one store"""
+    return int(
+        os.getenv(
+            f"APP_DETAIL_WORKERS_{_env_suffix(store)}", os.getenv(
+                "APP_DETAIL_WORKERS", "4")
+        )
+    )
+
+
+def get_category_workers(store: str) -> int:
+    """APP_CATEGORY_WORKERS_<STORE> overrides APP_CATEGORY_WORKERS for one store"""
+    return int(
+        os.getenv(
+            f"APP_CATEGORY_WORKERS_{_env_suffix(store)}", os.getenv(
+                "APP_CATEGORY_WORKERS", "4")
+        )
+    )
+
+
+def get_cookie_source(store: str) -> str:
+    """
+    Where cookie jars for a store come from: "http" (a plain home page visit),
+    "browser" (playwright) or the path of a recorded cookie list.
+    APP_COOKIES_<STORE> overrides APP_COOKIES.
+    """
+    return os.getenv(
+        f"APP_COOKIES_{_env_suffix(store)}", os.getenv("APP_COOKIES", "http")
+    )
+
+
+def get_send_workers(target: str) -> int:
+    """APP_SEND_WORKERS_<TARGET> overrides APP_SEND_WORKERS for one ingest target"""
+    return int(
+        os.getenv(f"APP_SEND_WORKERS_{_env_suffix(target)}",
+                  os.getenv("APP_SEND_WORKERS", "4"))
+    )
+
+
+def get_ingest_batch_size() -> int:
+    return int(os.getenv("APP_INGEST_BATCH_SIZE", "100"))
+
+
+def get_ingest_compression() -> str:
+    return os.getenv("APP_INGEST_COMPRESSION", "gzip")
+
+
+def get_rate_limit(store: str) -> float:
+    """
+    APP_RATE_LIMIT_<STORE> overrides APP_RATE_LIMIT (max requests/s) for one store.
+    Shard workers that can scrape the store at the same time each get an
+    equal share of it.
+    """
+    rate = float(
+        os.getenv(f"APP_RATE_LIMIT_{_env_suffix(store)}",
+                  os.getenv("APP_RATE_LIMIT", "5"))
+    )
+    return rate / int(
+        os.getenv(rate_limit_shares_var(store),
+                  os.getenv("APP_RATE_LIMIT_SHARES", "1"))
+    )
+
+
+def rate_limit_shares_var(store: str) -> str:
+    """Environment variable the shard workers set to split a store's rate limit"""
+    return f"APP_RATE_LIMIT_SHARES_{_env_suffix(store)}"
+
+
+def get_shards() -> int:
+    return max(int(os.getenv("APP_SHARDS", "1")), 1)
+
+
+def get_http_cache_size() -> int:
+    """Size limit of the http cache in bytes"""
+    return int(os.getenv("APP_HTTP_CACHE_MB", "256")) * 1024 * 1024
+
+
+def get_query_cache_ttl() -> float:
+    """Seconds a paid product search result is reused before searching again"""
+    return float(os.getenv("APP_QUERY_CACHE_TTL", str(6 * 3600)))
+
+
+def get_query_cache_size() -> int:
+    """Size limit of the search result cache in bytes"""
+    return int(os.getenv("APP_QUERY_CACHE_MB", "32")) * 1024 * 1024
+
+
+def get_build_id_ttl() -> float:
+    """Seconds a discovered Next.js build id is trusted before checking again"""
+    return float(os.getenv("APP_BUILD_ID_TTL", str(6 * 3600)))
+
+
+def get_refresh_details() -> bool:
+    return os.getenv("APP_REFRESH_DETAILS", "0") == "1"
+
+
+def get_stats_dir() -> str:
+    return os.getenv("APP_STATS_DIR", "stats")
+
+
+def get_openmetrics_path() -> str | None:
+    return os.getenv("APP_OPENMETRICS_PATH")
+
+
+def get_export_parquet_dir() -> str | None:
+    return os.getenv("APP_EXPORT_PARQUET") or None
+
+
+def get_iga_store_ids() -> List[str]:
+    ids = os.getenv("APP_IGA_STORES", "32600").split(",")
+    return [store_id.strip() for store_id in ids if store_id.strip()]
+
+
+def get_rapidapi_limits(name: str) -> Tuple[int, int]:
+    """
+    (calls per month, calls per minute) of a RapidAPI key.
+    APP_RAPIDAPI_MONTHLY_<NAME> / APP_RAPIDAPI_PER_MINUTE_<NAME> override
+    APP_RAPIDAPI_MONTHLY / APP_RAPIDAPI_PER_MINUTE.
+    """
+    suffix = _env_suffix(name)
+    return (
+        int(os.getenv(f"APP_RAPIDAPI_MONTHLY_{suffix}",
+                      os.getenv("APP_RAPIDAPI_MONTHLY", "500"))),
+        int(os.getenv(f"APP_RAPIDAPI_PER_MINUTE_{suffix}",
+                      os.getenv("APP_RAPIDAPI_PER_MINUTE", "30"))),
+    )
+
+
+def get_rapidapi_queries() -> List[str]:
+    """
+    Search queries the RapidAPI scrapers refresh, least recently refreshed
+    first. Empty (the default) searches everything with one empty query.
+    """
+    queries = os.getenv("APP_RAPIDAPI_QUERIES", "").split(",")
+    return [query.strip() for query in queries if query.strip()]
+
+
+def get_run_id() -> str:
+    """Runs on the same day share checkpoints unless APP_RUN_ID says otherwise"""
+    return os.getenv("APP_RUN_ID") or date.today().isoformat()
+
+
+def _env_suffix(name: str) -> str:
+    return re.sub(r"\W", "_", name).upper()
+
+
 def is_quiet():
     return get_log_level() == "quiet"
 
@@ -0,0 +1,217 @@
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+import requests
+from log import detailed_log, log
+
+Cookies = Dict[str, str]
+
+
+class CookiePool:
+    """
+    A few independent cookie jars shared by concurrent workers.
+
+    `fetch` returns a fresh jar, either as a name -> value dict or as the
+    cookie list a browser reports (with "expires" timestamps). A jar is used
+    until `max_age` seconds pass or its earliest cookie expires; a background
+    thread replaces it `margin` seconds before that, so workers never wait for
+    a browser. `get` hands out the valid jars round robin and `invalidate`
+    retires one that a site started rejecting.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], Cookies | List[dict]],
+        size: int = 3,
+        max_age: float = 1800.0,
+        margin: float = 300.0,
+        retry_delay: float = 30.0,
+        name: str = "cookies",
+    ):
+        self.fetch = fetch
+        self.size = max(1, size)
+        self.max_age = max_age
+        self.margin = min(margin, max_age / 2)
+        self.retry_delay = retry_delay
+        self.name = name
+        self.refreshes = 0
+        self.failures = 0
+        self.invalidations = 0
+        # slot -> (cookies, expires_at), None until the slot is first filled
+        self._jars: List[Tuple[Cookies, float] | None] = [None] * self.size
+        self._next = 0
+        # when each slot is due for a refresh, empty slots straight away
+        self._refresh_at = [0.0] * self.size
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, wait: bool = True) -> "CookiePool":
+        """Start refreshing in the background, by default once one jar is ready"""
+        with self._cond:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-refresh", daemon=True
+                )
+                self._thread.start()
+        if wait:
+            self.get()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def get(self, timeout: float = 60.0) -> Tuple[int, Cookies]:
+        """
+        The next valid (slot, cookies), round robin. Waits up to `timeout` for
+        the first jar; after that a stale jar beats sending no cookies at all.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                now = time.time()
+                for _ in range(self.size):
+                    slot = self._next
+                    self._next = (self._next + 1) % self.size
+                    jar = self._jars[slot]
+                    if jar and jar[1] > now:
+                        return slot, jar[0]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    break
+                self._cond.wait(min(remaining, 1.0))
+            stale = [(slot, jar) for slot, jar in enumerate(self._jars) if jar]
+            if stale:
+                slot, jar = max(stale, key=lambda entry: entry[1][1])
+                return slot, jar[0]
+        log(f"⚠️  no {self.name} available, sending requests without them")
+        return -1, {}
+
+    def invalidate(self, slot: int):
+        """Retire a jar the site rejected, the refresher replaces it next"""
+        if slot < 0:
+            return
+        with self._cond:
+            jar = self._jars[slot]
+            if jar and jar[1] > 0:
+                self._jars[slot] = (jar[0], 0.0)
+                self._refresh_at[slot] = 0.0
+                self.invalidations += 1
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            now = time.time()
+            valid = sum(1 for jar in self._jars if jar and jar[1] > now)
+        return {
+            "size": self.size,
+            "valid": valid,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "invalidations": self.invalidations,
+        }
+
+    def _due(self) -> Tuple[int, float]:
+        """The slot most in need of a refresh and how long until it is due"""
+        slot = min(range(self.size), key=self._refresh_at.__getitem__)
+        return slot, max(self._refresh_at[slot] - time.time(), 0.0)
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                slot, wait = self._due()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+            self._refresh(slot)
+
+    def _refresh(self, slot: int):
+        try:
+            cookies, expires_at = self._normalize(self.fetch())
+        except Exception as e:
+            self.failures += 1
+            log(f"❌ {self.name} refresh failed: {e}")
+            with self._cond:
+                self._refresh_at[slot] = time.time() + self.retry_delay
+            return
+        now = time.time()
+        with self._cond:
+            self._jars[slot] = (cookies, expires_at)
+            # short lived jars are replaced half way through instead, and
+            # never sooner than a second from now
+            self._refresh_at[slot] = max(
+                expires_at - self.margin, now + (expires_at - now) / 2, now + 1.0
+            )
+            self.refreshes += 1
+            self._cond.notify_all()
+        detailed_log("refreshed %s jar %d (%d cookies)", self.name, slot, len(cookies))
+
+    def _normalize(self, fetched) -> Tuple[Cookies, float]:
+        expires_at = time.time() + self.max_age
+        if isinstance(fetched, dict):
+            return dict(fetched), expires_at
+        cookies = {}
+        for cookie in fetched:
+            cookies[cookie["name"]] = cookie["value"]
+            # session cookies report -1
+            if (cookie.get("expires") or -1) > 0:
+                expires_at = min(expires_at, cookie["expires"])
+        return cookies, expires_at
+
+
+def http_fetcher(url: str, headers: dict | None = None, timeout: float = 15) -> Callable[[], Cookies]:
+    """Jars from the cookies a plain GET of `url` sets"""
+
+    def fetch() -> Cookies:
+        with requests.Session() as session:
+            response = session.get(url, headers=headers, timeout=timeout)
+            response.raise_for_status()
+            return session.cookies.get_dict()
+
+    return fetch
+
+
+def fixture_fetcher(path: str) -> Callable[[], List[dict]]:
+    """Jars replayed from a recorded browser cookie list (JSON), for tests and offline runs"""
+
+    def fetch() -> List[dict]:
+        with open(path) as f:
+            # recorded expiry times have long passed, max_age applies instead
+            return [
+                {key: value for key, value in cookie.items() if key != "expires"}
+                for cookie in json.load(f)
+            ]
+
+    return fetch
+
+
+def browser_fetcher(url: str, user_agent: str | None = None) -> Callable[[], List[dict]]:
+    """
+    Jars from a real Chromium visit of `url`, needs playwright installed.
+    One browser is kept for every refresh, each jar gets a fresh context.
+    """
+    from browser_pool import PlaywrightSession
+
+    browser = PlaywrightSession(url, user_agent=user_agent)
+
+    def fetch() -> List[dict]:
+        return browser.cookies_for(url)
+
+    return fetch
+
+
+def fetcher_for(source: str, url: str, user_agent: str | None = None) -> Callable:
+    """'http', 'browser', or the path of a recorded cookie fixture"""
+    if source == "http":
+        return http_fetcher(url, headers={"User-Agent": user_agent} if user_agent else None)
+    if source == "browser":
+        return browser_fetcher(url, user_agent=user_agent)
+    return fixture_fetcher(source)
@@ -1,4 +1,21 @@
-from sqlalchemy import JSON, Column, Float, Integer, String, create_engine
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from config import get_sqlite_profile
+from log import detailed_log, log
+from sqlalchemy import (
+    JSON,
+    Column,
+    Float,
+    Integer,
+    String,
+    create_engine,
+    event,
+    func,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import declarative_base, sessionmaker
 from utils.model import Store, ProductInfo, PriceUpdates
@@ -14,6 +31,8 @@ class SimpleProduct(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String)
     price = Column(Float)
+    # hash of the details last sent to ingest, see snapshot.details_hash
+    details_hash = Column(Integer)
 
     def __repr__(self):
         return (
@@ -35,13 +54,81 @@ class ComplexProduct(Base):
         return f"<Product(store='{self.store}', id={self.id}, price={self.price})>"
 
 
-# Main database (only simple products)
-class MainDatabase:
-    def __init__(self, db_name: str = "main", echo: bool = False):
+# PRAGMAs applied to every connection when the "fast" profile is selected
+FAST_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -65536,  # negative means KiB, so ~64MB
+    "mmap_size": 268435456,  # 256MB
+    "temp_store": "MEMORY",
+}
+
+
+def _apply_fast_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in FAST_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _manual_transactions(dbapi_connection, connection_record):
+    # pysqlite only opens transactions before DML by itself, which turns the
+    # outermost SAVEPOINT into the transaction and its RELEASE into a commit;
+    # SQLAlchemy emits BEGIN itself instead (see _begin)
+    dbapi_connection.isolation_level = None
+
+
+def _begin(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def _add_missing_columns(engine, table):
+    """Add columns introduced after a table was first created (sqlite has no migrations here)"""
+    with engine.begin() as conn:
+        existing = {
+            row[1] for row in conn.exec_driver_sql(f"PRAGMA table_info({table.name})")
+        }
+        for column in table.columns:
+            if column.name not in existing:
+                conn.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} "
+                    f"{column.type.compile(engine.dialect)}"
+                )
+
+
+class SQLiteDatabase(ABC):
+    """
+    Engine setup and commit handling shared by the local sqlite databases.
+
+    With the "fast" profile every connection gets FAST_PRAGMAS and `batch()`
+    shares one session across calls, committing every `batch_size` writes
+    instead of after each one. Each call inside a batch runs in its own
+    SAVEPOINT, so a failed write only undoes itself. With the default profile
+    `batch()` does nothing.
+    """
+
+    def __init__(
+        self,
+        db_name: str,
+        echo: bool = False,
+        profile: str | None = None,
+        batch_size: int = 1000,
+    ):
         try:
             self.db_name = db_name
+            self.profile = profile or get_sqlite_profile()
+            self.batch_size = batch_size
+            self._batch_session = None
+            self._batch_thread = None
+            self._pending_writes = 0
+            # one SAVEPOINT per get_session() call inside a batch
+            self._savepoints = []
             self.engine = create_engine(
                 f"sqlite:///sqlite/{db_name}.db", echo=echo)
+            if self.profile == "fast":
+                event.listen(self.engine, "connect", _apply_fast_pragmas)
+                event.listen(self.engine, "connect", _manual_transactions)
+                event.listen(self.engine, "begin", _begin)
             self.Session = sessionmaker(bind=self.engine)
             self._setup_database()
         except:
@@ -50,30 +137,170 @@ class MainDatabase:
             )
             exit(1)
 
+    @abstractmethod
     def _setup_database(self):
-        """Setup main database with only simple_products table"""
-        Base.metadata.create_all(self.engine, tables=[SimpleProduct.__table__])
+        """Create the tables this database uses"""
 
     def get_session(self):
-        """Get a new database session"""
+        """Get a new database session, or the shared one inside `batch()`"""
+        # the batch session belongs to the thread that opened the batch,
+        # other threads keep committing their own sessions
+        if (
+            self._batch_session is not None
+            and self._batch_thread == threading.get_ident()
+        ):
+            self._savepoints.append(self._batch_session.begin_nested())
+            return self._batch_session
         return self.Session()
 
     def close_engine(self):
         """Close the database engine"""
         self.engine.dispose()
 
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into large transactions (fast profile only).
+        A failed write rolls back only its own savepoint; an exception
+        escaping the batch rolls back everything still pending in it.
+        """
+        if self.profile != "fast" or self._batch_session is not None:
+            yield self
+            return
+
+        self._batch_session = self.Session()
+        self._batch_thread = threading.get_ident()
+        self._pending_writes = 0
+        self._savepoints = []
+        try:
+            yield self
+            self._batch_session.commit()
+        except Exception:
+            self._batch_session.rollback()
+            raise
+        finally:
+            self._batch_session.close()
+            self._batch_session = None
+            self._batch_thread = None
+
+    def _commit(self, session):
+        if session is not self._batch_session:
+            session.commit()
+            return
+        savepoint = self._savepoints[-1]
+        if savepoint.is_active:
+            savepoint.commit()
+        self._pending_writes += 1
+        # only at the outermost call, a commit would end the open savepoints
+        if self._pending_writes >= self.batch_size and len(self._savepoints) == 1:
+            session.commit()
+            self._pending_writes = 0
+
+    def _rollback(self, session):
+        if session is not self._batch_session:
+            session.rollback()
+            return
+        # a failed flush already deactivated the savepoint, it still has to
+        # be rolled back to close it
+        savepoint = self._savepoints[-1]
+        if savepoint is session.get_nested_transaction():
+            savepoint.rollback()
+
+    def _close(self, session):
+        if session is not self._batch_session:
+            session.close()
+            return
+        # reads never commit their savepoint, release it here
+        savepoint = self._savepoints.pop()
+        if savepoint is session.get_nested_transaction():
+            if savepoint.is_active:
+                savepoint.commit()
+            else:
+                savepoint.rollback()
+
+
+class CacheDatabase(SQLiteDatabase):
+    """
+    SQLiteDatabase holding one cache table whose entries are evicted least
+    recently used first once their sizes add up to more than `max_bytes`.
+
+    Subclasses set `entry_model`, a model with a single primary key and
+    `size` and `accessed_at` columns, and keep `_size` up to date as they
+    store entries.
+    """
+
+    entry_model = None
+
+    def __init__(self, db_name: str, echo: bool, profile: str | None, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        super().__init__(db_name, echo, profile)
+        self._size = self._total_size()
+
+    def evict(self):
+        """Drop least recently used entries until the cache is under 90% of max_bytes"""
+        target = int(self.max_bytes * 0.9)
+        model = self.entry_model
+        key = model.__mapper__.primary_key[0]
+        session = self.Session()
+        try:
+            size = self._total_size(session)
+            doomed = []
+            for entry_key, entry_size in (
+                session.query(key, model.size).order_by(model.accessed_at).yield_per(500)
+            ):
+                if size <= target:
+                    break
+                size -= entry_size
+                doomed.append(entry_key)
+            for start in range(0, len(doomed), 500):
+                session.query(model).filter(
+                    key.in_(doomed[start:start + 500])
+                ).delete(synchronize_session=False)
+            session.commit()
+            with self._lock:
+                self._size = size
+            detailed_log("%s evicted %d entries", self.db_name, len(doomed))
+        except Exception as e:
+            session.rollback()
+            log(f"❌ {self.db_name} eviction failed: {e}")
+        finally:
+            session.close()
+
+    def _total_size(self, session=None) -> int:
+        own = session is None
+        session = session or self.Session()
+        try:
+            return session.query(func.coalesce(func.sum(self.entry_model.size), 0)).scalar()
+        finally:
+            if own:
+                session.close()
+
+
+# Main database (only simple products)
+class MainDatabase(SQLiteDatabase):
+    def __init__(
+        self, db_name: str = "main", echo: bool = False, profile: str | None = None
+    ):
+        super().__init__(db_name, echo, profile)
+
+    def _setup_database(self):
+        """Setup main database with only simple_products table"""
+        Base.metadata.create_all(self.engine, tables=[SimpleProduct.__table__])
+        _add_missing_columns(self.engine, SimpleProduct.__table__)
+
     def clear_data(self):
         """Clear all data from simple products table"""
         session = self.get_session()
         try:
             session.query(SimpleProduct).delete()
-            session.commit()
+            self._commit(session)
             print(f"Cleared all data from {self.db_name} database")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error clearing data from {self.db_name}: {e}")
         finally:
-            session.close()
+            self._close(session)
 
     def check_if_in_db(self, store: str, id: int) -> bool:
         """Check if a product exists in the database"""
@@ -89,7 +316,7 @@ class MainDatabase:
             print(f"Error checking if product {store}-{id} exists: {e}")
             return False
         finally:
-            session.close()
+            self._close(session)
 
     def add_simple_product(self, store: str, id: int, name: str, price: float) -> bool:
         """
@@ -104,7 +331,7 @@ class MainDatabase:
                     store=store, id=id).first()
             )
             if existing:
-                print(f"Product {store}-{id} already exists in database")
+                detailed_log("Product %s-%s already exists in database", store, id)
                 return False
 
             # Insert new product
@@ -112,17 +339,18 @@ class MainDatabase:
                 store=store, id=id, name=name, price=price
             )  # Add name parameter
             session.add(product)
-            session.commit()
-            print(f"Added simple product: {
-                  store}-{id} '{name}' with price {price}")
+            self._commit(session)
+            detailed_log(
+                "Added simple product: %s-%s '%s' with price %s", store, id, name, price
+            )
             return True
 
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error adding simple product {store}-{id}: {e}")
             return False
         finally:
-            session.close()
+            self._close(session)
 
     def check_price(self, store: str, id: int, new_price: float) -> bool:
         """
@@ -136,29 +364,29 @@ class MainDatabase:
                     store=store, id=id).first()
             )
             if not existing:
-                print(f"Product {store}-{id} not found in database")
+                detailed_log("Product %s-%s not found in database", store, id)
                 return False
 
             if existing.price == new_price:
-                print(
-                    f"Price for {
-                        store}-{id} is already {new_price}, no update needed"
+                detailed_log(
+                    "Price for %s-%s is already %s, no update needed", store, id, new_price
                 )
                 return False
 
             old_price = existing.price
             existing.price = new_price
-            session.commit()
-            print(f"Updated price for {
-                  store}-{id} from {old_price} to {new_price}")
+            self._commit(session)
+            detailed_log(
+                "Updated price for %s-%s from %s to %s", store, id, old_price, new_price
+            )
             return True
 
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error checking/updating price for {store}-{id}: {e}")
             return False
         finally:
-            session.close()
+            self._close(session)
 
     def get_simple_products_by_store(self, store: str):
         """Get all simple products for a store"""
@@ -169,7 +397,7 @@ class MainDatabase:
             print(f"Error getting simple products for store {store}: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_all_simple_products(self):
         """Get all simple products"""
@@ -180,7 +408,7 @@ class MainDatabase:
             print(f"Error getting all simple products: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_simple_product_count(self):
         """Get count of simple products"""
@@ -191,7 +419,7 @@ class MainDatabase:
             print(f"Error getting simple product count: {e}")
             return 0
         finally:
-            session.close()
+            self._close(session)
 
     def get_product_price(self, store: str, id: int) -> float:
         """Get the current price of a product, returns None if not found"""
@@ -203,24 +431,92 @@ class MainDatabase:
         except Exception as e:
             print(f"Error getting price for {store}-{id}: {e}")
             return None
+        finally:
+            self._close(session)
+
+    def iter_prices(self, chunk_size: int = 10000):
+        """
+        Yield (store, id, price, details_hash) for every simple product,
+        ordered by store then id
+        """
+        session = self.get_session()
+        try:
+            query = (
+                session.query(
+                    SimpleProduct.store,
+                    SimpleProduct.id,
+                    SimpleProduct.price,
+                    SimpleProduct.details_hash,
+                )
+                .order_by(SimpleProduct.store, SimpleProduct.id)
+                .yield_per(chunk_size)
+            )
+            for store, id, price, details_hash in query:
+                yield store, id, price, details_hash
+        finally:
+            self._close(session)
+
+    def bulk_add_simple_products(self, rows: list[dict]) -> int:
+        """
+        Insert many simple products in one transaction, skipping existing ones.
+        Each row needs store, id, name, price and details_hash (None if unknown).
+        Returns the number of rows sent.
+        """
+        if not rows:
+            return 0
+        session = self.Session()  # always its own transaction
+        try:
+            stmt = sqlite_insert(SimpleProduct.__table__).on_conflict_do_nothing()
+            session.execute(stmt, rows)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            print(f"Error bulk adding {len(rows)} simple products: {e}")
+            return 0
         finally:
             session.close()
 
+    def bulk_update_prices(self, rows: list[dict]) -> int:
+        """
+        Update many prices in one transaction.
+        Each row needs store, id and price. Returns the number of rows sent.
+        """
+        return self._bulk_update("price", rows)
 
-# Mock database (both simple and complex products)
-class MockDatabase:
-    def __init__(self, db_name: str = "mock", echo: bool = False):
+    def bulk_update_details_hashes(self, rows: list[dict]) -> int:
+        """
+        Update many details hashes in one transaction.
+        Each row needs store, id and details_hash. Returns the number of rows sent.
+        """
+        return self._bulk_update("details_hash", rows)
+
+    def _bulk_update(self, column: str, rows: list[dict]) -> int:
+        """Set `column` of many products, matched by store and id, in one transaction"""
+        if not rows:
+            return 0
+        session = self.Session()  # always its own transaction
         try:
-            self.db_name = db_name
-            self.engine = create_engine(
-                f"sqlite:///sqlite/{db_name}.db", echo=echo)
-            self.Session = sessionmaker(bind=self.engine)
-            self._setup_database()
-        except:
-            print(
-                "vickles you silly billy... you gotta create the `sqlite/` directory first!!"
+            session.execute(
+                update(SimpleProduct),
+                [{"store": row["store"], "id": row["id"], column: row[column]} for row in rows],
             )
-            exit(1)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            print(f"Error bulk updating {len(rows)} {column} values: {e}")
+            return 0
+        finally:
+            session.close()
+
+
+# Mock database (both simple and complex products)
+class MockDatabase(SQLiteDatabase):
+    def __init__(
+        self, db_name: str = "mock", echo: bool = False, profile: str | None = None
+    ):
+        super().__init__(db_name, echo, profile)
 
     def _setup_database(self):
         """Setup mock database with both simple_products and products tables"""
@@ -228,14 +524,7 @@ class MockDatabase:
             self.engine, tables=[
                 SimpleProduct.__table__, ComplexProduct.__table__]
         )
-
-    def get_session(self):
-        """Get a new database session"""
-        return self.Session()
-
-    def close_engine(self):
-        """Close the database engine"""
-        self.engine.dispose()
+        _add_missing_columns(self.engine, SimpleProduct.__table__)
 
     def clear_data(self):
         """Clear all data from both tables"""
@@ -243,13 +532,13 @@ class MockDatabase:
         try:
             session.query(SimpleProduct).delete()
             session.query(ComplexProduct).delete()
-            session.commit()
+            self._commit(session)
             print(f"Cleared all data from {self.db_name} database")
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error clearing data from {self.db_name}: {e}")
         finally:
-            session.close()
+            self._close(session)
 
     def upsert_simple_product(self, store: str, id: int, name: str, price: float):
         """Insert or update a simple product"""
@@ -262,24 +551,25 @@ class MockDatabase:
             if existing:
                 existing.name = name  # Add this line
                 existing.price = price
-                session.commit()
-                print(f"Updated simple product: {
-                      store}-{id} '{name}' price to {price}")
+                self._commit(session)
+                detailed_log(
+                    "Updated simple product: %s-%s '%s' price to %s", store, id, name, price
+                )
                 return existing
             else:
                 product = SimpleProduct(
                     store=store, id=id, name=name, price=price
                 )  # Add name parameter
                 session.add(product)
-                session.commit()
-                print(f"Added new simple product: {store}-{id} '{name}'")
+                self._commit(session)
+                detailed_log("Added new simple product: %s-%s '%s'", store, id, name)
                 return product
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error upserting simple product {store}-{id}: {e}")
             return None
         finally:
-            session.close()
+            self._close(session)
 
     def upsert_complex_product(
         self, store: str, id: int, name: str, price: float, details: dict
@@ -295,8 +585,8 @@ class MockDatabase:
                 existing.name = name  # Add this line
                 existing.price = price
                 existing.details = details
-                session.commit()
-                print(f"Updated complex product: {store}-{id} '{name}'")
+                self._commit(session)
+                detailed_log("Updated complex product: %s-%s '%s'", store, id, name)
                 return existing
             else:
                 product = ComplexProduct(
@@ -307,15 +597,15 @@ class MockDatabase:
                     details=details,
                 )
                 session.add(product)
-                session.commit()
-                print(f"Added new complex product: {store}-{id} '{name}'")
+                self._commit(session)
+                detailed_log("Added new complex product: %s-%s '%s'", store, id, name)
                 return product
         except Exception as e:
-            session.rollback()
+            self._rollback(session)
             print(f"Error upserting complex product {store}-{id}: {e}")
             return None
         finally:
-            session.close()
+            self._close(session)
 
     def get_simple_products_by_store(self, store: str):
         """Get all simple products for a store"""
@@ -326,7 +616,7 @@ class MockDatabase:
             print(f"Error getting simple products for store {store}: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_complex_products_by_store(self, store: str):
         """Get all complex products for a store"""
@@ -337,7 +627,7 @@ class MockDatabase:
             print(f"Error getting complex products for store {store}: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_all_simple_products(self):
         """Get all simple products"""
@@ -348,7 +638,7 @@ class MockDatabase:
             print(f"Error getting all simple products: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_all_complex_products(self):
         """Get all complex products"""
@@ -359,7 +649,7 @@ class MockDatabase:
             print(f"Error getting all complex products: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
     def get_simple_product_count(self):
         """Get count of simple products"""
@@ -370,7 +660,7 @@ class MockDatabase:
             print(f"Error getting simple product count: {e}")
             return 0
         finally:
-            session.close()
+            self._close(session)
 
     def get_complex_product_count(self):
         """Get count of complex products"""
@@ -381,7 +671,7 @@ class MockDatabase:
             print(f"Error getting complex product count: {e}")
             return 0
         finally:
-            session.close()
+            self._close(session)
 
     def search_products_by_detail(self, key: str, value: str):
         """Search complex products by a detail key-value pair"""
@@ -396,19 +686,21 @@ class MockDatabase:
             print(f"Error searching products by detail {key}={value}: {e}")
             return []
         finally:
-            session.close()
+            self._close(session)
 
 
 # Factory function
-def create_database(db_type: str, name: str = "", echo: bool = False):
+def create_database(
+    db_type: str, name: str = "", echo: bool = False, profile: str | None = None
+):
     """Factory function to create database instances"""
     if name == "":
         name = db_type
 
     if db_type.lower() == "main":
-        return MainDatabase(name, echo)
+        return MainDatabase(name, echo, profile)
     elif db_type.lower() == "mock":
-        return MockDatabase(name, echo)
+        return MockDatabase(name, echo, profile)
     else:
         raise ValueError(f"Unknown database type: {
                          db_type}. Use 'main' or 'mock'.")
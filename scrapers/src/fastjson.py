@@ -0,0 +1,87 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+try:
+    import msgspec
+except ImportError:  # falls back to the stdlib decoder
+    msgspec = None
+
+
+def loads(data: bytes | str) -> Any:
+    """Decode a JSON document, preferring msgspec over the stdlib"""
+    if msgspec:
+        return msgspec.json.decode(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON"""
+    if msgspec:
+        return msgspec.json.encode(obj)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def response_json(response) -> Any:
+    """Faster stand-in for requests' response.json()"""
+    return loads(response.content)
+
+
+# (id, brand, name, size, pricing.now) of one Coles listing product
+ColesListingItem = Tuple[Any, Any, Any, Any, Any]
+
+if msgspec:
+
+    class _ColesPricing(msgspec.Struct):
+        now: Any = None
+
+    class _ColesResult(msgspec.Struct, rename={"type": "_type"}):
+        type: Any = None
+        id: Any = None
+        brand: Any = None
+        name: Any = None
+        size: Any = None
+        pricing: Optional[_ColesPricing] = None
+
+    class _ColesSearchResults(msgspec.Struct):
+        noOfResults: Any = 0
+        results: List[_ColesResult] = []
+
+    class _ColesPageProps(msgspec.Struct):
+        searchResults: Optional[_ColesSearchResults] = None
+
+    class _ColesListing(msgspec.Struct):
+        pageProps: Optional[_ColesPageProps] = None
+
+    _coles_listing_decoder = msgspec.json.Decoder(_ColesListing)
+
+
+def decode_coles_listing(data: bytes) -> Tuple[int, int, List[ColesListingItem]]:
+    """
+    Decode a Coles browse page into (noOfResults, result count, product items).
+    With msgspec only the fields we use are materialized; the rest of the
+    document is skipped while parsing.
+    """
+    if msgspec:
+        page = _coles_listing_decoder.decode(data)
+        search = page.pageProps.searchResults if page.pageProps else None
+        if search is None:
+            return 0, 0, []
+        return search.noOfResults or 0, len(search.results), [
+            (r.id, r.brand, r.name, r.size, r.pricing.now if r.pricing else None)
+            for r in search.results
+            if r.type == "PRODUCT"
+        ]
+
+    search = (json.loads(data).get("pageProps") or {}).get("searchResults") or {}
+    results = search.get("results", [])
+    return search.get("noOfResults") or 0, len(results), [
+        (
+            r.get("id"),
+            r.get("brand"),
+            r.get("name"),
+            r.get("size"),
+            (r.get("pricing") or {}).get("now"),
+        )
+        for r in results
+        if r.get("_type") == "PRODUCT"
+    ]
@@ -0,0 +1,209 @@
+import threading
+import time
+import zlib
+from hashlib import blake2b
+from typing import Callable
+
+import requests
+from config import get_http_cache_size
+from database import Base, CacheDatabase
+from log import detailed_log, log
+from sqlalchemy import Column, Float, Integer, LargeBinary, String
+
+
+class CachedResponse(Base):
+    __tablename__ = "http_cache"
+
+    url = Column(String, primary_key=True)
+    etag = Column(String)
+    last_modified = Column(String)
+    content_type = Column(String)
+    body = Column(LargeBinary, nullable=False)  # zlib compressed
+    body_hash = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    accessed_at = Column(Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CachedResponse(url='{self.url}', size={self.size})>"
+
+
+class HttpCache(CacheDatabase):
+    """
+    On-disk cache of successful GET responses, keyed by the full URL or a
+    caller given key.
+
+    Cached entries are revalidated with If-None-Match / If-Modified-Since, and
+    a 304 is answered from disk as a 200. A 200 whose body hashes the same as
+    the cached one only refreshes the entry's access time. Responses carry
+    `from_cache` (served from disk) and `unchanged` (same body as last time).
+    Once the compressed bodies exceed `max_bytes`, the least recently used
+    entries are evicted down to 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "http_cache",
+        echo: bool = False,
+        profile: str | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.hits = 0
+        self.revalidated = 0
+        self.unchanged = 0
+        self.misses = 0
+        super().__init__(
+            db_name,
+            echo,
+            profile,
+            get_http_cache_size() if max_bytes is None else max_bytes,
+        )
+
+    entry_model = CachedResponse
+
+    def _setup_database(self):
+        """Setup cache database with only the cache table"""
+        Base.metadata.create_all(self.engine, tables=[CachedResponse.__table__])
+
+    def get(
+        self,
+        send: Callable,
+        url: str,
+        params=None,
+        headers=None,
+        key: str | None = None,
+        **kwargs,
+    ) -> requests.Response:
+        """
+        `send(url, ...)` (e.g. requests.get) through the cache. The entry is
+        stored under `key`, the full request URL unless given, so a URL with
+        a changing part (like a build id) can keep one entry.
+        """
+        if self.max_bytes <= 0:
+            response = send(url, params=params, headers=headers, **kwargs)
+            response.from_cache = False
+            response.unchanged = False
+            return response
+
+        full_url = requests.Request("GET", url, params=params).prepare().url
+        key = key or full_url
+        cached = self._lookup(key)
+        headers = dict(headers or {})
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = send(full_url, headers=headers, **kwargs)
+        response.from_cache = False
+        response.unchanged = False
+
+        if response.status_code == 304 and cached is not None:
+            self._touch(key)
+            with self._lock:
+                self.hits += 1
+                self.revalidated += 1
+            response.status_code = 200
+            response._content = zlib.decompress(cached.body)
+            response.from_cache = True
+            response.unchanged = True
+            if cached.content_type:
+                response.headers["Content-Type"] = cached.content_type
+            return response
+
+        if response.status_code != 200:
+            return response
+
+        body_hash = blake2b(response.content, digest_size=16).hexdigest()
+        if cached is not None and cached.body_hash == body_hash:
+            self._touch(key)
+            with self._lock:
+                self.hits += 1
+                self.unchanged += 1
+            response.unchanged = True
+            return response
+
+        with self._lock:
+            self.misses += 1
+        self._store(key, response, body_hash)
+        return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "revalidated": self.revalidated,
+                "unchanged": self.unchanged,
+                "misses": self.misses,
+                "bytes": self._size,
+            }
+
+    def _lookup(self, key: str) -> CachedResponse | None:
+        session = self.Session()
+        try:
+            entry = session.get(CachedResponse, key)
+            if entry is not None:
+                session.expunge(entry)
+            return entry
+        except Exception as e:
+            log(f"❌ http cache read failed: {e}")
+            return None
+        finally:
+            session.close()
+
+    def _touch(self, key: str):
+        session = self.Session()
+        try:
+            session.query(CachedResponse).filter_by(url=key).update(
+                {"accessed_at": time.time()}
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            detailed_log("http cache touch failed: %s", e)
+        finally:
+            session.close()
+
+    def _store(self, key: str, response: requests.Response, body_hash: str):
+        body = zlib.compress(response.content, 6)
+        session = self.Session()
+        try:
+            old = session.get(CachedResponse, key)
+            old_size = old.size if old is not None else 0
+            session.merge(
+                CachedResponse(
+                    url=key,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    content_type=response.headers.get("Content-Type"),
+                    body=body,
+                    body_hash=body_hash,
+                    size=len(body),
+                    accessed_at=time.time(),
+                )
+            )
+            session.commit()
+            with self._lock:
+                self._size += len(body) - old_size
+                over = self._size > self.max_bytes
+        except Exception as e:
+            session.rollback()
+            log(f"❌ http cache write failed: {e}")
+            return
+        finally:
+            session.close()
+        if over:
+            self.evict()
+
+
+_cache: HttpCache | None = None
+_cache_lock = threading.Lock()
+
+
+def shared_cache() -> HttpCache:
+    """The process wide cache, opened on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -0,0 +1,306 @@
+import gzip
+import os
+import threading
+import time
+from typing import Callable, List
+
+import requests
+from config import get_ingest_batch_size, get_ingest_compression
+from fastjson import dumps, response_json
+from log import detailed_log, log
+from requests.adapters import HTTPAdapter
+from telemetry import run_stats
+from utils.model import PriceUpdates, ProductInfo
+
+try:
+    import zstandard
+except ImportError:  # gzip is used instead
+    zstandard = None
+
+HEADERS = {"accept": "application/json", "Content-Type": "application/json"}
+
+
+class DeliveryError(str):
+    """
+    Why ingest did not accept a payload, with the HTTP status it answered
+    (None when the request never got an answer)
+    """
+
+    status: int | None
+
+    def __new__(cls, reason: str, status: int | None = None):
+        error = super().__new__(cls, reason)
+        error.status = status
+        return error
+
+    @property
+    def retryable(self) -> bool:
+        """Only transport errors, server errors and throttling can pass later"""
+        return self.status is None or self.status == 429 or self.status >= 500
+
+
+# (kind, payload, reason) for every item ingest did not accept
+FailureHandler = Callable[[str, dict, DeliveryError], None]
+
+
+def product_payload(product_info: ProductInfo) -> dict:
+    """Body of POST /api/products for one product"""
+    return {
+        "store": product_info.store.value
+        if hasattr(product_info.store, "value")
+        else str(product_info.store),
+        "id": str(product_info.store_product_id),
+        "name": product_info.product_name,
+        "price": product_info.price,
+        "details": product_info.details,
+    }
+
+
+def price_payload(price_update: PriceUpdates) -> dict:
+    """Body of POST /api/price-update for one price change"""
+    return {
+        "store": price_update.store.value
+        if hasattr(price_update.store, "value")
+        else str(price_update.store),
+        "store_product_id": str(price_update.store_product_id),
+        "new_price": price_update.price,
+    }
+
+
+class Batcher:
+    """
+    Collects payloads for one endpoint and sends them as a single batch once
+    `max_items` are queued or the oldest one is `max_delay` seconds old.
+    """
+
+    def __init__(
+        self,
+        client: "IngestClient",
+        kind: str,
+        single_path: str,
+        batch_path: str,
+        batch_key: str,
+    ):
+        self.client = client
+        self.kind = kind
+        self.single_path = single_path
+        self.batch_path = batch_path
+        self.batch_key = batch_key
+        self.lock = threading.Lock()
+        self.pending: List[dict] = []
+        self.oldest = 0.0
+
+    def add(self, payload: dict):
+        with self.lock:
+            if not self.pending:
+                self.oldest = time.monotonic()
+            self.pending.append(payload)
+            if (
+                len(self.pending) < self.client.batch_size
+                and time.monotonic() - self.oldest < self.client.max_delay
+            ):
+                return
+            batch, self.pending = self.pending, []
+        self.client.send_batch(self, batch)
+
+    def flush(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if batch:
+            self.client.send_batch(self, batch)
+
+
+class IngestClient:
+    """
+    Sends products and price updates to ingest in compressed batches over a
+    pooled session. If ingest has no batch endpoints (404/405/415) the client
+    switches to one plain POST per item for the rest of the run.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        batch_size: int = 100,
+        max_delay: float = 5.0,
+        compression: str = "gzip",
+        pool_size: int = 10,
+        timeout: float = 60,
+        on_failure: FailureHandler | None = None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.on_failure = on_failure
+        self.compression = compression
+        if compression == "zstd" and zstandard is None:
+            log("zstandard is not installed, compressing ingest batches with gzip")
+            self.compression = "gzip"
+        self.batching = True
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(HEADERS)
+
+        self.products = Batcher(
+            self, "product", "/api/products", "/api/products/batch", "products"
+        )
+        self.prices = Batcher(
+            self, "price", "/api/price-update", "/api/price-update/batch", "updates"
+        )
+        self.batchers = {"product": self.products, "price": self.prices}
+
+        self.stats_lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.bytes_sent = 0
+
+    def send_product(self, product_info: ProductInfo) -> bool:
+        """Queue a product, returns True once it is accepted for sending"""
+        self.products.add(product_payload(product_info))
+        return True
+
+    def send_payload(self, payload: dict) -> bool:
+        """Queue a product already shaped like product_payload's output"""
+        self.products.add(payload)
+        return True
+
+    def send_price(self, price_update: PriceUpdates) -> bool:
+        """Queue a price update, returns True once it is accepted for sending"""
+        self.prices.add(price_payload(price_update))
+        return True
+
+    def flush(self):
+        """Send everything still queued"""
+        self.products.flush()
+        self.prices.flush()
+
+    def close(self):
+        self.flush()
+        self.session.close()
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "bytes_sent": self.bytes_sent,
+            "batching": self.batching,
+            "compression": self.compression,
+        }
+
+    def send_batch(self, batcher: Batcher, payloads: List[dict]):
+        """Deliver a batch and hand every rejected payload to on_failure"""
+        errors = self.deliver(batcher.kind, payloads)
+        failed = [(p, e) for p, e in zip(payloads, errors) if e is not None]
+        if not failed:
+            return
+        log(
+            f"unsuccessfully sent {len(failed)} {batcher.kind}(s) to ingest: {
+                failed[0][1]}"
+        )
+        if self.on_failure:
+            for payload, error in failed:
+                self.on_failure(batcher.kind, payload, error)
+
+    def deliver(self, kind: str, payloads: List[dict]) -> List[DeliveryError | None]:
+        """
+        Send payloads of one kind right away. Returns None for every payload
+        ingest accepted and the reason for every one it didn't.
+        """
+        batcher = self.batchers[kind]
+        with run_stats.timed("etl_send"):
+            if self.batching:
+                errors = self.deliver_batch(batcher, payloads)
+            else:
+                errors = self.deliver_singles(batcher, payloads)
+
+        failed = sum(1 for e in errors if e is not None)
+        with self.stats_lock:
+            self.sent += len(payloads) - failed
+            self.failed += failed
+        return errors
+
+    def deliver_batch(
+        self, batcher: Batcher, payloads: List[dict]
+    ) -> List[DeliveryError | None]:
+        body = self.encode({batcher.batch_key: payloads})
+        try:
+            res = self.session.post(
+                f"{self.base_url}{batcher.batch_path}",
+                data=body,
+                headers=self.content_headers(),
+                timeout=self.timeout,
+            )
+        except requests.RequestException as e:
+            return [DeliveryError(f"{e}")] * len(payloads)
+
+        if res.status_code in (404, 405, 415):
+            log(
+                f"ingest has no usable {batcher.batch_path} "
+                f"({res.status_code}), falling back to single posts"
+            )
+            self.batching = False
+            return self.deliver_singles(batcher, payloads)
+        if not res.ok:
+            return [DeliveryError(f"{res}: {res.text[:200]}", res.status_code)] * len(
+                payloads
+            )
+
+        with self.stats_lock:
+            self.batches += 1
+            self.bytes_sent += len(body)
+        errors = [None] * len(payloads)
+        for result in response_json(res).get("results", []):
+            if result.get("status") != "success":
+                # items without a status code hit an unexpected server error
+                errors[result["index"]] = DeliveryError(
+                    f"{result.get('status_code') or ''} {result.get('detail')}".strip(),
+                    result.get("status_code") or 500,
+                )
+        detailed_log(
+            f"sent {batcher.kind} batch of {len(payloads)} ({len(body)} bytes)"
+        )
+        return errors
+
+    def deliver_singles(
+        self, batcher: Batcher, payloads: List[dict]
+    ) -> List[DeliveryError | None]:
+        errors = []
+        for payload in payloads:
+            try:
+                res = self.session.post(
+                    f"{self.base_url}{batcher.single_path}",
+                    json=payload,
+                    timeout=self.timeout,
+                )
+            except requests.RequestException as e:
+                errors.append(DeliveryError(f"{e}"))
+                continue
+            errors.append(
+                None if res.ok else DeliveryError(f"{res}: {res.text[:200]}", res.status_code)
+            )
+        return errors
+
+    def content_headers(self) -> dict:
+        if self.compression == "none":
+            return {}
+        return {"Content-Encoding": self.compression}
+
+    def encode(self, body: dict) -> bytes:
+        raw = dumps(body)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(raw)
+        if self.compression == "gzip":
+            return gzip.compress(raw, compresslevel=6)
+        return raw
+
+
+def open_client(**kwargs) -> IngestClient:
+    """A client for the configured ingest service, `kwargs` overriding the config"""
+    kwargs.setdefault("batch_size", get_ingest_batch_size())
+    kwargs.setdefault("compression", get_ingest_compression())
+    return IngestClient(os.getenv("py_etl_url", "http://localhost:8000"), **kwargs)
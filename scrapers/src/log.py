@@ -1,12 +1,96 @@
-from config import is_quiet, is_verbose
-from datetime import date, datetime
+import atexit
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
 
+from config import get_log_level
 
-def log(string: str):
-    if not is_quiet():
-        print(f"LOG [{datetime.now()}]: {string}")
+# quiet hides log(), normal shows it, verbose adds detailed_log()
+LEVELS = {"quiet": logging.WARNING, "normal": logging.INFO, "verbose": logging.DEBUG}
 
+_logger = logging.getLogger("scrapers")
+_logger.propagate = False
+_handler: "_BufferedHandler | None" = None
+_listener: QueueListener | None = None
 
-def detailed_log(string: str):
-    if is_verbose():
-        print(f"[{datetime.now()}]: {string}")
+
+class _Formatter(logging.Formatter):
+    """Keeps the old `LOG [time]: msg` / `[time]: msg` line format"""
+
+    def format(self, record):
+        prefix = "LOG " if record.levelno >= logging.INFO else ""
+        timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.created))
+        return f"{prefix}[{timestamp}.{int(record.msecs):03d}]: {record.getMessage()}"
+
+
+class _BufferedHandler(logging.StreamHandler):
+    """Writes to stdout (or `stream`) but flushes at most every `every` seconds"""
+
+    def __init__(self, stream=None, every: float = 0.5):
+        logging.Handler.__init__(self)
+        self._stream = stream
+        self.every = every
+        self._last_flush = 0.0
+
+    @property
+    def stream(self):
+        # looked up on every write so redirected stdout is followed
+        return self._stream or sys.stdout
+
+    def flush(self, force: bool = False):
+        now = time.monotonic()
+        if force or now - self._last_flush >= self.every:
+            self._last_flush = now
+            super().flush()
+
+
+def configure_logging(level: str | None = None, stream=None):
+    """
+    Set the level (from config unless given) and route records through a
+    queue to a writer thread, so callers never block on output.
+    """
+    global _handler, _listener
+    if _listener is not None:
+        _listener.stop()
+        _logger.handlers.clear()
+    _logger.setLevel(LEVELS.get(level or get_log_level(), logging.INFO))
+
+    _handler = _BufferedHandler(stream)
+    _handler.setFormatter(_Formatter())
+    records = queue.SimpleQueue()
+    _logger.addHandler(QueueHandler(records))
+    _listener = QueueListener(records, _handler)
+    _listener.start()
+
+
+def flush():
+    """Write out everything queued so far"""
+    if _listener is not None:
+        _listener.stop()
+        _handler.flush(force=True)
+        _listener.start()
+
+
+def log(msg, *args):
+    """Normal output. Pass values as args (`log("got %s", x)`) to format them only when shown."""
+    if _listener is None:
+        configure_logging()
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info(msg, *args)
+
+
+def detailed_log(msg, *args):
+    """Verbose output, formatted only when shown"""
+    if _listener is None:
+        configure_logging()
+    if _logger.isEnabledFor(logging.DEBUG):
+        _logger.debug(msg, *args)
+
+
+@atexit.register
+def _shutdown():
+    if _listener is not None:
+        _listener.stop()
+        _handler.flush(force=True)
@@ -1,26 +1,72 @@
 from typing import List
 
-import requests
-from config import is_mock, is_production, parse_and_set_env
+from checkpoint import Checkpoint
+from config import (
+    get_detail_workers,
+    get_export_parquet_dir,
+    get_ingest_batch_size,
+    get_openmetrics_path,
+    get_refresh_details,
+    get_send_workers,
+    get_shards,
+    get_stats_dir,
+    is_mock,
+    is_production,
+    parse_and_set_env,
+)
 from database import MainDatabase, MockDatabase
-from log import detailed_log, log
+from http_cache import shared_cache
+from ingest_client import IngestClient, open_client
+from log import configure_logging, detailed_log, log
 from mockscraper import MockScraperAldi
+from outbox import Outbox
+from parquet_export import ParquetExporter, open_exporter
+from pipeline import fetch_and_send, send_all
+from ratelimit import limiter_stats
+from shards import scrape_sharded
+from snapshot import PriceSnapshot, details_hash
+from telemetry import run_stats
 
-# still not working i fix later ->>>>
-# from scrapers.wooliesV2 import WoolworthsScraper
 from utils.model import PriceUpdates, ProductInfo, Scraper
 
 from scrapers.aldiV2 import AldiScraper
 from scrapers.colesV2 import ColesScraper
+from scrapers.igaV2 import IGAScraper
+from scrapers.wooliesV2 import WoolworthsScraper
 import os
+from datetime import datetime
 
-main_db = MainDatabase()
-test_db = MockDatabase()
-py_etl_url = os.environ["py_etl_url"]
+main_db: MainDatabase = None
+test_db: MockDatabase = None
+snapshot: PriceSnapshot = None
+ingest: IngestClient = None
+outbox: Outbox = None
+checkpoint: Checkpoint = None
+exporter: ParquetExporter = None
 
 
 def main():
+    global main_db, test_db, snapshot, ingest, outbox, checkpoint, exporter
     parse_and_set_env()
+    configure_logging()
+    # created after parsing so --sqlite-profile applies
+    main_db = MainDatabase()
+    test_db = MockDatabase()
+    with run_stats.stage("snapshot_load"):
+        snapshot = PriceSnapshot.load(main_db)
+    checkpoint = Checkpoint()
+    log(f"run id: {checkpoint.run_id}")
+    exporter = open_exporter(get_export_parquet_dir())
+    if is_production():
+        ingest = open_client(
+            pool_size=get_send_workers(ingest_target()),
+            on_failure=lambda kind, payload, reason: outbox.put(kind, payload, reason),
+        )
+        # retry whatever the last run could not deliver before scraping more
+        outbox = Outbox()
+        with run_stats.stage("outbox_drain"):
+            outbox.drain(ingest, batch_size=get_ingest_batch_size())
+        log(f"outbox: {outbox.depth()}")
     scraper_list = (
         [
             # Add Mock Scrapers here
@@ -30,17 +76,48 @@ def main():
         else [
             ColesScraper(),
             AldiScraper(),
+            WoolworthsScraper(),
+            IGAScraper(),
             # Add real scrapers here
         ]
     )
 
-    stores = category_scrape(scraper_list)
-
-    for i, product_list in enumerate(stores):
-        product_scrape(scraper_list[i], product_list)
-
-    for i, product_list in enumerate(stores):
-        product_price_check(scraper_list[i], product_list)
+    with run_stats.stage("category_scrape"):
+        stores = category_scrape(scraper_list)
+    if exporter:
+        for product_list in stores:
+            exporter.add_listings(product_list)
+
+    # change detection runs against the snapshot, only the diffs are written back
+    try:
+        with test_db.batch():
+            with run_stats.stage("product_scrape"):
+                for i, product_list in enumerate(stores):
+                    product_scrape(scraper_list[i], product_list)
+
+            with run_stats.stage("price_check"):
+                for i, product_list in enumerate(stores):
+                    product_price_check(scraper_list[i], product_list)
+    finally:
+        with run_stats.stage("snapshot_flush"):
+            snapshot.flush(main_db)
+        if ingest:
+            with run_stats.stage("ingest_close"):
+                ingest.close()
+        if exporter:
+            with run_stats.stage("parquet_export"):
+                exporter.close()
+        run_stats.finish(
+            os.path.join(
+                get_stats_dir(), f"run-{datetime.now():%Y%m%dT%H%M%S}.json"),
+            get_openmetrics_path(),
+            run_id=checkpoint.run_id,
+            rate_limits=limiter_stats(),
+            http_cache=shared_cache().stats(),
+            ingest=ingest.stats() if ingest else None,
+            outbox=outbox.depth() if outbox else None,
+            parquet=exporter.stats() if exporter else None,
+        )
 
     log("SUCCESS ==========================================")
 
@@ -49,54 +126,115 @@ def main():
 # def category_scrape(scraper_list: List[Scraper]) -> List[List[PriceUpdates]]:
 def category_scrape(scraper_list) -> List[List[PriceUpdates]]:
     log("scraping categories")
+    shards = get_shards()
+    if shards > 1:
+        return scrape_sharded(scraper_list, shards, checkpoint.run_id)
+
     stores = []
 
     for scraper in scraper_list:
         log(f"Scraping {scraper.get_store_name()}")
-        stores.append(scraper.scrape_category())
+        stores.append(scraper.scrape_category(checkpoint))
 
     return stores
 
 
+def ingest_target() -> str:
+    return "etl" if is_production() else "mockdb"
+
+
 # List here is a list of product models
 def product_scrape(scraper: Scraper, product_list: List[PriceUpdates]) -> int:
     """
     returns number of producst scraped and sent to scala
     """
     log(f"scraping products for {scraper.get_store_name()}")
-    products_added = 0
-    for product in product_list:
-        store, id, name, price = (
+    new_products = [
+        product
+        for product in product_list
+        if snapshot.add_product(
             product.store,
             product.store_product_id,
             product.product_name,
             product.price,
         )
-        if main_db.add_simple_product(store, id, name, price):
-            productInfo = scraper.scrape_product(product)
-            send_to_data_processer(productInfo)
-            products_added += 1
-    log(f"successfully added: {products_added} products")
-    return products_added
+    ]
+    to_fetch = new_products
+    if get_refresh_details():
+        # known products too, only the ones whose details changed are sent
+        seen = set()
+        to_fetch = []
+        for product in product_list:
+            if product.store_product_id not in seen:
+                seen.add(product.store_product_id)
+                to_fetch.append(product)
+    result = fetch_and_send(
+        scraper,
+        to_fetch,
+        send_to_data_processer,
+        detail_workers=get_detail_workers(scraper.get_store_name()),
+        send_workers=get_send_workers(ingest_target()),
+        should_send=details_changed,
+        # a new product whose details never arrived is retried next run
+        on_failed_fetch=lambda product: snapshot.discard_new(
+            product.store, product.store_product_id
+        ),
+        # every fetched product is exported, sent or not
+        on_fetched=exporter.add_detail if exporter else None,
+        is_new=lambda info: snapshot.is_new(info.store, info.store_product_id),
+    )
+    if ingest:
+        ingest.products.flush()
+    run_stats.count("products_fetched", result.fetched)
+    run_stats.count("products_sent", result.sent)
+    run_stats.count("products_unchanged", result.unchanged)
+    run_stats.count("failed_fetches", result.failed_fetches)
+    run_stats.count("failed_sends", result.failed_sends)
+    log(f"successfully added: {result.sent} products")
+    if result.unchanged:
+        log(f"unchanged details: {result.unchanged} products")
+    if result.failed_fetches or result.failed_sends:
+        log(
+            f"failed: {result.failed_fetches} detail fetches, {
+                result.failed_sends} sends"
+        )
+    return result.sent
 
 
 def product_price_check(scraper: Scraper, product_list: List[PriceUpdates]) -> int:
     log(f"checking prices for {scraper.get_store_name()}")
 
-    prices_changed = 0
-    for product in product_list:
-        store, id, price = (product.store, product.store_product_id, product.price)
-        if main_db.check_price(store, id, price):
-            update_price_remote(product)
-            prices_changed += 1
+    changed = [
+        product
+        for product in product_list
+        if snapshot.check_price(
+            product.store, product.store_product_id, product.price)
+    ]
+    result = send_all(
+        changed, update_price_remote, get_send_workers(ingest_target())
+    )
 
-    log(f"successfully changed: {prices_changed} prices")
-    return prices_changed
+    if ingest:
+        ingest.prices.flush()
+    run_stats.count("prices_changed", len(changed))
+    run_stats.count("prices_sent", result.sent)
+    log(f"successfully changed: {result.sent} prices")
+    return result.sent
+
+
+def details_changed(data: ProductInfo) -> bool:
+    """New products always go out, known ones only when their details hash changed"""
+    if not data.details:
+        # a failed detail fetch shouldn't replace good details in ingest
+        return snapshot.is_new(data.store, data.store_product_id)
+    return snapshot.check_details(
+        data.store, data.store_product_id, details_hash(data.details)
+    )
 
 
 # TODO:
 # change logs to detailed logs later
-def send_to_data_processer(data: ProductInfo):
+def send_to_data_processer(data: ProductInfo) -> bool:
     id, store, name, price, details = (
         data.store_product_id,
         data.store,
@@ -105,19 +243,18 @@ def send_to_data_processer(data: ProductInfo):
         data.details,
     )
     if is_production():
-        res = send_to_etl_v0(data)
-        if res.ok:
-            log(f"successfully sent product: {store}:{id} to etl")
-        else:
-            log(f"unsuccessfully sent product: {store}:{id} to etl")
-            append_to_file(f"{res}")
+        # delivery is reported by the ingest client when the batch is sent
+        ingest.send_product(data)
+        detailed_log("queued product: %s:%s for etl", store, id)
+        return True
 
     else:
         test_db.upsert_complex_product(store, id, name, price, details)
-        log(f"successfully sent product: {store}:{id} to MockDB")
+        detailed_log("successfully sent product: %s:%s to MockDB", store, id)
+        return True
 
 
-def update_price_remote(data: PriceUpdates):
+def update_price_remote(data: PriceUpdates) -> bool:
     id, store, name, price = (
         data.store_product_id,
         data.store,
@@ -125,23 +262,13 @@ def update_price_remote(data: PriceUpdates):
         data.price,
     )
     if is_production():
-        res = update_remote_v0(data)
-        if res.ok:
-            log(f"successfully sent product: {store}:{id} to update price")
-        else:
-            log(f"unsuccessfully sent product: {store}:{id} to update price")
-            append_to_file(f"{res}")
+        ingest.send_price(data)
+        detailed_log("queued product: %s:%s to update price", store, id)
+        return True
     else:
-        log(f"successfully updated product price for: {store}:{id} via MockDB")
+        detailed_log("successfully updated product price for: %s:%s via MockDB", store, id)
         test_db.upsert_simple_product(store, id, name, price)
-
-
-def update_remote_v0(data) -> requests.Response:
-    return update_price(data)
-
-
-def send_to_etl_v0(data) -> requests.Response:
-    return create_product(data)
+        return True
 
 
 def send_to_spring(data) -> bool:
@@ -152,51 +279,5 @@ def send_to_scala(data) -> bool:
     raise NotImplementedError
 
 
-def append_to_file(content, filename="./log.txt"):
-    """Append content to a file, creating it if it doesn't exist."""
-    with open(filename, "a") as file:
-        file.write(content + "\n")
-
-
-def create_product(
-    product_info: ProductInfo, base_url: str = "http://localhost:8000"
-) -> requests.Response:
-    payload = {
-        "store": product_info.store.value
-        if hasattr(product_info.store, "value")
-        else str(product_info.store),
-        "id": str(product_info.store_product_id),
-        "name": product_info.product_name,
-        "price": product_info.price,
-        "details": product_info.details,
-    }
-
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-
-    response = requests.post(f"{base_url}/api/products", json=payload, headers=headers)
-
-    return response
-
-
-def update_price(
-    price_update: PriceUpdates, base_url: str = "http://localhost:8000"
-) -> requests.Response:
-    payload = {
-        "store": price_update.store.value
-        if hasattr(price_update.store, "value")
-        else str(price_update.store),
-        "store_product_id": str(price_update.store_product_id),
-        "new_price": price_update.price,
-    }
-
-    headers = {"accept": "application/json", "Content-Type": "application/json"}
-
-    response = requests.post(
-        f"{base_url}/api/price-update", json=payload, headers=headers
-    )
-
-    return response
-
-
 if __name__ == "__main__":
     main()
@@ -6,7 +6,7 @@ from fake_data_generator import FakeDataGenerator
 class MockScraperAldi(Scraper):
     """Mock scraper for Aldi using fake data generator."""
 
-    def scrape_category(self) -> List[PriceUpdates]:
+    def scrape_category(self, checkpoint=None) -> List[PriceUpdates]:
         return FakeDataGenerator.generate_price_updates_list()
 
     def scrape_product(self, product: PriceUpdates) -> ProductInfo:
@@ -4,6 +4,7 @@ from scrapers.woolies import get_data
 from scrapers.iga import get_iga_product
 from scrapers.aldi import scrape_product
 from api.coles_woolies import query_products
+from query_cache import shared_query_cache
 
 app = FastAPI(
     title="PriceByte Scraping API",
@@ -24,6 +25,17 @@ def heart():
     return {"message": "healthy"}
 
 
+@app.get("/api/cache")
+def get_query_cache_stats():
+    """
+
+    Returns:
+    - **json**: search cache hits, misses and the api uses they saved
+
+    """
+    return shared_query_cache().stats()
+
+
 @app.get("/woolies-store/id/{product_id}")
 def get_woolies_store_by_id(product_id: int):
     """
@@ -0,0 +1,187 @@
+import threading
+import time
+from collections import defaultdict
+
+from config import is_verbose
+from database import Base, SQLiteDatabase
+from ingest_client import IngestClient
+from log import detailed_log, log
+from sqlalchemy import JSON, Column, Float, Integer, String, func
+from telemetry import run_stats
+
+
+def _retryable(reason: str) -> bool:
+    # plain strings carry no status, treat them like a transport error
+    return getattr(reason, "retryable", True)
+
+
+class OutboxEntry(Base):
+    __tablename__ = "outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)  # "product" or "price"
+    payload = Column(JSON, nullable=False)
+    reason = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(Float, nullable=False, default=0)
+    created_at = Column(Float, nullable=False)
+
+    def __repr__(self):
+        return f"<OutboxEntry(id={self.id}, kind='{self.kind}', attempts={self.attempts})>"
+
+
+class Outbox(SQLiteDatabase):
+    """
+    Durable store for ingest payloads that could not be delivered.
+
+    Failed sends are kept in sqlite/outbox.db and retried in batches by
+    `drain()`, at the start of a run or from a background thread. Each failed
+    retry pushes the entry back exponentially, up to `max_backoff` seconds;
+    entries that failed `max_attempts` times are kept but no longer retried.
+    Payloads ingest rejected outright (a 4xx other than 429) would fail the
+    same way again, so they are kept as dead straight away.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "outbox",
+        echo: bool = False,
+        profile: str | None = None,
+        base_backoff: float = 30,
+        max_backoff: float = 6 * 60 * 60,
+        max_attempts: int = 20,
+    ):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self._drainer = None
+        self._stop = threading.Event()
+        super().__init__(db_name, echo, profile)
+
+    def _setup_database(self):
+        """Setup outbox database with only the outbox table"""
+        Base.metadata.create_all(self.engine, tables=[OutboxEntry.__table__])
+
+    def put(self, kind: str, payload: dict, reason: str = ""):
+        """Store a payload that ingest did not accept"""
+        session = self.Session()
+        try:
+            session.add(
+                OutboxEntry(
+                    kind=kind,
+                    payload=payload,
+                    reason=reason[:500],
+                    attempts=0 if _retryable(reason) else self.max_attempts,
+                    created_at=time.time(),
+                )
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            log(f"❌ could not store {kind} in outbox: {e}")
+        finally:
+            session.close()
+
+    def depth(self) -> dict:
+        """Number of stored entries per kind, plus retryable and dead totals"""
+        session = self.Session()
+        try:
+            counts = dict(
+                session.query(OutboxEntry.kind, func.count())
+                .group_by(OutboxEntry.kind)
+                .all()
+            )
+            dead = (
+                session.query(func.count())
+                .filter(OutboxEntry.attempts >= self.max_attempts)
+                .scalar()
+            )
+            total = sum(counts.values())
+            return {**counts, "total": total, "retryable": total - dead, "dead": dead}
+        finally:
+            session.close()
+
+    def drain(self, client: IngestClient, batch_size: int = 100) -> tuple[int, int]:
+        """
+        Retry every entry that is due, `batch_size` at a time.
+        Returns (delivered, still failing).
+        """
+        delivered = failed = 0
+        # entries retried in this drain are not picked up again, however
+        # short their backoff
+        last_id = 0
+        while True:
+            session = self.Session()
+            try:
+                now = time.time()
+                entries = (
+                    session.query(OutboxEntry)
+                    .filter(
+                        OutboxEntry.next_attempt_at <= now,
+                        OutboxEntry.attempts < self.max_attempts,
+                        OutboxEntry.id > last_id,
+                    )
+                    .order_by(OutboxEntry.id)
+                    .limit(batch_size)
+                    .all()
+                )
+                if not entries:
+                    break
+
+                last_id = entries[-1].id
+                by_kind = defaultdict(list)
+                for entry in entries:
+                    by_kind[entry.kind].append(entry)
+
+                for kind, kind_entries in by_kind.items():
+                    errors = client.deliver(kind, [e.payload for e in kind_entries])
+                    for entry, error in zip(kind_entries, errors):
+                        if error is None:
+                            session.delete(entry)
+                            delivered += 1
+                        elif not _retryable(error):
+                            entry.attempts = self.max_attempts
+                            entry.reason = error[:500]
+                            failed += 1
+                        else:
+                            entry.attempts += 1
+                            entry.reason = error[:500]
+                            entry.next_attempt_at = now + min(
+                                self.base_backoff * 2 ** (entry.attempts - 1),
+                                self.max_backoff,
+                            )
+                            failed += 1
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                log(f"❌ outbox drain stopped: {e}")
+                break
+            finally:
+                session.close()
+
+        run_stats.count("outbox_retries", delivered + failed)
+        if delivered or failed:
+            log(f"outbox drain: {delivered} delivered, {failed} still failing")
+        return delivered, failed
+
+    def start_drainer(self, client: IngestClient, interval: float = 60):
+        """Drain in a background thread every `interval` seconds until stopped"""
+        if self._drainer is not None:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.drain(client)
+                if is_verbose():
+                    detailed_log("outbox depth: %s", self.depth())
+
+        self._drainer = threading.Thread(target=run, name="outbox-drainer", daemon=True)
+        self._drainer.start()
+
+    def stop_drainer(self):
+        if self._drainer is None:
+            return
+        self._stop.set()
+        self._drainer.join()
+        self._drainer = None
@@ -0,0 +1,156 @@
+import os
+import threading
+from datetime import date, datetime, timezone
+from typing import Dict, Iterable, List, Tuple
+
+from fastjson import dumps
+from log import detailed_log, log
+from snapshot import details_hash
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # exporting is switched off without it
+    pa = pq = None
+
+if pa:
+    LISTING_SCHEMA = pa.schema([
+        ("store_product_id", pa.int64()),
+        ("product_name", pa.string()),
+        ("price", pa.float64()),
+        ("scraped_at", pa.timestamp("ms", tz="UTC")),
+    ])
+    DETAIL_SCHEMA = pa.schema([
+        ("store_product_id", pa.int64()),
+        ("product_name", pa.string()),
+        ("price", pa.float64()),
+        ("brand", pa.string()),
+        ("size", pa.string()),
+        ("details_hash", pa.int64()),
+        # the raw details differ per store, so they stay one JSON document
+        ("details", pa.string()),
+        ("scraped_at", pa.timestamp("ms", tz="UTC")),
+    ])
+    SCHEMAS = {"listings": LISTING_SCHEMA, "details": DETAIL_SCHEMA}
+
+# low-cardinality columns, written with parquet dictionary pages
+DICTIONARY_COLUMNS = {"listings": [], "details": ["brand", "size"]}
+
+
+class ParquetExporter:
+    """
+    Writes listing and detail records as Parquet under
+    `<root>/<kind>/store=<store>/date=<day>/`, hive-style so readers can
+    prune partitions. Rows are buffered per store and written as one file
+    per `rows_per_file` rows, zstd compressed.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        day: date | None = None,
+        rows_per_file: int = 100_000,
+    ):
+        self.root = root
+        # files of an earlier run on the same day are kept, not overwritten
+        self.token = f"{datetime.now():%H%M%S}-{os.getpid()}"
+        self.day = (day or date.today()).isoformat()
+        self.rows_per_file = rows_per_file
+        self.files = 0
+        self.rows = 0
+        self.bytes = 0
+        self._buffers: Dict[Tuple[str, str], Dict[str, List]] = {}
+        self._parts: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def add_listings(self, records: Iterable):
+        """Buffer PriceUpdates / PriceRecords from a category scrape"""
+        now = datetime.now(timezone.utc)
+        for record in records:
+            self._add("listings", _store_name(record.store), {
+                "store_product_id": record.store_product_id,
+                "product_name": record.product_name,
+                "price": record.price,
+                "scraped_at": now,
+            })
+
+    def add_detail(self, info):
+        """Buffer one fetched ProductInfo, skipping failed fetches"""
+        if not info.details:
+            return
+        details = info.details
+        self._add("details", _store_name(info.store), {
+            "store_product_id": info.store_product_id,
+            "product_name": info.product_name,
+            "price": info.price,
+            "brand": _text(details.get("brand")),
+            "size": _text(details.get("size")),
+            "details_hash": details_hash(details),
+            "details": dumps(details).decode(),
+            "scraped_at": datetime.now(timezone.utc),
+        })
+
+    def _add(self, kind: str, store: str, row: dict):
+        with self._lock:
+            key = (kind, store)
+            columns = self._buffers.get(key)
+            if columns is None:
+                columns = self._buffers[key] = {name: [] for name in SCHEMAS[kind].names}
+            for name, values in columns.items():
+                values.append(row[name])
+            if len(columns["store_product_id"]) >= self.rows_per_file:
+                self._write(key)
+
+    def flush(self):
+        """Write out everything still buffered"""
+        with self._lock:
+            for key in list(self._buffers):
+                self._write(key)
+
+    def close(self) -> dict:
+        self.flush()
+        log(f"📤 exported {self.rows} rows to {self.files} parquet files under {self.root}")
+        return self.stats()
+
+    def stats(self) -> dict:
+        return {"files": self.files, "rows": self.rows, "bytes": self.bytes}
+
+    def _write(self, key: Tuple[str, str]):
+        columns = self._buffers.pop(key, None)
+        if not columns or not columns["store_product_id"]:
+            return
+        kind, store = key
+        table = pa.Table.from_pydict(columns, schema=SCHEMAS[kind])
+        directory = os.path.join(self.root, kind, f"store={store}", f"date={self.day}")
+        os.makedirs(directory, exist_ok=True)
+        part = self._parts.get(key, 0)
+        self._parts[key] = part + 1
+        path = os.path.join(directory, f"part-{self.token}-{part:04d}.parquet")
+        pq.write_table(
+            table,
+            path,
+            compression="zstd",
+            use_dictionary=DICTIONARY_COLUMNS[kind] or False,
+        )
+        self.files += 1
+        self.rows += table.num_rows
+        self.bytes += os.path.getsize(path)
+        detailed_log("wrote %d %s rows to %s", table.num_rows, kind, path)
+
+
+def open_exporter(root: str | None) -> ParquetExporter | None:
+    """An exporter writing under `root`, or None when exporting is off or unavailable"""
+    if not root:
+        return None
+    if pa is None:
+        log("⚠️  --export-parquet needs pyarrow installed, skipping the export")
+        return None
+    return ParquetExporter(root)
+
+
+def _store_name(store) -> str:
+    return getattr(store, "value", store)
+
+
+def _text(value) -> str | None:
+    return None if value is None else str(value)
@@ -0,0 +1,117 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Iterable, List
+
+from log import detailed_log, log
+from utils.model import PriceUpdates, ProductInfo, Scraper
+
+
+@dataclass
+class PipelineResult:
+    """Counts for one pipeline run, independent of completion order"""
+
+    fetched: int = 0
+    sent: int = 0
+    unchanged: int = 0
+    failed_fetches: int = 0
+    failed_sends: int = 0
+
+
+def fetch_and_send(
+    scraper: Scraper,
+    products: List[PriceUpdates],
+    send: Callable[[ProductInfo], bool],
+    detail_workers: int,
+    send_workers: int,
+    should_send: Callable[[ProductInfo], bool] | None = None,
+    on_failed_fetch: Callable[[PriceUpdates], None] | None = None,
+    on_fetched: Callable[[ProductInfo], None] | None = None,
+    is_new: Callable[[ProductInfo], bool] | None = None,
+) -> PipelineResult:
+    """
+    Fetch details for each product and send them on as they arrive.
+
+    Detail fetches run on `detail_workers` threads and each finished fetch is
+    handed to a separate pool of `send_workers` threads, so a product's send
+    overlaps with the next products' fetches. Every fetched product is passed
+    to `on_fetched` and to `should_send`. Products whose detail response
+    matched the cached one (`info.unchanged`) are counted as unchanged and not
+    sent, unless `is_new` says they are new; so are those for which
+    `should_send` returns False.
+    `on_failed_fetch` is called with every product whose fetch raised or
+    returned no details; such products are not sent. All callbacks run on
+    the calling thread.
+    """
+    result = PipelineResult()
+    if not products:
+        return result
+
+    with ThreadPoolExecutor(
+        max_workers=detail_workers, thread_name_prefix="detail"
+    ) as detail_pool, ThreadPoolExecutor(
+        max_workers=send_workers, thread_name_prefix="send"
+    ) as send_pool:
+        fetches = {
+            detail_pool.submit(scraper.scrape_product, product): product
+            for product in products
+        }
+        sends = []
+        for future in as_completed(fetches):
+            product = fetches[future]
+            try:
+                info = future.result()
+                # scrapers answer a failed fetch with empty details
+                if not info.details:
+                    raise ValueError("no details returned")
+            except Exception as e:
+                log(f"❌ detail fetch failed for {product.store}:{product.store_product_id}: {e}")
+                result.failed_fetches += 1
+                if on_failed_fetch is not None:
+                    on_failed_fetch(product)
+                continue
+            result.fetched += 1
+            if on_fetched is not None:
+                on_fetched(info)
+            # asked even for unchanged responses, it records what was fetched
+            changed = should_send is None or should_send(info)
+            if info.unchanged and not (is_new is not None and is_new(info)):
+                result.unchanged += 1
+                continue
+            if not changed:
+                result.unchanged += 1
+                continue
+            sends.append(send_pool.submit(send, info))
+
+        _count_sends(sends, result)
+
+    detailed_log(
+        f"pipeline for {scraper.get_store_name()}: {result.fetched} fetched, "
+        f"{result.sent} sent, {result.unchanged} unchanged, "
+        f"{result.failed_fetches + result.failed_sends} failed"
+    )
+    return result
+
+
+def send_all(
+    items: Iterable, send: Callable[[object], bool], send_workers: int
+) -> PipelineResult:
+    """Send already built payloads on a bounded pool of threads"""
+    result = PipelineResult()
+    with ThreadPoolExecutor(
+        max_workers=send_workers, thread_name_prefix="send"
+    ) as send_pool:
+        _count_sends([send_pool.submit(send, item) for item in items], result)
+    return result
+
+
+def _count_sends(futures, result: PipelineResult):
+    for future in as_completed(futures):
+        try:
+            ok = future.result()
+        except Exception as e:
+            log(f"❌ send failed: {e}")
+            ok = False
+        if ok:
+            result.sent += 1
+        else:
+            result.failed_sends += 1
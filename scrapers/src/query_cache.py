@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+import zlib
+from typing import Callable, Tuple
+
+from config import get_query_cache_size, get_query_cache_ttl
+from database import Base, CacheDatabase
+from fastjson import dumps, loads
+from log import detailed_log, log
+from sqlalchemy import Column, Float, Integer, LargeBinary, String
+from utils.model import ApiProducts
+
+
+class CachedQuery(Base):
+    __tablename__ = "query_cache"
+
+    key = Column(String, primary_key=True)  # "<store>|<normalized query>"
+    body = Column(LargeBinary, nullable=False)  # zlib compressed ApiProducts JSON
+    api_uses = Column(Integer, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(Float, nullable=False)
+    accessed_at = Column(Float, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<CachedQuery(key='{self.key}', api_uses={self.api_uses})>"
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and spacing don't change what a search returns"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+class QueryCache(CacheDatabase):
+    """
+    On-disk cache of paid product search results, keyed by store and
+    normalized query.
+
+    A result is served from disk for `ttl` seconds after it was fetched,
+    saving the API calls it cost; older ones are fetched again. Only complete
+    searches are stored, so an error, a missing key or a quota that ran out
+    part way is not remembered. Once the compressed results exceed
+    `max_bytes`, the least recently used are evicted down to 90% of the limit.
+    """
+
+    def __init__(
+        self,
+        db_name: str = "query_cache",
+        echo: bool = False,
+        profile: str | None = None,
+        ttl: float | None = None,
+        max_bytes: int | None = None,
+    ):
+        self.ttl = get_query_cache_ttl() if ttl is None else ttl
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.api_uses_saved = 0
+        super().__init__(
+            db_name,
+            echo,
+            profile,
+            get_query_cache_size() if max_bytes is None else max_bytes,
+        )
+
+    entry_model = CachedQuery
+
+    def _setup_database(self):
+        """Setup cache database with only the cache table"""
+        Base.metadata.create_all(self.engine, tables=[CachedQuery.__table__])
+
+    def get(
+        self, store: str, query: str, fetch: Callable[[], Tuple[ApiProducts, bool]]
+    ) -> ApiProducts:
+        """
+        The cached result of `query` at `store`, or the result of `fetch()`,
+        stored for next time when `fetch` reports the search as complete
+        """
+        if self.max_bytes <= 0 or self.ttl <= 0:
+            return fetch()[0]
+
+        key = f"{store}|{normalize_query(query)}"
+        cached = self._lookup(key)
+        if cached is not None and time.time() - cached.created_at < self.ttl:
+            self._touch(key)
+            with self._lock:
+                self.hits += 1
+                self.api_uses_saved += cached.api_uses
+            detailed_log("query cache hit for %s, saved %d calls", key, cached.api_uses)
+            # nothing was spent answering it this time
+            return ApiProducts(
+                api_uses=0, products=loads(zlib.decompress(cached.body))["products"]
+            )
+
+        with self._lock:
+            self.misses += 1
+            if cached is not None:
+                self.expired += 1
+        result, complete = fetch()
+        if complete and result.api_uses > 0:
+            self._store(key, result)
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "api_uses_saved": self.api_uses_saved,
+                "bytes": self._size,
+            }
+
+    def _lookup(self, key: str) -> CachedQuery | None:
+        session = self.Session()
+        try:
+            entry = session.get(CachedQuery, key)
+            if entry is not None:
+                session.expunge(entry)
+            return entry
+        except Exception as e:
+            log(f"❌ query cache read failed: {e}")
+            return None
+        finally:
+            session.close()
+
+    def _touch(self, key: str):
+        session = self.Session()
+        try:
+            session.query(CachedQuery).filter_by(key=key).update(
+                {"accessed_at": time.time()}
+            )
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            detailed_log("query cache touch failed: %s", e)
+        finally:
+            session.close()
+
+    def _store(self, key: str, result: ApiProducts):
+        body = zlib.compress(dumps(result.model_dump()), 6)
+        now = time.time()
+        session = self.Session()
+        try:
+            old = session.get(CachedQuery, key)
+            old_size = old.size if old is not None else 0
+            session.merge(
+                CachedQuery(
+                    key=key,
+                    body=body,
+                    api_uses=result.api_uses,
+                    size=len(body),
+                    created_at=now,
+                    accessed_at=now,
+                )
+            )
+            session.commit()
+            with self._lock:
+                self._size += len(body) - old_size
+                over = self._size > self.max_bytes
+        except Exception as e:
+            session.rollback()
+            log(f"❌ query cache write failed: {e}")
+            return
+        finally:
+            session.close()
+        if over:
+            self.evict()
+
+
+_cache: QueryCache | None = None
+_cache_lock = threading.Lock()
+
+
+def shared_query_cache() -> QueryCache:
+    """The process wide query cache, opened on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = QueryCache()
+        return _cache
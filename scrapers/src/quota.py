@@ -0,0 +1,179 @@
+import calendar
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import date
+from typing import Dict, Iterable, List
+
+from config import get_rapidapi_limits
+from log import detailed_log, log
+
+
+class Quota:
+    """
+    The call budget of one paid API key, shared by every run through a small
+    JSON file.
+
+    `per_month` calls are spread over the month: each day may spend its share
+    of what is left (remaining calls / days left, today included), so one
+    eager run cannot drain the key for the rest of the month. `per_minute` is
+    a sliding window `acquire` waits on. The file also remembers when each
+    query was last refreshed, so the stalest queries get the calls first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        per_month: int,
+        per_minute: int,
+        path: str = "sqlite/rapidapi_quota.json",
+    ):
+        self.name = name
+        self.per_month = per_month
+        self.per_minute = max(1, per_minute)
+        self.path = path
+        self.month = ""
+        self.day = ""
+        self.used = 0
+        self.used_today = 0
+        self.refreshed: Dict[str, float] = {}
+        self.denied = 0
+        self._window: deque = deque()
+        self._lock = threading.Lock()
+        self._load()
+
+    def acquire(self, wait: bool = True) -> bool:
+        """
+        Claim one call. False when today's share of the monthly budget is
+        spent, or when the minute window is full and `wait` is False.
+        """
+        while True:
+            with self._lock:
+                self._roll_over()
+                if self._budget() <= 0:
+                    self.denied += 1
+                    return False
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+                if len(self._window) < self.per_minute:
+                    self._window.append(now)
+                    self.used += 1
+                    self.used_today += 1
+                    self._save()
+                    return True
+                delay = 60 - (now - self._window[0])
+            if not wait:
+                return False
+            detailed_log("%s: minute limit reached, waiting %.1fs", self.name, delay)
+            time.sleep(delay)
+
+    def record(self, response):
+        """Trust the provider's own count when the response reports one"""
+        remaining = response.headers.get("x-ratelimit-requests-remaining")
+        if remaining is None or not remaining.isdigit():
+            return
+        limit = response.headers.get("x-ratelimit-requests-limit", "")
+        limit = int(limit) if limit.isdigit() else self.per_month
+        with self._lock:
+            used = limit - int(remaining)
+            if used > self.used:
+                self.used_today += used - self.used
+                self.used = used
+                self._save()
+
+    def remaining(self) -> int:
+        """Calls left for today"""
+        with self._lock:
+            self._roll_over()
+            return max(self._budget(), 0)
+
+    def stale_first(self, queries: Iterable[str]) -> List[str]:
+        """`queries` ordered by when they were last refreshed, never refreshed first"""
+        return sorted(queries, key=lambda query: self.refreshed.get(query, 0.0))
+
+    def mark_fresh(self, query: str):
+        with self._lock:
+            self.refreshed[query] = time.time()
+            self._save()
+
+    def stats(self) -> dict:
+        return {
+            "used_month": self.used,
+            "used_today": self.used_today,
+            "remaining_today": self.remaining(),
+            "denied": self.denied,
+        }
+
+    def _budget(self) -> int:
+        today = date.today()
+        days_left = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+        left_at_day_start = self.per_month - (self.used - self.used_today)
+        share = math.ceil(left_at_day_start / days_left)
+        return min(self.per_month - self.used, share - self.used_today)
+
+    def _roll_over(self):
+        today = date.today()
+        if self.month != f"{today:%Y-%m}":
+            if self.month:
+                log(f"📅 {self.name}: new month, {self.used} calls used last month")
+            self.month = f"{today:%Y-%m}"
+            self.used = 0
+        if self.day != today.isoformat():
+            self.day = today.isoformat()
+            self.used_today = 0
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                entry = json.load(f).get(self.name)
+        except (OSError, ValueError):
+            entry = None
+        if entry:
+            self.month = entry["month"]
+            self.day = entry["day"]
+            self.used = entry["used"]
+            self.used_today = entry["used_today"]
+            self.refreshed = entry.get("refreshed", {})
+        self._roll_over()
+        detailed_log("%s: %d calls used this month", self.name, self.used)
+
+    def _save(self):
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        entries[self.name] = {
+            "month": self.month,
+            "day": self.day,
+            "used": self.used,
+            "used_today": self.used_today,
+            "refreshed": self.refreshed,
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log(f"⚠️  Could not save quota usage: {e}")
+
+
+_quotas: Dict[str, Quota] = {}
+_quotas_lock = threading.Lock()
+
+
+def quota_for(name: str, **kwargs) -> Quota:
+    """Shared quota of an API key, limits from config unless given in `kwargs`"""
+    with _quotas_lock:
+        if name not in _quotas:
+            per_month, per_minute = get_rapidapi_limits(name)
+            kwargs.setdefault("per_month", per_month)
+            kwargs.setdefault("per_minute", per_minute)
+            _quotas[name] = Quota(name, **kwargs)
+        return _quotas[name]
@@ -0,0 +1,139 @@
+import threading
+import time
+from typing import Callable, Dict
+
+from log import detailed_log
+from telemetry import run_stats
+
+
+class AdaptiveLimiter:
+    """
+    AIMD request pacing for one host.
+
+    Every healthy response adds `increase` requests/s up to `max_rate`. A 429,
+    a 5xx, a connection error or a response slower than `latency_factor` times
+    the running average halves the rate (at most once per `cooldown` seconds,
+    so one slow burst isn't punished several times), down to `min_rate`.
+    A Retry-After header on a 429 also holds back every request until it passes.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        rate: float = 2.5,
+        min_rate: float = 0.5,
+        max_rate: float = 5.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        latency_factor: float = 3.0,
+        cooldown: float = 1.0,
+        warmup: int = 5,
+    ):
+        self.host = host
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, min_rate)
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.cooldown = cooldown
+        self.warmup = warmup
+        self.requests = 0
+        self.backoffs = 0
+        self.avg_latency = None
+        self._next_slot = 0.0
+        self._last_backoff = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until this thread may send its next request"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1 / self.rate
+        if slot > now:
+            time.sleep(slot - now)
+
+    def record(self, status: int | None, latency: float, retry_after: float | None = None):
+        """Adjust the rate from one response, `status` None meaning the request failed"""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if retry_after:
+                self._next_slot = max(self._next_slot, now + retry_after)
+
+            if status is None or status == 429 or status >= 500:
+                reason = f"HTTP {status}" if status else "request error"
+            elif (
+                self.avg_latency is not None
+                and self.requests > self.warmup
+                and latency > self.latency_factor * self.avg_latency
+            ):
+                reason = f"latency {latency:.2f}s"
+            else:
+                reason = None
+                self.rate = min(self.rate + self.increase, self.max_rate)
+                self.avg_latency = (
+                    latency
+                    if self.avg_latency is None
+                    else 0.8 * self.avg_latency + 0.2 * latency
+                )
+
+            if reason and now - self._last_backoff >= self.cooldown:
+                self._last_backoff = now
+                self.backoffs += 1
+                self.rate = max(self.rate * self.decrease, self.min_rate)
+                detailed_log(f"🐢 {self.host}: {reason}, slowing to {self.rate:.2f} req/s")
+
+    def request(self, send: Callable, *args, **kwargs):
+        """Pace and time `send(*args, **kwargs)`, e.g. requests.get, and learn from its result"""
+        self.acquire()
+        start = time.monotonic()
+        try:
+            response = send(*args, **kwargs)
+        except Exception:
+            latency = time.monotonic() - start
+            self.record(None, latency)
+            run_stats.record_request(self.host, latency, 0, None)
+            raise
+        latency = time.monotonic() - start
+        self.record(
+            response.status_code,
+            latency,
+            _retry_after(response) if response.status_code == 429 else None,
+        )
+        run_stats.record_request(
+            self.host, latency, len(response.content or b""), response.status_code
+        )
+        return response
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "requests": self.requests,
+            "backoffs": self.backoffs,
+            "avg_latency": round(self.avg_latency, 3) if self.avg_latency else None,
+        }
+
+
+def _retry_after(response) -> float | None:
+    value = response.headers.get("Retry-After", "")
+    return float(value) if value.replace(".", "", 1).isdigit() else None
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(host: str, **kwargs) -> AdaptiveLimiter:
+    """Shared limiter for a host, created with `kwargs` on first use"""
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveLimiter(host, **kwargs)
+        return _limiters[host]
+
+
+def limiter_stats() -> Dict[str, dict]:
+    """Current rate and counters of every limiter, for run stats"""
+    with _limiters_lock:
+        return {host: limiter.stats() for host, limiter in _limiters.items()}
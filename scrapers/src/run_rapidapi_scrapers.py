@@ -1,46 +1,81 @@
-import requests
-import json
-from woolworths_rapidapi import WoolworthsRapidAPIScraper
-from coles_rapidapi import ColesRapidAPIScraper
-from typing import List, Dict, Any
-
-INGEST_URL = "http://localhost:8000/api/products"
-
-def post_products_to_ingest(products: List[Dict[str, Any]], store: str):
-    """Post products to the ingest API in batches"""
-    batch_size = 50  # Post in batches to avoid overwhelming
-    for i in range(0, len(products), batch_size):
-        batch = products[i:i + batch_size]
-        payload = {
-            "store": store,
-            "products": batch
-        }
-        try:
-            response = requests.post(INGEST_URL, json=payload)
-            response.raise_for_status()
-            print(f"Posted batch {i//batch_size + 1} for {store}: {response.status_code}")
-        except requests.RequestException as e:
-            print(f"Error posting batch for {store}: {e}")
-            # Continue with next batch
+from typing import Any, Dict, Iterable
+
+from config import get_rapidapi_queries
+from ingest_client import IngestClient, open_client
+from log import configure_logging, flush as flush_logs, log
+from outbox import Outbox
+from scrapers.coles_rapidapi import ColesRapidAPIScraper
+from scrapers.woolworths_rapidapi import WoolworthsRapidAPIScraper
+
+# transformed fields kept as the product's store specific details
+DETAIL_FIELDS = (
+    "brand",
+    "category",
+    "unit_price",
+    "size",
+    "availability",
+    "image_url",
+    "product_url",
+)
 
-def main():
-    print("Starting Woolworths scraper...")
-    woolworths_scraper = WoolworthsRapidAPIScraper()
-    woolworths_products = woolworths_scraper.scrape_all()
-    print(f"Scraped {len(woolworths_products)} products from Woolworths")
 
-    print("Posting Woolworths products to ingest...")
-    post_products_to_ingest(woolworths_products, "woolworths")
+def product_payload(product: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    POST /api/products body (ProductCreateRequest) for one transformed
+    RapidAPI product, or None when ingest would reject it.
+    """
+    price = product.get("price")
+    if not product.get("store_product_id") or not isinstance(price, (int, float)) or price < 0:
+        return None
+    return {
+        "store": product["store"],
+        "id": product["store_product_id"],
+        "name": product.get("product_name") or "",
+        "price": price,
+        "details": {
+            key: product[key] for key in DETAIL_FIELDS if product.get(key) not in ("", None)
+        },
+    }
 
-    print("Starting Coles scraper...")
-    coles_scraper = ColesRapidAPIScraper()
-    coles_products = coles_scraper.scrape_all()
-    print(f"Scraped {len(coles_products)} products from Coles")
 
-    print("Posting Coles products to ingest...")
-    post_products_to_ingest(coles_products, "coles")
+def stream_to_ingest(products: Iterable[Dict[str, Any]], client: IngestClient, store: str) -> int:
+    """
+    Queue products on the ingest client as the scraper yields them. The
+    client sends each batch once it fills, so nothing waits for the whole
+    scrape. Returns how many products were queued.
+    """
+    queued = skipped = 0
+    for product in products:
+        payload = product_payload(product)
+        if payload is None:
+            skipped += 1
+            continue
+        client.send_payload(payload)
+        queued += 1
+    log(f"queued {queued} {store} products for ingest, skipped {skipped} without an id or price")
+    return queued
+
+
+def main():
+    configure_logging()
+    # undelivered batches are retried by the next main.py run
+    outbox = Outbox()
+    client = open_client(
+        on_failure=lambda kind, payload, reason: outbox.put(kind, payload, reason)
+    )
+    try:
+        for store, scraper in (
+            ("woolworths", WoolworthsRapidAPIScraper()),
+            ("coles", ColesRapidAPIScraper()),
+        ):
+            log(f"Starting {store} scraper...")
+            stream_to_ingest(scraper.iter_all(get_rapidapi_queries()), client, store)
+            log(f"{store} quota: {scraper.quota.stats()}")
+    finally:
+        client.close()
+    log(f"ingest: {client.stats()}, outbox: {outbox.depth()}")
+    flush_logs()
 
-    print("Scraping and ingestion complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,7 +1,14 @@
 import requests
-from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer, Tag
 from utils.model import Product
 
+try:
+    from lxml import html as lxml_html
+    from lxml.etree import XPath
+except ImportError:  # pages are parsed with BeautifulSoup instead
+    lxml_html = None
+
+
 def clean_str(string: str) -> str:
     to_del = {ord(k): None for k in ['\n', '\t']}
     return string.strip().translate(to_del)
@@ -41,8 +48,13 @@ def parse_category(nav: Tag) -> str:
 def parse_price(pricebox: Tag) -> float:
     if not pricebox:
         return 0.0
-    value = get_str_content(pricebox.find("span", "box--value"))
-    decimal = get_str_content(pricebox.find("span", "box--decimal"))
+    return to_price(
+        get_str_content(pricebox.find("span", "box--value")),
+        get_str_content(pricebox.find("span", "box--decimal")),
+    )
+
+
+def to_price(value: str, decimal: str) -> float:
     if not value or not decimal:
         return 0.0
     value = ''.join(c for c in value if c.isnumeric())
@@ -52,7 +64,10 @@ def parse_price(pricebox: Tag) -> float:
 def parse_unit_price(pricebox: Tag) -> float:
     if not pricebox:
         return 0.0
-    full_unit_price = get_str_content(pricebox.find("span", "box--detailamount"))
+    return to_unit_price(get_str_content(pricebox.find("span", "box--detailamount")))
+
+
+def to_unit_price(full_unit_price: str) -> float:
     if not full_unit_price:
         return 0.0
     unit_price = full_unit_price.split(" ")[0]
@@ -116,8 +131,18 @@ def scrape_product(url: str) -> Product | None:
         return
     if res.status_code != 200:
         return
-    page = BeautifulSoup(res.content, "html.parser")
+    return parse_product(res.content, url)
 
+
+def parse_product(content: bytes, url: str) -> Product:
+    """Product from a saved or fetched product page, with lxml when it is installed"""
+    if lxml_html is not None:
+        return parse_product_lxml(content, url)
+    # only the product regions are built into a tree, not the whole page
+    return product_from_soup(BeautifulSoup(content, "html.parser", parse_only=PRODUCT_REGIONS), url)
+
+
+def product_from_soup(page: BeautifulSoup, url: str) -> Product:
     detail = page.find("div", "detail-box")
     desc_ul = page.find("div", "detail-tabcontent")
     nav = page.find("ul", "breadcrumb-nav")
@@ -137,3 +162,73 @@ def scrape_product(url: str) -> Product | None:
         weight=parse_amount(pricebox),
         description=parse_desc(desc_ul)
     )
+
+
+REGION_CLASSES = {"detail-box", "detail-tabcontent", "breadcrumb-nav"}
+
+
+def _is_region(classes: str | None) -> bool:
+    # while parsing the strainer sees the raw attribute, e.g. "detail-box ym-grid"
+    return bool(classes) and not REGION_CLASSES.isdisjoint(classes.split())
+
+
+PRODUCT_REGIONS = SoupStrainer(["div", "ul"], class_=_is_region)
+
+
+def _with_class(tag: str, name: str) -> str:
+    """XPath step matching the way BeautifulSoup's find(tag, name) does"""
+    return f'{tag}[contains(concat(" ", normalize-space(@class), " "), " {name} ")]'
+
+
+if lxml_html is not None:
+    DETAIL = XPath(f"//{_with_class('div', 'detail-box')}")
+    TITLE = XPath(f"(.//{_with_class('h1', 'detail-box--price-box--title')})[1]")
+    PRICEBOX = XPath(f"(.//{_with_class('div', 'detail-box--price-box--price')})[1]")
+    IMAGE = XPath("(.//img)[1]/@src")
+    DESC_ITEMS = XPath(f"(//{_with_class('div', 'detail-tabcontent')})[1]//li/text()")
+    CRUMBS = XPath(
+        f"(//{_with_class('ul', 'breadcrumb-nav')})[1]//{_with_class('li', 'breadcrumb-nav--element')}"
+    )
+    CRUMB_NAME = XPath('(.//span[@itemprop="name"])[1]')
+    PRICE_SPANS = {
+        name: XPath(f"(.//{_with_class('span', name)})[1]")
+        for name in ("box--value", "box--decimal", "box--detailamount", "box--former-price", "box--amount")
+    }
+
+
+def _text(elements: list) -> str:
+    """Cleaned text of the first match, like get_str_content"""
+    return clean_str(elements[0].text_content()) if elements else ""
+
+
+def parse_product_lxml(content: bytes, url: str) -> Product:
+    """parse_product with compiled XPaths over an lxml tree"""
+    page = lxml_html.fromstring(content)
+    detail = DETAIL(page)[0]
+    name = _text(TITLE(detail))
+    image = IMAGE(detail)
+    crumbs = CRUMBS(page)
+    category = _text(CRUMB_NAME(crumbs[-2])) if len(crumbs) >= 2 else ""
+
+    pricebox = PRICEBOX(detail)
+    spans = {
+        key: _text(xpath(pricebox[0])) if pricebox else ""
+        for key, xpath in PRICE_SPANS.items()
+    }
+    price = to_price(spans["box--value"], spans["box--decimal"])
+    orig = spans["box--former-price"].replace("$", "")
+
+    return Product(
+        store="Aldi Store",
+        product_name=name,
+        brand=name,
+        category=category,
+        price=price,
+        unit_price=to_unit_price(spans["box--detailamount"]) if pricebox else 0.0,
+        original_price=(float(orig) if orig else price) if pricebox else 0,
+        availability=True,
+        image_url=image[0] if image else "",
+        product_url=url,
+        weight=spans["box--amount"].replace("$", ""),
+        description=", ".join(text for text in map(clean_str, DESC_ITEMS(page)) if text),
+    )
@@ -1,7 +1,19 @@
 import requests
-import time
 from typing import List
-from utils.model import Scraper, PriceUpdates, ProductInfo, Store
+from checkpoint import Checkpoint
+from config import get_rate_limit
+from fastjson import response_json
+from http_cache import shared_cache
+from ratelimit import limiter_for
+from telemetry import run_stats
+from utils.model import (
+    PriceRecord,
+    PriceUpdates,
+    ProductInfo,
+    Scraper,
+    Store,
+    validate_price_records,
+)
 from log import log, detailed_log
 
 
@@ -11,6 +23,12 @@ class AldiScraper(Scraper):
         self.detail_url = "https://api.aldi.com.au/v2/products"
         self.limit = 30
         self.max_pages = 120
+        # detail responses are revalidated against the on-disk cache
+        self.cache = shared_cache()
+        # paces listing and detail requests, which share the host
+        self.limiter = limiter_for(
+            "api.aldi.com.au", max_rate=get_rate_limit(self.get_store_name())
+        )
         self.headers = {
             "accept": "application/json, text/plain, */*",
             "origin": "https://www.aldi.com.au",
@@ -37,14 +55,33 @@ class AldiScraper(Scraper):
             "front_of_store": 1588161408332092,
         }
 
-    def scrape_category(self) -> List[PriceUpdates]:
-        """Scrape all categories and return a list of PriceUpdates"""
+    def scrape_category(self, checkpoint: Checkpoint | None = None) -> List[PriceUpdates]:
+        """
+        Scrape all categories and return a list of PriceUpdates.
+        With a checkpoint, completed categories are reused and interrupted ones
+        resume from the next unsaved page.
+        """
+        store = self.get_store_name()
         all_products = []
 
         for cat_name, cat_key in self.categories.items():
             log(f"🗂️  Category: {cat_name} ({cat_key})")
 
-            for page in range(self.max_pages):
+            start_page, _, completed = (
+                checkpoint.progress(store, cat_name) if checkpoint else (None, None, False)
+            )
+            if start_page is not None:
+                saved = checkpoint.items(store, cat_name)
+                all_products.extend(saved)
+                if completed:
+                    log(f"⏭️  Already scraped this run ({len(saved)} products)")
+                    continue
+                log(f"↩️  Resuming at page {start_page} ({len(saved)} products saved)")
+
+            # only a category that reached its end is complete, one cut short
+            # by an error stays open so the next run picks it up
+            finished = False
+            for page in range(start_page or 0, self.max_pages):
                 offset = page * self.limit
                 params = {
                     "currency": "AUD",
@@ -58,7 +95,8 @@ class AldiScraper(Scraper):
                 }
 
                 try:
-                    resp = requests.get(
+                    resp = self.limiter.request(
+                        requests.get,
                         self.base_url, headers=self.headers, params=params, timeout=15
                     )
                     if not resp.ok:
@@ -68,14 +106,16 @@ class AldiScraper(Scraper):
                         )
                         break
 
-                    items = resp.json().get("data", [])
+                    items = response_json(resp).get("data", [])
                     if not items:
                         if page == 0:
                             log("⚠️  Empty category (no items returned).")
                         else:
                             detailed_log("✅ Reached end of list.")
+                        finished = True
                         break
 
+                    page_products = []
                     for item in items:
                         price_data = item.get("price", {})
                         price = (
@@ -93,23 +133,34 @@ class AldiScraper(Scraper):
                         except (ValueError, AttributeError):
                             continue
 
-                        price_update = PriceUpdates(
-                            store_product_id=int(item.get("sku")),
-                            store=Store.ALDI,
-                            product_name=item.get("name", ""),
-                            price=price_float,
+                        page_products.append(
+                            PriceRecord(
+                                item.get("sku"), Store.ALDI, item.get("name", ""), price_float
+                            )
                         )
-                        all_products.append(price_update)
+                    page_products, dropped = validate_price_records(page_products)
+                    if dropped:
+                        log(f"⚠️  Dropped {dropped} invalid items on page {page}")
+                    all_products.extend(page_products)
 
                     detailed_log(
-                        f"  • grabbed {len(items):2}  (page={
-                            page}, offset={offset})"
+                        "  • grabbed %2d  (page=%d, offset=%d)", len(items), page, offset
                     )
-                    time.sleep(0.4)  # be polite
+                    run_stats.record_page(store, cat_name, len(page_products))
+                    if checkpoint:
+                        checkpoint.save_page(
+                            store, cat_name, page, page + 1, page_products
+                        )
 
                 except Exception as e:
                     log(f"❌ Exception for {cat_name} page {page}: {e}")
                     break
+            else:
+                # ran out of pages
+                finished = True
+
+            if checkpoint and finished:
+                checkpoint.complete(store, cat_name)
 
         log(f"📦 Collected {len(all_products)} products total")
         return all_products
@@ -123,8 +174,13 @@ class AldiScraper(Scraper):
             url = f"{self.detail_url}/{sku}"
             params = {"servicePoint": "G452", "serviceType": "walk-in"}
 
-            response = requests.get(
-                url, headers=self.headers, params=params, timeout=10
+            response = self.limiter.request(
+                self.cache.get,
+                requests.get,
+                url,
+                headers=self.headers,
+                params=params,
+                timeout=10,
             )
 
             if not response.ok:
@@ -137,7 +193,7 @@ class AldiScraper(Scraper):
                     details={},
                 )
 
-            product_data = response.json().get("data", {})
+            product_data = response_json(response).get("data", {})
 
             details = {
                 "sku": product_data.get("sku"),
@@ -185,6 +241,7 @@ class AldiScraper(Scraper):
                 product_name=product_data.get("name", product.product_name),
                 price=current_price,
                 details=details,
+                unchanged=getattr(response, "unchanged", False),
             )
 
         except Exception as e:
@@ -1,3 +1,4 @@
+from fastjson import response_json
 from utils.model import ColesProductV1, PriceUpdates, Scraper
 from typing import List, Tuple
 import requests
@@ -51,7 +52,7 @@ class ColesScraper(Scraper):
                 try:
                     response = requests.get(url, headers=headers)
                     response.raise_for_status()
-                    data = response.json()
+                    data = response_json(response)
                     
                     # Find results list within the JSON
                     search_results = data.get('pageProps', {}).get('searchResults', {})
@@ -132,7 +133,7 @@ def scrape_coles_category(category_name="deli") -> list[ColesProductV1]:
         try:
             response = requests.get(url, headers=headers)
             response.raise_for_status()
-            data = response.json()
+            data = response_json(response)
             
             # Find results list within the JSON
             search_results = data.get('pageProps', {}).get('searchResults', {})
@@ -1,27 +1,48 @@
-import time
 from typing import List
 from math import ceil
 import requests
-from utils.model import Scraper, PriceUpdates, ProductInfo, Store
+from checkpoint import Checkpoint
+from build_id import BuildId
+from config import get_build_id_ttl, get_rate_limit
+from fastjson import decode_coles_listing, response_json
+from http_cache import shared_cache
+from ratelimit import limiter_for
+from telemetry import run_stats
+from utils.model import (
+    PriceRecord,
+    PriceUpdates,
+    ProductInfo,
+    Scraper,
+    Store,
+    validate_price_records,
+)
 from log import log, detailed_log
 import re
 
 
 class ColesScraper(Scraper):
     def __init__(self):
-        self.build_id = "20250916.9-0c3bac032f29c1776deea2ac4883f3eb56b928f1"
-        self.base_url = (
-            f"https://www.coles.com.au/_next/data/{self.build_id}/en/browse/"
-        )
-        self.detail_url = (
-            f"https://www.coles.com.au/_next/data/{self.build_id}/en/product/"
-        )
+        self.home_url = "https://www.coles.com.au/"
         self.limit = 48
+        # detail responses are revalidated against the on-disk cache
+        self.cache = shared_cache()
+        # paces listing and detail requests, which share the host
+        self.limiter = limiter_for(
+            "www.coles.com.au", max_rate=get_rate_limit(self.get_store_name())
+        )
         self.headers = {
             "Accept": "*/*",
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/108.0.0.0 Safari/537.36",
             "x-nextjs-data": "1",
         }
+        # _next/data urls embed the id of the deployed build, which changes
+        # whenever Coles redeploys
+        self.build = BuildId(
+            "www.coles.com.au",
+            self.fetch_home,
+            fallback="20250916.9-0c3bac032f29c1776deea2ac4883f3eb56b928f1",
+            ttl=get_build_id_ttl(),
+        )
         self.categories = {
             "Meat and Seafood": "meat-seafood",
             "Fruit and Vegtables": "fruit-vegetables",
@@ -41,22 +62,55 @@ class ColesScraper(Scraper):
             "Tobacco": "tobacco",
         }
 
-    def scrape_category(self) -> List[PriceUpdates]:
-        """Scrape all categories and return a list of PriceUpdates"""
+    def fetch_home(self) -> str:
+        """HTML of the home page, whose __NEXT_DATA__ names the current build"""
+        headers = {"User-Agent": self.headers["User-Agent"], "Accept": "text/html"}
+        response = self.limiter.request(
+            requests.get, self.home_url, headers=headers, timeout=15
+        )
+        response.raise_for_status()
+        return response.text
+
+    def data_url(self, build_id: str, page: str) -> str:
+        return f"{self.home_url}_next/data/{build_id}/en/{page}"
+
+    def scrape_category(self, checkpoint: Checkpoint | None = None) -> List[PriceUpdates]:
+        """
+        Scrape all categories and return a list of PriceUpdates.
+        With a checkpoint, completed categories are reused and interrupted ones
+        resume from the next unsaved page.
+        """
+        store = self.get_store_name()
         all_products = []
         for cat_name, cat_key in self.categories.items():
             log(f"🗂️  Category: {cat_name} ({cat_key})")
 
-            # Construct the category URL for the API call
-            base_url = f"{self.base_url}{cat_key}.json?slug={cat_key}"
+            page, total_pages, completed = (
+                checkpoint.progress(store, cat_name) if checkpoint else (None, None, False)
+            )
+            if page is not None:
+                saved = checkpoint.items(store, cat_name)
+                all_products.extend(saved)
+                if completed:
+                    log(f"⏭️  Already scraped this run ({len(saved)} products)")
+                    continue
+                log(f"↩️  Resuming at page {page} ({len(saved)} products saved)")
 
-            page = 1
-            total_pages = 1
-            while page <= total_pages:
-                url = f"{base_url}&page={page}" if page > 1 else base_url
+            page = page or 1
+            while total_pages is None or page <= total_pages:
+                # Construct the category URL for the API call
+                build_id = self.build.get()
+                url = self.data_url(build_id, f"browse/{cat_key}.json?slug={cat_key}")
+                if page > 1:
+                    url = f"{url}&page={page}"
 
                 try:
-                    response = requests.get(url, headers=self.headers)
+                    response = self.limiter.request(requests.get, url, headers=self.headers)
+                    # a category page 404ing usually means Coles redeployed
+                    if response.status_code == 404 and self.build.not_found(
+                        build_id, force=True
+                    ):
+                        continue
                     if not response.ok:
                         log(
                             f"❌ HTTP {response.status_code} for {cat_name} offset {
@@ -65,15 +119,15 @@ class ColesScraper(Scraper):
                         )
                         break
 
-                    data = response.json()
+                    self.build.found()
 
-                    # Find results list within the JSON
-                    search_results = data.get("pageProps", {}).get("searchResults", {})
-                    items = search_results.get("results", [])
+                    # Only the searchResults fields we use are decoded
+                    total_results, n_items, items = decode_coles_listing(
+                        response.content
+                    )
 
                     # Calculate total number of pages on the first request
-                    total_results = search_results.get("noOfResults", 0)
-                    if page == 1:  # Only print it once
+                    if total_pages is None:  # Only print it once
                         total_pages = ceil(total_results / self.limit)
                         log(
                             f"Found {total_results} total results, across {
@@ -81,39 +135,54 @@ class ColesScraper(Scraper):
                             } pages."
                         )
 
-                    for item in items:
-                        # Only process product items
-
-                        if item.get("_type") == "PRODUCT":
-                            # TODO: Solve items being unavailable having no price attribute (default set to -1 currently)
-                            priceUpdate = PriceUpdates(
-                                store_product_id=item.get("id"),
-                                product_name=f"{item.get('brand')} {item.get('name')} {
-                                    item.get('size')
-                                }",
-                                store=Store.Coles,
-                                price=(item.get("pricing") or {}).get("now") or -1,
-                            )
-                            log(priceUpdate)
-                            all_products.append(priceUpdate)
+                    # TODO: Solve items being unavailable having no price attribute (default set to -1 currently)
+                    page_products = [
+                        PriceRecord(
+                            product_id, Store.Coles, f"{brand} {name} {size}", now or -1
+                        )
+                        for product_id, brand, name, size, now in items
+                    ]
+                    page_products, dropped = validate_price_records(page_products)
+                    if dropped:
+                        log(f"⚠️  Dropped {dropped} invalid items on page {page}")
+                    all_products.extend(page_products)
                     detailed_log(
-                        f"  • grabbed {len(items):2}  (page={page}, offset={
-                            page * (self.limit - 1)
-                        })"
+                        "  • grabbed %2d  (page=%d, offset=%d)",
+                        n_items, page, page * (self.limit - 1),
                     )
+                    run_stats.record_page(store, cat_name, len(page_products))
+                    if checkpoint:
+                        checkpoint.save_page(
+                            store, cat_name, page, page + 1, page_products, total_pages
+                        )
 
                     # Increment the page number
                     page += 1
 
-                    time.sleep(0.4)
-
                 except Exception as e:
                     log(f"❌ Exception for {cat_name} page {page}: {e}")
                     break
+            else:
+                # only a category that reached its last page is complete,
+                # one cut short stays open so the next run picks it up
+                if checkpoint:
+                    checkpoint.complete(store, cat_name)
 
         log(f"📦 Collected {len(all_products)} products total")
         return all_products
 
+    def fetch_detail(self, build_id: str, slug: str):
+        url = self.data_url(build_id, f"product/{slug}.json?slug={slug}")
+        # keyed without the build id, so a new deployment keeps the entries
+        return self.limiter.request(
+            self.cache.get,
+            requests.get,
+            url,
+            headers=self.headers,
+            key=f"{self.home_url}product/{slug}",
+            timeout=10,
+        )
+
     def scrape_product(self, product: PriceUpdates) -> ProductInfo:
         """Fetch detailed information for a specific product"""
 
@@ -121,11 +190,15 @@ class ColesScraper(Scraper):
             product_name_url = "-".join(
                 re.sub(r"[|&]", "", product.product_name).lower().split()
             )
-            log(product_name_url)
-            url = f"{self.detail_url}{product_name_url}-{
-                product.store_product_id
-            }.json?slug={product_name_url}-{product.store_product_id}"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            detailed_log("fetching details for %s", product_name_url)
+            slug = f"{product_name_url}-{product.store_product_id}"
+            build_id = self.build.get()
+            response = self.fetch_detail(build_id, slug)
+            # a burst of 404s means the build changed, retry with the new one
+            if response.status_code == 404 and self.build.not_found(build_id):
+                response = self.fetch_detail(self.build.get(), slug)
+            if response.ok:
+                self.build.found()
 
             if not response.ok:
                 log(
@@ -141,7 +214,7 @@ class ColesScraper(Scraper):
                     details={},
                 )
 
-            product_data = response.json().get("pageProps", {}).get("product")
+            product_data = response_json(response).get("pageProps", {}).get("product")
 
             details = product_data
 
@@ -159,6 +232,7 @@ class ColesScraper(Scraper):
                 product_name=product.product_name,
                 price=current_price,
                 details=details,
+                unchanged=getattr(response, "unchanged", False),
             )
 
         except Exception as e:
@@ -1,6 +1,7 @@
 import re
 
 import requests
+from fastjson import response_json
 from utils.model import Product
 
 
@@ -8,7 +9,7 @@ def fetch_product(url: str, store: int, product: int) -> dict:
     try:
         response = requests.get(f"{url}/stores/{store}/products/{product}")
         response.raise_for_status()  # Raise an error for bad status codes (4xx, 5xx)
-        return response.json()  # Convert JSON response to a Python dictionary
+        return response_json(response)  # Convert JSON response to a Python dictionary
     except requests.exceptions.RequestException as e:
         print(f"Error fetching data: {e}")
         return {}
@@ -20,19 +21,10 @@ def get_product_link(product_name: str) -> str:
     return "-".join(product_name).lower()
 
 
-def get_iga_product(product_id: int, store_id: int = 32600) -> Product:
-    data = fetch_product(
-        "https://www.igashop.com.au/api/storefront", store_id, product_id
-    )
-
-    product_name = data.get("name")
-    product_link = get_product_link(product_name)
-    product_url = f"https://www.igashop.com.au/product/{product_link}-{product_id}"
-
-    # combine weight and weight type
-    weight_data = data.get("unitsOfSize", {})
-    weight = weight_data.get("size")
-    match weight_data.get("type"):
+def format_size(units: dict) -> str:
+    """Combine the storefront's unitsOfSize into e.g. "500g" """
+    weight = units.get("size")
+    match units.get("type"):
         case "kilogram":
             weight_type = "kg"
         case "gram":
@@ -43,6 +35,17 @@ def get_iga_product(product_id: int, store_id: int = 32600) -> Product:
             weight_type = "mL"
         case _:
             weight_type = "g"
+    return f"{weight}{weight_type}"
+
+
+def get_iga_product(product_id: int, store_id: int = 32600) -> Product:
+    data = fetch_product(
+        "https://www.igashop.com.au/api/storefront", store_id, product_id
+    )
+
+    product_name = data.get("name")
+    product_link = get_product_link(product_name)
+    product_url = f"https://www.igashop.com.au/product/{product_link}-{product_id}"
 
     # replace all letters and symbols in price data
 
@@ -75,7 +78,7 @@ def get_iga_product(product_id: int, store_id: int = 32600) -> Product:
         availability=data.get("available"),
         image_url=data.get("primaryImage", {}).get("default"),
         product_url=product_url,
-        weight=f"{weight}{weight_type}",
+        weight=format_size(data.get("unitsOfSize", {})),
         description=data.get("description")
         .replace("<br/>", "")
         .replace("<br />", "")
@@ -0,0 +1,265 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+from requests.adapters import HTTPAdapter
+from checkpoint import Checkpoint
+from config import get_category_workers, get_iga_store_ids, get_rate_limit
+from fastjson import response_json
+from http_cache import shared_cache
+from ratelimit import limiter_for
+from scrapers.iga import format_size, get_product_link
+from telemetry import run_stats
+from utils.model import (
+    PriceRecord,
+    PriceUpdates,
+    ProductInfo,
+    Scraper,
+    Store,
+    validate_price_records,
+)
+from log import log, detailed_log
+
+
+def _dollars(value) -> float | None:
+    """Storefront prices come as numbers or as text like "$4.50" """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(re.sub(r"[^0-9.]", "", value or ""))
+    except ValueError:
+        return None
+
+
+class IGAScraper(Scraper):
+    def __init__(self):
+        self.base_url = "https://www.igashop.com.au/api/storefront"
+        self.limit = 36
+        self.max_pages = 200
+        # every store is listed; a product stocked by several keeps the
+        # price of the first store that lists it
+        self.store_ids = get_iga_store_ids()
+        # product id -> store id it was listed at, for the detail fetch
+        self.product_stores: Dict[int, str] = {}
+        # (store, category) listings are paged through concurrently
+        self.category_workers = get_category_workers(self.get_store_name())
+        # detail responses are revalidated against the on-disk cache
+        self.cache = shared_cache()
+        # paces listing and detail requests, which share the host
+        self.limiter = limiter_for(
+            "www.igashop.com.au", max_rate=get_rate_limit(self.get_store_name())
+        )
+        # one pooled session for every listing and detail worker
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=32))
+        self.headers = {
+            "accept": "application/json, text/plain, */*",
+            "referer": "https://www.igashop.com.au/",
+            "user-agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
+        }
+        # display name: storefront category slug
+        self.categories = {
+            "Fruit & Vegetable": "fruit-and-vegetable",
+            "Meat, Seafood & Deli": "meat-seafood-and-deli",
+            "Dairy, Eggs & Fridge": "dairy-eggs-and-fridge",
+            "Bakery": "bakery",
+            "Pantry": "pantry",
+            "Freezer": "freezer",
+            "Drinks": "drinks",
+            "Liquor": "liquor",
+            "Health & Beauty": "health-and-beauty",
+            "Baby": "baby",
+            "Household": "household",
+            "Pet": "pet",
+        }
+
+    def scrape_category(self, checkpoint: Checkpoint | None = None) -> List[PriceUpdates]:
+        """
+        Scrape every category of every store and return a list of PriceUpdates.
+        Up to `category_workers` store categories are paged through at once.
+        With a checkpoint, completed ones are reused and interrupted ones
+        resume from the next unsaved page.
+        """
+        tasks = [
+            (store_id, cat_name)
+            for store_id in self.store_ids
+            for cat_name in self.categories
+        ]
+        with ThreadPoolExecutor(
+            max_workers=max(1, self.category_workers),
+            thread_name_prefix="iga-category",
+        ) as pool:
+            results = pool.map(
+                lambda task: (task[0], self.scrape_one_category(*task, checkpoint)),
+                tasks,
+            )
+            # results keep store order, so earlier stores win shared products
+            all_products = []
+            for store_id, products in results:
+                for product in products:
+                    if product.store_product_id not in self.product_stores:
+                        self.product_stores[product.store_product_id] = store_id
+                        all_products.append(product)
+
+        log(f"📦 Collected {len(all_products)} products total")
+        return all_products
+
+    def scrape_one_category(
+        self, store_id: str, cat_name: str, checkpoint: Checkpoint | None = None
+    ) -> List[PriceRecord]:
+        store = self.get_store_name()
+        slug = self.categories[cat_name]
+        # checkpoint progress is kept per store
+        key = f"{cat_name} @ {store_id}"
+        log(f"🗂️  Category: {key}")
+
+        products = []
+        start_page, _, completed = (
+            checkpoint.progress(store, key) if checkpoint else (None, None, False)
+        )
+        if start_page is not None:
+            saved = checkpoint.items(store, key)
+            products.extend(saved)
+            if completed:
+                log(f"⏭️  {key} already scraped this run ({len(saved)} products)")
+                return products
+            log(f"↩️  Resuming {key} at page {start_page} ({len(saved)} products saved)")
+
+        url = f"{self.base_url}/stores/{store_id}/categories/{slug}/search"
+
+        # only a category that reached its end is complete, one cut short
+        # by an error stays open so the next run picks it up
+        finished = False
+        for page in range(start_page or 0, self.max_pages):
+            params = {"take": self.limit, "skip": page * self.limit}
+            try:
+                response = self.limiter.request(
+                    self.session.get, url, params=params, headers=self.headers, timeout=15
+                )
+                if not response.ok:
+                    log(f"❌ HTTP {response.status_code} for {key} page {page}")
+                    break
+
+                data = response_json(response)
+                items = data.get("items") or []
+                if not items:
+                    finished = True
+                    break
+
+                page_products, dropped = validate_price_records([
+                    PriceRecord(
+                        item.get("productId"),
+                        Store.IGA,
+                        item.get("name"),
+                        _dollars(item.get("priceNumeric", item.get("price"))) or -1,
+                    )
+                    for item in items
+                ])
+                if dropped:
+                    log(f"⚠️  Dropped {dropped} invalid items on {key} page {page}")
+                products.extend(page_products)
+                detailed_log("  • grabbed %2d  (%s page=%d)", len(items), key, page)
+                run_stats.record_page(store, key, len(page_products))
+                if checkpoint:
+                    checkpoint.save_page(store, key, page, page + 1, page_products)
+
+                if (page + 1) * self.limit >= (data.get("total") or 0):
+                    finished = True
+                    break
+
+            except Exception as e:
+                log(f"❌ Exception for {key} page {page}: {e}")
+                break
+        else:
+            # ran out of pages
+            finished = True
+
+        if checkpoint and finished:
+            checkpoint.complete(store, key)
+
+        log(f"✅ {key}: {len(products)} products")
+        return products
+
+    def scrape_product(self, product: PriceUpdates) -> ProductInfo:
+        """Fetch detailed information for a specific product"""
+        product_id = product.store_product_id
+        # the listing store first; sharded runs list in other processes, so
+        # fall back to each store in turn
+        listed_at = self.product_stores.get(product_id)
+        store_ids = [listed_at] if listed_at else []
+        store_ids += [store_id for store_id in self.store_ids if store_id != listed_at]
+
+        try:
+            for store_id in store_ids:
+                response = self.limiter.request(
+                    self.cache.get,
+                    self.session.get,
+                    f"{self.base_url}/stores/{store_id}/products/{product_id}",
+                    headers=self.headers,
+                    timeout=10,
+                )
+                if response.status_code != 404:
+                    break
+
+            if not response.ok:
+                log(f"❌ HTTP Error for product {product_id}: {response.status_code}")
+                return ProductInfo(
+                    store_product_id=product.store_product_id,
+                    store=product.store,
+                    product_name=product.product_name,
+                    price=product.price,
+                    details={},
+                )
+
+            data = response_json(response) or {}
+            name = data.get("name") or product.product_name
+            description = data.get("description") or ""
+
+            details = {
+                "product_id": data.get("productId"),
+                "store_id": store_id,
+                "sku": data.get("sku"),
+                "name": data.get("name"),
+                "brand": data.get("brand"),
+                "category": data.get("defaultCategory"),
+                "description": description.replace("<br/>", "")
+                .replace("<br />", "")
+                .replace("|", " |"),
+                "size": format_size(data.get("unitsOfSize") or {}),
+                "price_per_unit": data.get("pricePerUnit") or data.get("unitPrice"),
+                "was_price": _dollars(data.get("wasPrice")) if data.get("wasPrice") else None,
+                "available": data.get("available"),
+                "image_url": (data.get("primaryImage") or {}).get("default"),
+                "product_url": f"https://www.igashop.com.au/product/{get_product_link(name)}-{product_id}",
+            }
+
+            current_price = _dollars(data.get("priceNumeric", data.get("price")))
+
+            return ProductInfo(
+                store_product_id=product.store_product_id,
+                store=product.store,
+                product_name=name,
+                price=current_price if current_price is not None else product.price,
+                details=details,
+                unchanged=getattr(response, "unchanged", False),
+            )
+
+        except Exception as e:
+            log(f"❌ Exception for product {product_id}: {e}")
+            return ProductInfo(
+                store_product_id=product.store_product_id,
+                store=product.store,
+                product_name=product.product_name,
+                price=product.price,
+                details={},
+            )
+
+    def price_changed(self, product: PriceUpdates) -> bool:
+        return False
+
+    def is_new_product(self, product: PriceUpdates) -> bool:
+        return False
+
+    def get_store_name(self) -> str:
+        return "IGA"
@@ -1,5 +1,6 @@
 import pandas as pd
 import requests
+import json
 import os
 import time
 import random
@@ -8,17 +9,19 @@ import sys
 import shutil
 from datetime import datetime, timedelta
 from pathlib import Path
-import asyncio
-from playwright.async_api import async_playwright
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import gc
 
+# src/ holds the shared cookie pool
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from cookie_pool import CookiePool, browser_fetcher, fixture_fetcher  # noqa: E402
+
 # === CONFIG ===
 INPUT_CSV = "woolworths_products.csv"
 OUTPUT_CSV = "processed/woolworths_product_info.csv"
-BACKUP_DIR = "processed/backups"
-CHECKPOINT_INTERVAL = 100  # Save backup every 100 products
+SEGMENT_DIR = "processed/segments"  # Append-only JSONL chunks of scraped rows
+CHECKPOINT_INTERVAL = 100  # Write a new segment every 100 products
 MAX_RETRIES = 3  # Maximum number of retries for failed requests
 RETRY_DELAY = 5  # Delay between retries in seconds
 MEMORY_ERROR_DELAY = 60  # Delay in seconds when memory error occurs
@@ -28,7 +31,9 @@ HEADERS = {
     "Origin": "https://www.woolworths.com.au",
     "Accept": "application/json",
 }
-COOKIE_REFRESH_INTERVAL = 5000  # Refresh cookies every 5000 requests
+COOKIE_JARS = 3  # Cookie jars rotated between requests
+COOKIE_MAX_AGE = 1800  # Seconds a jar is used before it is replaced
+COOKIE_FIXTURE = os.getenv("WOOLIES_COOKIE_FIXTURE")  # Recorded cookies instead of a browser
 
 # Define expected columns and their types
 COLUMN_TYPES = {
@@ -57,75 +62,128 @@ COLUMN_TYPES = {
     "scrape_timestamp": "str",
 }
 
+# === SEGMENT WRITER ===
+
+
+class SegmentWriter:
+    """
+    Buffers scraped rows column-wise and appends them to numbered JSONL
+    segment files, one per CHECKPOINT_INTERVAL rows. A checkpoint only writes
+    the new chunk, so memory and time per product stay flat however many
+    products have been scraped.
+    """
+
+    def __init__(self, directory, chunk_size):
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.columns = {col: [] for col in COLUMN_TYPES}
+        self.buffered = 0
+        self.written = 0
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+    def segments(self):
+        return sorted(Path(self.directory).glob("part-*.jsonl"))
+
+    def add(self, row):
+        """Buffer a row, writing a segment once chunk_size rows are waiting."""
+        for col in row.keys() - self.columns.keys():
+            # nutrition columns vary by product, earlier rows get None
+            self.columns[col] = [None] * self.buffered
+        for col, values in self.columns.items():
+            values.append(row.get(col))
+        self.buffered += 1
+        if self.buffered >= self.chunk_size:
+            return self.flush()
+        return None
+
+    def flush(self):
+        """Append the buffered rows as a new segment and clear the buffer."""
+        if not self.buffered:
+            return None
+        path = Path(self.directory) / f"part-{len(self.segments()):05d}.jsonl"
+        tmp = path.with_suffix(".tmp")
+        names = list(self.columns)
+        with open(tmp, "w") as f:
+            for values in zip(*self.columns.values()):
+                f.write(json.dumps(dict(zip(names, values)), default=str))
+                f.write("\n")
+        # renamed into place so a crash never leaves half a segment behind
+        os.replace(tmp, path)
+        self.written += self.buffered
+        self.columns = {col: [] for col in COLUMN_TYPES}
+        self.buffered = 0
+        return path
+
+    def import_csv(self, path):
+        """
+        Turn the old whole-file writer's CSV into the first segment, so its
+        rows are kept when to_csv rewrites the output at the end of the run.
+        """
+        if self.segments():
+            return 0
+        df = pd.read_csv(path, dtype=object)
+        segment = Path(self.directory) / "part-00000.jsonl"
+        tmp = segment.with_suffix(".tmp")
+        df.to_json(tmp, orient="records", lines=True)
+        os.replace(tmp, segment)
+        return len(df)
+
+    def scraped_ids(self):
+        """Ids already written by this or an earlier run."""
+        ids = set()
+        for path in self.segments():
+            with open(path) as f:
+                for line in f:
+                    try:
+                        ids.add(int(json.loads(line)["id"]))
+                    except (ValueError, KeyError, TypeError):
+                        continue
+        return ids
+
+    def to_csv(self, path):
+        """Combine every segment into one CSV, reading each segment once."""
+        frames = [pd.read_json(p, lines=True, dtype=False) for p in self.segments()]
+        if not frames:
+            return 0
+        df = pd.concat(frames, ignore_index=True)
+        leading = [col for col in COLUMN_TYPES if col in df.columns]
+        df = df[leading + [col for col in df.columns if col not in COLUMN_TYPES]]
+        df.to_csv(path, index=False)
+        return len(df)
+
+
 # === SIGNAL HANDLING ===
 
 
 def signal_handler(signum, frame):
     print("\n⚠️ Received interrupt signal. Saving progress before exit...")
-    if "results_df" in globals() and not results_df.empty:
-        backup_file = create_backup()
-        print(f"✅ Progress saved to: {backup_file}")
+    if "writer" in globals():
+        segment = writer.flush()
+        if segment:
+            print(f"✅ Progress saved to: {segment}")
     sys.exit(0)
 
 
 signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
-# === BACKUP FUNCTIONS ===
-
-
-def create_backup():
-    """Create a backup and update main CSV file."""
-    # First update the main output file
-    if "results_df" in globals() and not results_df.empty:
-        results_df.to_csv(OUTPUT_CSV, index=False)
-
-        # Create/update backup file with fixed name
-        backup_file = os.path.join(BACKUP_DIR, "woolworths_product_info_backup.csv")
-        results_df.to_csv(backup_file, index=False)
-    return backup_file
-
-
-def load_latest_backup():
-    """Load the backup file if it exists."""
-    backup_file = os.path.join(BACKUP_DIR, "woolworths_product_info_backup.csv")
-    if os.path.exists(backup_file):
-        print(f"📂 Found backup file: {backup_file}")
-        return pd.read_csv(backup_file)
-    return None
-
-
-# === COOKIE FETCHER ===
-
-
-async def get_woolworths_cookies():
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=False, args=["--start-maximized"]
-            )
-            context = await browser.new_context(
-                viewport={"width": 1280, "height": 800},
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            )
-            page = await context.new_page()
-            await page.goto(
-                "https://www.woolworths.com.au/shop/productdetails/253366",
-                wait_until="networkidle",
-            )
-            cookies_list = await context.cookies()
-            await browser.close()
-            return {cookie["name"]: cookie["value"] for cookie in cookies_list}
-    except Exception as e:
-        print(f"❌ Error fetching cookies: {str(e)}")
-        print("⚠️ Waiting 30 seconds before retrying...")
-        time.sleep(30)
-        return await get_woolworths_cookies()
-
-
-# === RUN ASYNC COOKIE FETCHER FIRST ===
+# === COOKIE POOL ===
+
+# Jars are refreshed by a headless browser in the background, before they
+# expire, so scraping never stops to wait for one
+cookie_pool = CookiePool(
+    fixture_fetcher(COOKIE_FIXTURE)
+    if COOKIE_FIXTURE
+    else browser_fetcher(
+        "https://www.woolworths.com.au/shop/productdetails/253366",
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    ),
+    size=COOKIE_JARS,
+    max_age=COOKIE_MAX_AGE,
+    name="woolworths cookies",
+)
 print("🔄 Fetching initial cookies...")
-cookies = asyncio.run(get_woolworths_cookies())
+cookie_pool.start()
 
 # === LOAD INPUT ===
 try:
@@ -140,86 +198,22 @@ except Exception as e:
 Path(os.path.dirname(OUTPUT_CSV)).mkdir(parents=True, exist_ok=True)
 
 
-def initialize_dataframe():
-    """Create an empty DataFrame with the correct column types."""
-    df = pd.DataFrame(columns=COLUMN_TYPES.keys())
-    for col, dtype in COLUMN_TYPES.items():
-        if dtype == "str":
-            df[col] = df[col].astype("str")
-        elif dtype in ["int64", "float64"]:
-            df[col] = df[col].astype(dtype)
-    return df
-
-
-def clean_results_df(df):
-    """Clean the results dataframe and ensure consistent column types."""
-    if df.empty:
-        return initialize_dataframe()
-
-    original_len = len(df)
-
-    # Remove rows where id is not a valid integer
-    df["id"] = pd.to_numeric(df["id"], errors="coerce")
-    df = df.dropna(subset=["id"])
-
-    # Ensure all expected columns exist with correct types
-    for col, dtype in COLUMN_TYPES.items():
-        if col not in df.columns:
-            if dtype == "str":
-                df[col] = ""
-            else:
-                df[col] = pd.NA
-
-        # Convert to correct type
-        try:
-            if dtype == "str":
-                df[col] = df[col].fillna("").astype(str)
-            else:
-                df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
-        except Exception as e:
-            print(f"⚠️ Error converting column {col} to {dtype}: {str(e)}")
-
-    removed_count = original_len - len(df)
-    if removed_count > 0:
-        print(f"⚠️ Removed {removed_count} corrupted rows from results")
-
-    return df
-
-
-def add_row_to_results(results_df, row):
-    """Add a new row to results_df with proper type handling."""
-    # Create a single-row DataFrame with the correct structure
-    new_row_df = initialize_dataframe()
-
-    # Fill in the values we have
-    for col in new_row_df.columns:
-        if col in row:
-            new_row_df.at[0, col] = row[col]
-
-    # Concatenate with existing results
-    return pd.concat([results_df, new_row_df], ignore_index=True)
-
-
-# Try to load existing output or latest backup
-if os.path.exists(OUTPUT_CSV):
+writer = SegmentWriter(SEGMENT_DIR, CHECKPOINT_INTERVAL)
+if not writer.segments() and os.path.exists(OUTPUT_CSV):
+    # output of the old whole-file writer, carried over as the first segment
     try:
-        results_df = pd.read_csv(OUTPUT_CSV)
-        print(f"📊 Loaded {len(results_df)} results from {OUTPUT_CSV}")
-        results_df = clean_results_df(results_df)
+        imported = writer.import_csv(OUTPUT_CSV)
+        print(f"📊 Imported {imported} results from {OUTPUT_CSV} into {SEGMENT_DIR}")
     except Exception as e:
-        print(f"⚠️ Error loading {OUTPUT_CSV}, trying backup: {str(e)}")
-        results_df = pd.DataFrame()
+        print(f"⚠️ Error loading {OUTPUT_CSV}: {str(e)}")
+        # never overwrite rows that could not be carried over
+        sys.exit(1)
+scraped_ids = writer.scraped_ids()
+if scraped_ids:
+    print(f"📊 Found {len(scraped_ids)} results in {SEGMENT_DIR}")
 else:
-    backup_df = load_latest_backup()
-    if backup_df is not None:
-        results_df = clean_results_df(backup_df)
-        print(f"📊 Loaded {len(results_df)} results from backup")
-    else:
-        results_df = pd.DataFrame()
-        print("📊 Starting fresh scrape")
-
-# Get scraped IDs after cleaning
-scraped_ids = set(results_df["id"].astype(int)) if not results_df.empty else set()
+    print("📊 Starting fresh scrape")
+
 remaining_ids = [pid for pid in product_ids if pid not in scraped_ids]
 print(f"🎯 {len(remaining_ids)} products remaining to scrape")
 
@@ -288,7 +282,10 @@ def scrape_product(product_id, retry_count=0, memory_error_count=0):
     )
 
     try:
+        slot, cookies = cookie_pool.get()
         response = session.get(url, headers=HEADERS, cookies=cookies, timeout=30)
+        if response.status_code in (401, 403):
+            cookie_pool.invalidate(slot)
 
         if not response.ok:
             if retry_count < MAX_RETRIES:
@@ -471,37 +468,24 @@ class ProgressTracker:
 
 # === MAIN LOOP ===
 request_count = 0
-products_since_checkpoint = 0
 error_streak = 0  # Track consecutive errors
 
 # Initialize progress tracker
 progress = ProgressTracker(len(remaining_ids))
 
 try:
-    # Initialize results_df with correct structure if empty
-    if results_df.empty:
-        results_df = initialize_dataframe()
-
     for pid in remaining_ids:
         try:
-            # Check if we need to refresh cookies
-            if request_count > 0 and request_count % COOKIE_REFRESH_INTERVAL == 0:
-                print("🔄 Refreshing cookies...")
-                cookies = asyncio.run(get_woolworths_cookies())
-
             row = scrape_product(pid)
             if row:
-                results_df = add_row_to_results(results_df, row)
                 print(f"✅ Saved: {pid}")
                 error_streak = 0  # Reset error streak on success
                 progress.update(success=True)
 
-                # Save progress every CHECKPOINT_INTERVAL products
-                products_since_checkpoint += 1
-                if products_since_checkpoint >= CHECKPOINT_INTERVAL:
-                    backup_file = create_backup()
-                    print(f"💾 Progress saved to main file and backup")
-                    products_since_checkpoint = 0
+                # A new segment is written every CHECKPOINT_INTERVAL products
+                segment = writer.add(row)
+                if segment:
+                    print(f"💾 Progress saved to {segment}")
             else:
                 error_streak += 1
                 progress.update(success=False)
@@ -529,18 +513,19 @@ try:
 
 except Exception as e:
     print(f"\n❌ Unexpected error: {str(e)}")
-    backup_file = create_backup()
-    print(f"💾 Emergency backup saved")
+    writer.flush()
+    print("💾 Emergency backup saved")
     raise
 
 finally:
     # Clean up
     session.close()
+    cookie_pool.stop()
 
     # Save final results
-    if not results_df.empty:
-        create_backup()
-        print("\n✅ Final results saved")
+    writer.flush()
+    total = writer.to_csv(OUTPUT_CSV)
+    print(f"\n✅ Final results saved ({total} rows in {OUTPUT_CSV})")
 
     # Print final progress report
     print("\n🏁 Final Progress Report:")
@@ -1,9 +1,11 @@
-import json
-import random
+import atexit
 import re
-import time
+import threading
+from typing import Iterable, Iterator, Tuple
 
-from selenium.webdriver.firefox.options import Options
+from browser_pool import BrowserFetchError, BrowserPool, SeleniumSession
+from fastjson import loads
+from log import log
 from utils.model import Product
 
 pages = [
@@ -12,13 +14,18 @@ pages = [
     "https://www.woolworths.com.au/apis/ui/product/detail/",
 ]
 
+# one long-lived headless Firefox for every lookup, started on first use
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
 
-# test
-def load_page(w, product_id: int, page_id: int) -> str:
-    w.get(pages[page_id] + str(product_id))
-    # Give it some time to load the page
-    time.sleep(random.randint(1000, 3000) / 1000)
-    return w.page_source
+
+def browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(lambda: SeleniumSession(pages[0]))
+            atexit.register(_pool.close)
+        return _pool
 
 
 def jsonify(s: str) -> object:
@@ -33,23 +40,10 @@ def jsonify(s: str) -> object:
     if index_close != -1:
         s = s[: index_close + 1]
 
-    return json.loads(s)
-
+    return loads(s)
 
-def get_data(product_id: int) -> Product:
-    from selenium import webdriver
 
-    # Set up Firefox options
-    options = Options()
-    options.set_preference("devtools.jsonview.enabled", False)
-    options.add_argument("--headless")
-    webdriver = webdriver.Firefox(options=options)
-    load_page(webdriver, product_id, 0)
-    brief, detailed = (
-        jsonify(load_page(webdriver, product_id, 1)),
-        jsonify(load_page(webdriver, product_id, 2)),
-    )
-    webdriver.quit()
+def to_product(product_id: int, brief: dict, detailed: dict) -> Product:
     return Product(
         store="Woolies Store",
         product_name=detailed["Product"]["Name"],
@@ -66,6 +60,30 @@ def get_data(product_id: int) -> Product:
     )
 
 
+def get_data(product_id: int, pool: BrowserPool | None = None) -> Product:
+    """Both JSON endpoints of a product, fetched from inside a pooled browser"""
+    with (pool or browser_pool()).lease() as browser:
+        brief = browser.fetch_json(pages[1] + str(product_id))
+        detailed = browser.fetch_json(pages[2] + str(product_id))
+    return to_product(product_id, brief, detailed)
+
+
+def get_many(
+    product_ids: Iterable[int], pool: BrowserPool | None = None
+) -> Iterator[Tuple[int, Product | None]]:
+    """(id, product) for each id on one browser session, None where the lookup failed"""
+    with (pool or browser_pool()).lease() as browser:
+        for product_id in product_ids:
+            try:
+                brief = browser.fetch_json(pages[1] + str(product_id))
+                detailed = browser.fetch_json(pages[2] + str(product_id))
+                yield product_id, to_product(product_id, brief, detailed)
+            # anything else means the browser broke, the pool replaces it
+            except (BrowserFetchError, KeyError, TypeError, ValueError) as e:
+                log(f"❌ Woolworths lookup failed for {product_id}: {e}")
+                yield product_id, None
+
+
 def get_data_from_url(url: str):
     match = re.search(r"productdetails/(\d+)/", url)
     return get_data(int(match.group(1))) if match else None
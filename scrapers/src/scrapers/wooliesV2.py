@@ -0,0 +1,311 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+from typing import List
+
+import requests
+from requests.adapters import HTTPAdapter
+from checkpoint import Checkpoint
+from config import get_category_workers, get_cookie_source, get_rate_limit
+from cookie_pool import CookiePool, fetcher_for
+from fastjson import dumps, response_json
+from http_cache import shared_cache
+from ratelimit import limiter_for
+from telemetry import run_stats
+from utils.model import (
+    PriceRecord,
+    PriceUpdates,
+    ProductInfo,
+    Scraper,
+    Store,
+    validate_price_records,
+)
+from log import log, detailed_log
+
+
+class WoolworthsScraper(Scraper):
+    def __init__(self):
+        self.home_url = "https://www.woolworths.com.au/"
+        self.browse_url = "https://www.woolworths.com.au/apis/ui/browse/category"
+        self.detail_url = "https://www.woolworths.com.au/apis/ui/product/detail/"
+        self.limit = 36
+        self.max_pages = 200
+        # categories are listed concurrently, each one a page at a time
+        self.category_workers = get_category_workers(self.get_store_name())
+        # detail responses are revalidated against the on-disk cache
+        self.cache = shared_cache()
+        # paces listing and detail requests, which share the host
+        self.limiter = limiter_for(
+            "www.woolworths.com.au", max_rate=get_rate_limit(self.get_store_name())
+        )
+        # one pooled session for every worker; cookies come from the pool
+        # with each request, so the session itself must not keep any
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=32))
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.headers = {
+            "User-Agent": "Mozilla/5.0 (Linux; Android 6.0; Nexus 5 Build/MRA58N) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/135.0.0.0 Mobile Safari/537.36",
+            "Accept": "application/json, text/plain, */*",
+            "Origin": "https://www.woolworths.com.au",
+            "Referer": "https://www.woolworths.com.au/",
+        }
+        # several cookie jars rotated across workers and refreshed in the
+        # background, so a refresh never stalls scraping
+        self.cookies = CookiePool(
+            fetcher_for(
+                get_cookie_source(self.get_store_name()),
+                self.home_url,
+                self.headers["User-Agent"],
+            ),
+            name="woolworths cookies",
+        )
+        # display name: (categoryId, browse path)
+        self.categories = {
+            "Fruit & Veg": ("1-E5BEE36E", "fruit-veg"),
+            "Poultry, Meat & Seafood": ("1-D5A2236", "poultry-meat-seafood"),
+            "Deli & Chilled Meals": ("1-3151F6F", "deli-chilled-meals"),
+            "Dairy, Eggs & Fridge": ("1-6E4F4E4", "dairy-eggs-fridge"),
+            "Bakery": ("1-DEB537E", "bakery"),
+            "Lunch Box": ("1-9E92C35", "lunch-box"),
+            "Freezer": ("1-ACA2FC2", "freezer"),
+            "Snacks & Confectionery": ("1-717445A", "snacks-confectionery"),
+            "Pantry": ("1-39FD49C", "pantry"),
+            "International Foods": ("1-F229FBE", "international-foods"),
+            "Drinks": ("1-5AF3A0A", "drinks"),
+            "Beauty": ("1-8D61DD6", "beauty"),
+            "Beer, Wine & Spirits": ("1-8E4DA6F", "beer-wine-spirits"),
+            "Personal Care": ("1-894D0A8", "personal-care"),
+            "Health & Wellness": ("1-9851658", "health-wellness"),
+            "Cleaning & Maintenance": ("1-2432B58", "cleaning-maintenance"),
+            "Home & Lifestyle": ("1-DEA3ED5", "home-lifestyle"),
+            "Baby": ("1-717A94B", "baby"),
+            "Pet": ("1-61D6FEB", "pet"),
+            "Electronics": ("1-B863F57", "electronics"),
+        }
+
+    def send(self, method, *args, **kwargs) -> requests.Response:
+        """`method` with the next pooled cookie jar, retiring jars the site rejects"""
+        slot, cookies = self.cookies.get()
+        response = method(*args, cookies=cookies, **kwargs)
+        if response.status_code in (401, 403):
+            self.cookies.invalidate(slot)
+        return response
+
+    def scrape_category(self, checkpoint: Checkpoint | None = None) -> List[PriceUpdates]:
+        """
+        Scrape all categories and return a list of PriceUpdates.
+        Up to `category_workers` categories are paged through at once. With a
+        checkpoint, completed categories are reused and interrupted ones
+        resume from the next unsaved page.
+        """
+        self.cookies.start()
+        with ThreadPoolExecutor(
+            max_workers=max(1, self.category_workers),
+            thread_name_prefix="woolies-category",
+        ) as pool:
+            results = pool.map(
+                lambda cat_name: self.scrape_one_category(cat_name, checkpoint),
+                self.categories,
+            )
+            all_products = [product for products in results for product in products]
+
+        log(f"📦 Collected {len(all_products)} products total")
+        return all_products
+
+    def scrape_one_category(
+        self, cat_name: str, checkpoint: Checkpoint | None = None
+    ) -> List[PriceRecord]:
+        store = self.get_store_name()
+        category_id, path = self.categories[cat_name]
+        log(f"🗂️  Category: {cat_name} ({category_id})")
+
+        products = []
+        start_page, _, completed = (
+            checkpoint.progress(store, cat_name) if checkpoint else (None, None, False)
+        )
+        if start_page is not None:
+            saved = checkpoint.items(store, cat_name)
+            products.extend(saved)
+            if completed:
+                log(f"⏭️  {cat_name} already scraped this run ({len(saved)} products)")
+                return products
+            log(f"↩️  Resuming {cat_name} at page {start_page} ({len(saved)} products saved)")
+
+        payload = {
+            "categoryId": category_id,
+            "categoryVersion": "v2",
+            "enableAdReRanking": False,
+            "filters": [],
+            "flags": {"EnablePersonalizationCategoryRestriction": True},
+            "formatObject": dumps({"name": cat_name}).decode(),
+            "gpBoost": 0,
+            "groupEdmVariants": False,
+            "isBundle": False,
+            "isHideUnavailableProducts": False,
+            "isMobile": False,
+            "isRegisteredRewardCardPromotion": False,
+            "isSpecial": False,
+            "location": f"/shop/browse/{path}",
+            "pageNumber": 1,
+            "pageSize": self.limit,
+            "sortType": "TraderRelevance",
+            "token": "",
+            "url": f"/shop/browse/{path}",
+        }
+        headers = {
+            **self.headers,
+            "Content-Type": "application/json",
+            "Referer": f"{self.home_url}shop/browse/{path}",
+        }
+
+        # only a category that reached its end is complete, one cut short
+        # by an error stays open so the next run picks it up
+        finished = False
+        for page in range(start_page or 1, self.max_pages + 1):
+            payload["pageNumber"] = page
+            try:
+                response = self.limiter.request(
+                    self.send,
+                    self.session.post,
+                    self.browse_url, data=dumps(payload), headers=headers, timeout=15,
+                )
+                if not response.ok:
+                    log(f"❌ HTTP {response.status_code} for {cat_name} page {page}")
+                    break
+
+                data = response_json(response)
+                items = [
+                    product
+                    for bundle in data.get("Bundles") or []
+                    for product in bundle.get("Products") or []
+                ]
+                if not items:
+                    finished = True
+                    break
+
+                page_products, dropped = validate_price_records([
+                    PriceRecord(
+                        item.get("Stockcode"),
+                        Store.Woolworths,
+                        item.get("DisplayName") or item.get("Name"),
+                        item.get("Price") or -1,
+                    )
+                    for item in items
+                ])
+                if dropped:
+                    log(f"⚠️  Dropped {dropped} invalid items on {cat_name} page {page}")
+                products.extend(page_products)
+                detailed_log("  • grabbed %2d  (%s page=%d)", len(items), cat_name, page)
+                run_stats.record_page(store, cat_name, len(page_products))
+                if checkpoint:
+                    checkpoint.save_page(store, cat_name, page, page + 1, page_products)
+
+                if page * self.limit >= (data.get("TotalRecordCount") or 0):
+                    finished = True
+                    break
+
+            except Exception as e:
+                log(f"❌ Exception for {cat_name} page {page}: {e}")
+                break
+        else:
+            # ran out of pages
+            finished = True
+
+        if checkpoint and finished:
+            checkpoint.complete(store, cat_name)
+
+        log(f"✅ {cat_name}: {len(products)} products")
+        return products
+
+    def scrape_product(self, product: PriceUpdates) -> ProductInfo:
+        """Fetch detailed information for a specific product"""
+        stockcode = product.store_product_id
+
+        try:
+            self.cookies.start()
+            response = self.limiter.request(
+                self.send,
+                self.cache.get,
+                self.session.get,
+                f"{self.detail_url}{stockcode}",
+                params={"isMobile": "false", "useVariant": "true"},
+                headers={
+                    **self.headers,
+                    "Referer": f"{self.home_url}shop/productdetails/{stockcode}",
+                },
+                timeout=10,
+            )
+
+            if not response.ok:
+                log(f"❌ HTTP Error for stockcode {stockcode}: {response.status_code}")
+                return ProductInfo(
+                    store_product_id=product.store_product_id,
+                    store=product.store,
+                    product_name=product.product_name,
+                    price=product.price,
+                    details={},
+                )
+
+            data = response_json(response) or {}
+            product_data = data.get("Product") or {}
+            attrs = data.get("AdditionalAttributes") or {}
+            images = product_data.get("DetailsImagePaths") or []
+
+            details = {
+                "stockcode": product_data.get("Stockcode"),
+                "name": product_data.get("Name"),
+                "brand": product_data.get("Brand"),
+                "description": product_data.get("Description"),
+                "long_description": product_data.get("RichDescription")
+                or product_data.get("FullDescription"),
+                "size": product_data.get("PackageSize"),
+                "gtin": product_data.get("Barcode"),
+                "price_per_100g": product_data.get("CupString"),
+                "country_of_origin": (data.get("CountryOfOriginLabel") or {}).get("AltText"),
+                "ingredients": attrs.get("ingredients"),
+                "allergens": attrs.get("allergencontains"),
+                "dietary": attrs.get("lifestyleanddietarystatement"),
+                "storage": attrs.get("storageinstructions"),
+                "preparation": attrs.get("usageinstructions"),
+                "image_url": product_data.get("LargeImageFile"),
+                "image_urls": images,
+                "nutrition": {
+                    item.get("Name"): item.get("Values")
+                    for item in data.get("NutritionalInformation") or []
+                    if isinstance(item, dict) and item.get("Name")
+                },
+            }
+
+            current_price = product.price
+            if product_data.get("Price") is not None:
+                try:
+                    current_price = float(product_data["Price"])
+                except (TypeError, ValueError):
+                    pass
+
+            return ProductInfo(
+                store_product_id=product.store_product_id,
+                store=product.store,
+                product_name=product_data.get("DisplayName") or product.product_name,
+                price=current_price,
+                details=details,
+                unchanged=getattr(response, "unchanged", False),
+            )
+
+        except Exception as e:
+            log(f"❌ Exception for stockcode {stockcode}: {e}")
+            return ProductInfo(
+                store_product_id=product.store_product_id,
+                store=product.store,
+                product_name=product.product_name,
+                price=product.price,
+                details={},
+            )
+
+    def price_changed(self, product: PriceUpdates) -> bool:
+        return False
+
+    def is_new_product(self, product: PriceUpdates) -> bool:
+        return False
+
+    def get_store_name(self) -> str:
+        return "Woolworths"
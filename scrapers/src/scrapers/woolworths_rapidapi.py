@@ -1,8 +1,9 @@
 import requests
-import time
 import json
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Tuple
+from config import get_rapidapi_queries
+from quota import Quota, quota_for
 
 class WoolworthsRapidAPIScraper:
     BASE_URL = "https://woolworths-products-api.p.rapidapi.com/woolworths/product-search/"
@@ -11,12 +12,16 @@ class WoolworthsRapidAPIScraper:
         "x-rapidapi-host": "woolworths-products-api.p.rapidapi.com"
     }
 
-    def __init__(self):
+    def __init__(self, quota: Quota | None = None):
         self.session = requests.Session()
         self.session.headers.update(self.HEADERS)
+        # paid calls are budgeted per key, across runs
+        self.quota = quota or quota_for(self.HEADERS["x-rapidapi-host"])
 
-    def search_products(self, query: str, page: int = 1, page_size: int = 20) -> Dict[str, Any]:
-        """Search for products with pagination"""
+    def search_products(
+        self, query: str, page: int = 1, page_size: int = 20
+    ) -> Tuple[Dict[str, Any], bool]:
+        """Search for products with pagination, and whether the request succeeded"""
         params = {
             "query": query,
             "page": page,
@@ -24,32 +29,46 @@ class WoolworthsRapidAPIScraper:
         }
         try:
             response = self.session.get(self.BASE_URL, params=params)
+            self.quota.record(response)
             response.raise_for_status()
-            return response.json()
+            return response.json(), True
         except requests.RequestException as e:
             print(f"Error searching products: {e}")
-            return {"results": [], "totalResults": 0, "totalPages": 0}
+            return {"results": [], "totalResults": 0, "totalPages": 0}, False
 
-    def get_all_products(self, query: str = "") -> List[Dict[str, Any]]:
-        """Get all products for a query by paginating through all pages"""
-        all_products = []
+    def iter_pages(self, query: str = "") -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield each page of results for a query as it arrives. The query only
+        counts as refreshed once every page was fetched.
+        """
         page = 1
         page_size = 20
 
         while True:
+            # waits for the minute limit, stops once today's share is spent
+            if not self.quota.acquire():
+                print(f"Woolworths API budget spent for today, stopping at page {page}")
+                return
             print(f"Fetching page {page} for Woolworths...")
-            data = self.search_products(query, page, page_size)
+            data, ok = self.search_products(query, page, page_size)
+            if not ok:
+                # left stale, so the next run tries it first
+                return
             products = data.get("results", [])
-            all_products.extend(products)
+            if products:
+                yield products
 
             total_pages = data.get("totalPages", 0)
             if page >= total_pages or not products:
                 break
 
             page += 1
-            time.sleep(2)  # Rate limiting: 1 request every 2 seconds
 
-        return all_products
+        self.quota.mark_fresh(query)
+
+    def get_all_products(self, query: str = "") -> List[Dict[str, Any]]:
+        """Get all products for a query by paginating through all pages"""
+        return [product for page in self.iter_pages(query) for product in page]
 
     def transform_product(self, product: Dict[str, Any]) -> Dict[str, Any]:
         """Transform API response to standard format"""
@@ -67,14 +86,25 @@ class WoolworthsRapidAPIScraper:
             "product_url": product.get("url", "")
         }
 
-    def scrape_all(self) -> List[Dict[str, Any]]:
-        """Scrape all products (using empty query to get everything)"""
-        raw_products = self.get_all_products("")
-        return [self.transform_product(p) for p in raw_products]
+    def iter_all(self, queries: List[str] | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the transformed products of each query as pages arrive, least
+        recently refreshed query first, while the API budget lasts.
+        No queries means everything (empty query).
+        """
+        for query in self.quota.stale_first(queries or [""]):
+            if not self.quota.remaining():
+                break
+            for page in self.iter_pages(query):
+                for product in page:
+                    yield self.transform_product(product)
+
+    def scrape_all(self, queries: List[str] | None = None) -> List[Dict[str, Any]]:
+        return list(self.iter_all(queries))
 
 if __name__ == "__main__":
     scraper = WoolworthsRapidAPIScraper()
-    products = scraper.scrape_all()
+    products = scraper.scrape_all(get_rapidapi_queries())
     print(f"Scraped {len(products)} products from Woolworths")
     with open("woolworths_products.json", "w") as f:
         json.dump(products, f, indent=2)
\ No newline at end of file
@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+from typing import Dict, List, Tuple
+
+from checkpoint import Checkpoint
+from config import rate_limit_shares_var
+from log import flush as flush_logs, log
+from telemetry import run_stats
+from utils.model import PriceUpdates
+
+
+def plan_shards(scraper_list) -> List[Tuple[int, type, str | None]]:
+    """
+    One (scraper index, scraper class, category) task per category.
+    Scrapers without a `categories` dict become a single task with category None.
+    """
+    tasks = []
+    for i, scraper in enumerate(scraper_list):
+        categories = getattr(scraper, "categories", None)
+        if not categories:
+            tasks.append((i, type(scraper), None))
+            continue
+        # dict keys are unique, so every category is assigned exactly once
+        tasks.extend((i, type(scraper), category) for category in categories)
+    return tasks
+
+
+def plan_rate_shares(scraper_list, tasks, shards: int) -> Dict[str, int]:
+    """
+    How many workers can scrape each store at once: its task count, at most
+    `shards`. Each of them gets that share of the store's rate limit.
+    """
+    counts: Dict[str, int] = {}
+    for index, _, _ in tasks:
+        store = scraper_list[index].get_store_name()
+        counts[store] = counts.get(store, 0) + 1
+    return {store: min(shards, count) for store, count in counts.items()}
+
+
+def scrape_sharded(scraper_list, shards: int, run_id: str) -> List[List[PriceUpdates]]:
+    """
+    Scrape categories on `shards` worker processes and merge the results.
+
+    Each worker builds its own scraper limited to one category and records
+    progress in the shared checkpoint database, so a category finished by an
+    earlier attempt of the same run is not scraped again. Results come back
+    per store in the scrapers' own category order, as a sequential run would
+    return them. A shard that fails is logged and left open in the checkpoint.
+    """
+    tasks = plan_shards(scraper_list)
+    # create the checkpoint tables up front, workers racing to do it would fail
+    Checkpoint(run_id).close_engine()
+    log(f"sharding {len(tasks)} categories across {shards} processes")
+
+    results: Dict[Tuple[int, str | None], List[PriceUpdates]] = {}
+    # spawn so workers don't inherit open sqlite connections or threads
+    ctx = multiprocessing.get_context("spawn")
+    shares = plan_rate_shares(scraper_list, tasks, shards)
+    with ctx.Pool(shards, initializer=_init_worker, initargs=(shares,)) as pool:
+        for index, category, products, stats in pool.imap_unordered(
+            _scrape_shard, [(*task, run_id) for task in tasks]
+        ):
+            results[(index, category)] = products
+            run_stats.merge(stats)
+
+    stores = [[] for _ in scraper_list]
+    for index, _, category in tasks:
+        stores[index].extend(results.get((index, category), []))
+    return stores
+
+
+def _init_worker(shares: Dict[str, int]):
+    # the processes scraping a store share its request budget
+    for store, share in shares.items():
+        os.environ[rate_limit_shares_var(store)] = str(share)
+
+
+def _scrape_shard(task) -> Tuple[int, str | None, List[PriceUpdates], dict]:
+    index, scraper_cls, category, run_id = task
+    # workers are reused, only report what this shard added
+    run_stats.reset()
+    try:
+        scraper = scraper_cls()
+        if category is not None:
+            scraper.categories = {category: scraper.categories[category]}
+        products = scraper.scrape_category(Checkpoint(run_id))
+    # SystemExit too, a worker that dies takes its task with it and stalls the pool
+    except (Exception, SystemExit) as e:
+        log(f"❌ shard {scraper_cls.__name__}/{category} failed: {e}")
+        products = []
+    # the pool terminates its workers, so nothing may stay buffered
+    flush_logs()
+    return index, category, products, run_stats.export()
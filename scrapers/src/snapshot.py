@@ -0,0 +1,202 @@
+import json
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+
+from database import MainDatabase
+from log import log
+
+
+def details_hash(details: dict) -> int:
+    """
+    Stable 64-bit hash of product details, independent of key order.
+    0 is reserved for "unknown".
+    """
+    encoded = json.dumps(
+        details, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str
+    ).encode()
+    return int.from_bytes(blake2b(encoded, digest_size=8).digest(), "big", signed=True) or 1
+
+
+class StorePrices:
+    """Sorted product ids, their prices and details hashes for one store, packed into arrays"""
+
+    __slots__ = ("ids", "prices", "hashes")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.prices = array("d")
+        self.hashes = array("q")
+
+    def index(self, id: int) -> int:
+        """Position of id in the arrays, -1 if not present"""
+        i = bisect_left(self.ids, id)
+        if i < len(self.ids) and self.ids[i] == id:
+            return i
+        return -1
+
+    def merge(self, entries: list[tuple[int, float, int]]):
+        """Add (id, price, details hash) entries, keeping the arrays sorted"""
+        merged = sorted([*zip(self.ids, self.prices, self.hashes), *entries])
+        self.ids = array("q", (id for id, _, _ in merged))
+        self.prices = array("d", (price for _, price, _ in merged))
+        self.hashes = array("q", (hash for _, _, hash in merged))
+
+
+class PriceSnapshot:
+    """
+    In-memory copy of simple_products used for change detection during a run.
+
+    Known products are kept as packed (id, price, details hash) arrays per store,
+    about 24 bytes each, so 500k products fit in ~12MB. New products, price
+    changes and details hash changes are kept aside and only written back by
+    `flush()`.
+    """
+
+    def __init__(self):
+        self.stores: dict[str, StorePrices] = {}
+        self.new_products: dict[tuple[str, int], list] = {}
+        self.changed_prices: dict[tuple[str, int], float] = {}
+        self.changed_hashes: dict[tuple[str, int], int] = {}
+
+    @classmethod
+    def load(cls, db: MainDatabase) -> "PriceSnapshot":
+        """Read every (store, id, price, details hash) from the database"""
+        snapshot = cls()
+        table = None
+        current_store = None
+        for store, id, price, hash in db.iter_prices():
+            if store != current_store:
+                current_store = store
+                table = snapshot.stores.setdefault(store, StorePrices())
+            table.ids.append(id)
+            table.prices.append(price if price is not None else float("nan"))
+            table.hashes.append(hash or 0)
+        log(f"loaded price snapshot of {len(snapshot)} products")
+        return snapshot
+
+    def __len__(self) -> int:
+        return sum(len(t.ids) for t in self.stores.values()) + len(self.new_products)
+
+    def get_price(self, store: str, id: int) -> float | None:
+        """Current price of a product, None if it isn't known"""
+        store = _store_key(store)
+        new = self.new_products.get((store, id))
+        if new is not None:
+            return new[1]
+        table = self.stores.get(store)
+        i = table.index(id) if table else -1
+        return table.prices[i] if i >= 0 else None
+
+    def add_product(self, store: str, id: int, name: str, price: float) -> bool:
+        """
+        Record a product if it isn't known yet.
+        Returns True if it is new, False if it already exists.
+        """
+        store = _store_key(store)
+        if self.get_price(store, id) is not None:
+            return False
+        self.new_products[(store, id)] = [name, price, 0]
+        return True
+
+    def discard_new(self, store: str, id: int):
+        """Forget a product added this run, so the next run treats it as new again"""
+        self.new_products.pop((_store_key(store), id), None)
+
+    def is_new(self, store: str, id: int) -> bool:
+        """True if the product was added during this run"""
+        return (_store_key(store), id) in self.new_products
+
+    def check_details(self, store: str, id: int, hash: int) -> bool:
+        """
+        Record the details hash of a product if it differs.
+        Returns True if it changed (or wasn't known), False if the same.
+        """
+        store = _store_key(store)
+        new = self.new_products.get((store, id))
+        if new is not None:
+            if new[2] == hash:
+                return False
+            new[2] = hash
+            return True
+
+        table = self.stores.get(store)
+        i = table.index(id) if table else -1
+        if i < 0:
+            return True
+        if table.hashes[i] == hash:
+            return False
+        table.hashes[i] = hash
+        self.changed_hashes[(store, id)] = hash
+        return True
+
+    def check_price(self, store: str, id: int, new_price: float) -> bool:
+        """
+        Update the price if it differs.
+        Returns True if it changed, False if same or the product isn't known.
+        """
+        store = _store_key(store)
+        new = self.new_products.get((store, id))
+        if new is not None:
+            if new[1] == new_price:
+                return False
+            new[1] = new_price
+            return True
+
+        table = self.stores.get(store)
+        i = table.index(id) if table else -1
+        if i < 0 or table.prices[i] == new_price:
+            return False
+        table.prices[i] = new_price
+        self.changed_prices[(store, id)] = new_price
+        return True
+
+    def flush(self, db: MainDatabase) -> tuple[int, int]:
+        """
+        Write new products, changed prices and changed details hashes back to
+        the database. Returns (products added, prices updated).
+        """
+        added = db.bulk_add_simple_products(
+            [
+                {
+                    "store": store,
+                    "id": id,
+                    "name": name,
+                    "price": price,
+                    "details_hash": hash or None,
+                }
+                for (store, id), (name, price, hash) in self.new_products.items()
+            ]
+        )
+        updated = db.bulk_update_prices(
+            [
+                {"store": store, "id": id, "price": price}
+                for (store, id), price in self.changed_prices.items()
+            ]
+        )
+        rehashed = db.bulk_update_details_hashes(
+            [
+                {"store": store, "id": id, "details_hash": hash}
+                for (store, id), hash in self.changed_hashes.items()
+            ]
+        )
+
+        # new products are now regular entries of their store tables
+        by_store: dict[str, list[tuple[int, float, int]]] = {}
+        for (store, id), (_, price, hash) in self.new_products.items():
+            by_store.setdefault(store, []).append((id, price, hash))
+        for store, entries in by_store.items():
+            self.stores.setdefault(store, StorePrices()).merge(entries)
+        self.new_products.clear()
+        self.changed_prices.clear()
+        self.changed_hashes.clear()
+
+        log(
+            f"snapshot flushed: {added} new products, {updated} price changes, "
+            f"{rehashed} details changes"
+        )
+        return added, updated
+
+
+def _store_key(store) -> str:
+    return getattr(store, "value", store)
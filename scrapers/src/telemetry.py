@@ -0,0 +1,244 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+from log import log
+
+# request latencies are counted in buckets 5% wide above 0.1ms, so memory
+# stays fixed however many requests a run makes and percentiles are at most
+# 5% high
+LATENCY_FLOOR = 0.0001
+LATENCY_GROWTH = 1.05
+
+
+class RunStats:
+    """
+    Counters and timings for one scraper run.
+
+    Stages are wall-clock sections of the run, timings are summed durations
+    that may overlap across threads (e.g. ingest sends). Pages are counted per
+    store and category, requests per host with their latency (as a histogram)
+    and size. The
+    summary is written as JSON and optionally as an OpenMetrics text file.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages = defaultdict(float)
+        self.timings = defaultdict(float)
+        self.counters = defaultdict(int)
+        self.pages = defaultdict(lambda: defaultdict(int))
+        self.products = defaultdict(int)
+        # host -> latency bucket -> requests
+        self.latencies = defaultdict(lambda: defaultdict(int))
+        self.bytes = defaultdict(int)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Start over, e.g. for the next task of a reused worker process"""
+        self.__init__()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a section of the run"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] += time.perf_counter() - start
+
+    @contextmanager
+    def timed(self, name: str):
+        """Add the duration of a block to a summed timing, safe across threads"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.timings[name] += time.perf_counter() - start
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def record_page(self, store: str, category: str, products: int):
+        with self._lock:
+            self.pages[store][category] += 1
+            self.products[store] += products
+
+    def record_request(self, host: str, latency: float, size: int, status: int | None):
+        with self._lock:
+            self.latencies[host][_latency_bucket(latency)] += 1
+            self.bytes[host] += size
+            if status is None or status >= 400:
+                self.errors[host] += 1
+
+    def export(self) -> dict:
+        """Raw data, for merging stats from worker processes"""
+        with self._lock:
+            return {
+                "timings": dict(self.timings),
+                "counters": dict(self.counters),
+                "pages": {store: dict(c) for store, c in self.pages.items()},
+                "products": dict(self.products),
+                "latencies": {host: dict(v) for host, v in self.latencies.items()},
+                "bytes": dict(self.bytes),
+                "errors": dict(self.errors),
+            }
+
+    def merge(self, raw: dict):
+        """Add the exported data of another RunStats"""
+        with self._lock:
+            for name, value in raw["timings"].items():
+                self.timings[name] += value
+            for name, value in raw["counters"].items():
+                self.counters[name] += value
+            for store, categories in raw["pages"].items():
+                for category, pages in categories.items():
+                    self.pages[store][category] += pages
+            for store, value in raw["products"].items():
+                self.products[store] += value
+            for host, buckets in raw["latencies"].items():
+                for bucket, requests in buckets.items():
+                    self.latencies[host][bucket] += requests
+            for host, value in raw["bytes"].items():
+                self.bytes[host] += value
+            for host, value in raw["errors"].items():
+                self.errors[host] += value
+
+    def summary(self, **components) -> dict:
+        """Everything collected so far, plus the stats of other components"""
+        with self._lock:
+            elapsed = time.time() - self.started
+            fetched = self.counters.get("products_fetched", 0)
+            detail_time = self.stages.get("product_scrape", 0)
+            return {
+                "started": datetime.fromtimestamp(self.started).isoformat(),
+                "elapsed": round(elapsed, 3),
+                "stages": {k: round(v, 3) for k, v in self.stages.items()},
+                "timings": {k: round(v, 3) for k, v in self.timings.items()},
+                "counters": dict(self.counters),
+                "products_per_second": round(fetched / detail_time, 2) if detail_time else None,
+                "stores": {
+                    store: {
+                        "pages": sum(categories.values()),
+                        "listed_products": self.products[store],
+                        "categories": dict(categories),
+                    }
+                    for store, categories in self.pages.items()
+                },
+                "http": {
+                    host: {
+                        "requests": sum(latencies.values()),
+                        "errors": self.errors[host],
+                        "bytes": self.bytes[host],
+                        **_percentiles(latencies),
+                    }
+                    for host, latencies in self.latencies.items()
+                },
+                **components,
+            }
+
+    def write_json(self, path: str, summary: dict):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(summary, file, indent=2, default=str)
+
+    def write_openmetrics(self, path: str, summary: dict):
+        """Write the summary as OpenMetrics text, e.g. for a textfile collector"""
+        lines = [
+            "# TYPE scraper_run_seconds gauge",
+            f"scraper_run_seconds {summary['elapsed']}",
+            "# TYPE scraper_stage_seconds gauge",
+            *(
+                f'scraper_stage_seconds{{stage="{name}"}} {value}'
+                for name, value in summary["stages"].items()
+            ),
+            "# TYPE scraper_pages gauge",
+            *(
+                f'scraper_pages{{store="{store}",category="{category}"}} {pages}'
+                for store, data in summary["stores"].items()
+                for category, pages in data["categories"].items()
+            ),
+            "# TYPE scraper_http_requests gauge",
+            *(
+                f'scraper_http_requests{{host="{host}"}} {data["requests"]}'
+                for host, data in summary["http"].items()
+            ),
+            "# TYPE scraper_http_errors gauge",
+            *(
+                f'scraper_http_errors{{host="{host}"}} {data["errors"]}'
+                for host, data in summary["http"].items()
+            ),
+            "# TYPE scraper_http_bytes gauge",
+            *(
+                f'scraper_http_bytes{{host="{host}"}} {data["bytes"]}'
+                for host, data in summary["http"].items()
+            ),
+            "# TYPE scraper_http_latency_seconds gauge",
+            *(
+                f'scraper_http_latency_seconds{{host="{host}",quantile="{q}"}} {data[f"p{q[2:]}"]}'
+                for host, data in summary["http"].items()
+                for q in ("0.50", "0.90", "0.99")
+                if data.get(f"p{q[2:]}") is not None
+            ),
+            "# TYPE scraper_count gauge",
+            *(
+                f'scraper_count{{name="{name}"}} {value}'
+                for name, value in summary["counters"].items()
+            ),
+            "# EOF",
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            file.write("\n".join(lines) + "\n")
+
+    def finish(self, json_path: str, openmetrics_path: str | None = None, **components) -> dict:
+        """Write the run summary and log the headline numbers"""
+        summary = self.summary(**components)
+        try:
+            self.write_json(json_path, summary)
+            if openmetrics_path:
+                self.write_openmetrics(openmetrics_path, summary)
+        except OSError as e:
+            log(f"❌ could not write run stats: {e}")
+        log(
+            f"run took {summary['elapsed']:.0f}s, stages: {summary['stages']}, "
+            f"stats in {json_path}"
+        )
+        return summary
+
+
+def _latency_bucket(latency: float) -> int:
+    """Smallest bucket whose upper bound is at least `latency`"""
+    return math.ceil(math.log(max(latency, LATENCY_FLOOR) / LATENCY_FLOOR, LATENCY_GROWTH))
+
+
+def _percentiles(buckets: dict) -> dict:
+    total = sum(buckets.values())
+    if not total:
+        return {"p50": None, "p90": None, "p99": None}
+    ordered = sorted(buckets.items())
+
+    def at(q: float) -> float:
+        rank = min(int(q * total), total - 1)
+        seen = 0
+        for bucket, requests in ordered:
+            seen += requests
+            if seen > rank:
+                break
+        # the bucket's upper bound
+        return round(LATENCY_FLOOR * LATENCY_GROWTH ** bucket, 4)
+
+    return {"p50": at(0.5), "p90": at(0.9), "p99": at(0.99)}
+
+
+# one per process, shard workers send theirs back to the coordinator
+run_stats = RunStats()
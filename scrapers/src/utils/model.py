@@ -1,9 +1,10 @@
 import asyncio
+import math
 from abc import ABC, abstractmethod
 from enum import Enum
 from typing import List, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class Product(BaseModel):
@@ -59,6 +60,78 @@ class PriceUpdates(BaseModel):
         }
 
 
+class PriceRecord:
+    """
+    Listing record with the same fields as PriceUpdates but no per-item
+    validation, for the thousands of items a category scrape produces.
+    Build them unchecked and pass each page through `validate_price_records`.
+    """
+
+    __slots__ = ("store_product_id", "store", "product_name", "price")
+
+    def __init__(self, store_product_id, store, product_name, price):
+        self.store_product_id = store_product_id
+        self.store = store
+        self.product_name = product_name
+        self.price = price
+
+    def __eq__(self, other):
+        if not isinstance(other, (PriceRecord, PriceUpdates)):
+            return NotImplemented
+        return (
+            self.store_product_id == other.store_product_id
+            and self.store == other.store
+            and self.product_name == other.product_name
+            and self.price == other.price
+        )
+
+    def __repr__(self):
+        return (
+            f"PriceRecord(store_product_id={self.store_product_id}, store={self.store}, "
+            f"product_name={self.product_name!r}, price={self.price})"
+        )
+
+    def to_api_format(self):
+        return {
+            "store": self.store,
+            "store_product_id": self.store_product_id,
+            "new_price": self.price,
+        }
+
+
+def validate_price_records(records: List[PriceRecord]) -> Tuple[List[PriceRecord], int]:
+    """
+    Coerce a batch of records in place the way PriceUpdates would (int id,
+    Store, str name, float price). Ids that are bools or fractional floats
+    and prices that are nan or infinite are dropped too. Returns the valid
+    records and how many were dropped.
+    """
+    valid = []
+    stores = {}
+    for record in records:
+        try:
+            store = stores.get(record.store)
+            if store is None:
+                store = stores[record.store] = Store(record.store)
+            record.store = store
+            product_id = record.store_product_id
+            # int() would silently turn True into 1 and truncate 4.5 to 4
+            if isinstance(product_id, bool) or (
+                isinstance(product_id, float) and not product_id.is_integer()
+            ):
+                raise ValueError("store_product_id must be a whole number")
+            record.store_product_id = int(product_id)
+            record.price = float(record.price)
+            if not math.isfinite(record.price):
+                raise ValueError("price must be finite")
+            if not isinstance(record.product_name, str):
+                raise TypeError("product_name must be a string")
+        except (TypeError, ValueError):
+            continue
+        valid.append(record)
+    return valid, len(records) - len(valid)
+
+
 # we could inherirt here but i hate inheritence
 class ProductInfo(BaseModel):
     store_product_id: int
@@ -66,6 +139,9 @@ class ProductInfo(BaseModel):
     product_name: str
     price: float
     details: dict
+    # the detail response matched the cached one, so the details are as
+    # last sent; never part of the payload
+    unchanged: bool = Field(default=False, exclude=True)
 
     def to_api_format(self):
         return {
@@ -79,8 +155,9 @@ class ProductInfo(BaseModel):
 
 class Scraper(ABC):
     @abstractmethod
-    def scrape_category(self) -> List[PriceUpdates]:
+    def scrape_category(self, checkpoint=None) -> List[PriceUpdates]:
         # a list of (store_product_id, new_price)
+        # checkpoint: optional checkpoint.Checkpoint to resume category paging from
         pass
 
     @abstractmethod
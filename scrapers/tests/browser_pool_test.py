@@ -0,0 +1,138 @@
+import threading
+
+import pytest
+from browser_pool import BrowserFetchError, BrowserPool, BrowserSession
+
+
+class FakeSession(BrowserSession):
+    """Answers every url with its own JSON, counting starts and stops"""
+
+    started = 0
+    stopped = 0
+
+    def __init__(self, fail_on: str | None = None, crash_on: str | None = None):
+        super().__init__("https://shop.example/")
+        self.fail_on = fail_on
+        self.crash_on = crash_on
+
+    def _start(self):
+        FakeSession.started += 1
+
+    def _fetch(self, url):
+        if url == self.crash_on:
+            raise RuntimeError("browser crashed")
+        if url == self.fail_on:
+            return 404, "not found"
+        return 200, f'{{"url": "{url}"}}'
+
+    def _stop(self):
+        FakeSession.stopped += 1
+
+
+@pytest.fixture(autouse=True)
+def reset_counts():
+    FakeSession.started = FakeSession.stopped = 0
+
+
+def test_one_browser_serves_many_fetches():
+    pool = BrowserPool(FakeSession)
+    for i in range(50):
+        assert pool.fetch_json(f"/p/{i}") == {"url": f"/p/{i}"}
+    assert pool.created == 1
+    assert FakeSession.started == 1
+
+
+def test_http_errors_keep_the_browser():
+    pool = BrowserPool(lambda: FakeSession(fail_on="/missing"))
+    with pytest.raises(BrowserFetchError):
+        pool.fetch_json("/missing")
+    pool.fetch_json("/p/1")
+    assert pool.created == 1
+
+
+def test_crashed_and_worn_out_browsers_are_replaced():
+    pool = BrowserPool(lambda: FakeSession(crash_on="/crash"), max_uses=3)
+    with pytest.raises(RuntimeError):
+        pool.fetch_json("/crash")
+    assert FakeSession.stopped == 1
+    for i in range(3):
+        pool.fetch_json(f"/p/{i}")
+    assert FakeSession.stopped == 2
+    pool.fetch_json("/p/3")
+    assert pool.created == 3
+
+
+def test_leases_are_shared_by_threads_up_to_size():
+    pool = BrowserPool(FakeSession, size=2)
+    results = []
+
+    def work(i):
+        with pool.lease() as browser:
+            results.append(browser.fetch_json(f"/p/{i}"))
+
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(results) == 20
+    assert pool.created <= 2
+
+
+class FakeWoolies(BrowserSession):
+    BRIEF = '{"brand": {"name": "Farmer"}, "image": "https://img/1.jpg"}'
+    DETAILED = """{
+        "Product": {"Name": "Milk 2L", "Price": 3.1, "CupPrice": 1.55, "WasPrice": 3.1,
+                    "IsAvailable": true, "PackageSize": "2L", "FullDescription": "Milk"},
+        "PrimaryCategory": {"Department": "Dairy"}
+    }"""
+
+    def __init__(self):
+        super().__init__("https://www.woolworths.com.au/")
+
+    def _start(self):
+        pass
+
+    def _fetch(self, url):
+        if url.endswith("/404"):
+            return 404, ""
+        return 200, self.BRIEF if "schemaorg" in url else self.DETAILED
+
+    def _stop(self):
+        pass
+
+
+def test_woolies_lookups_share_one_browser():
+    from scrapers import woolies
+
+    pool = BrowserPool(FakeWoolies)
+    product = woolies.get_data(1, pool=pool)
+    assert product.product_name == "Milk 2L"
+    assert product.brand == "Farmer"
+    assert product.product_url.endswith("/1")
+
+    results = dict(woolies.get_many([2, 404, 3], pool=pool))
+    assert results[404] is None
+    assert results[3].category == "Dairy"
+    assert pool.created == 1
+
+
+def test_stopping_get_many_early_keeps_the_browser():
+    from scrapers import woolies
+
+    pool = BrowserPool(FakeWoolies)
+    results = woolies.get_many([1, 2, 3], pool=pool)
+    assert next(results)[0] == 1
+    results.close()
+
+    woolies.get_data(4, pool=pool)
+    assert pool.created == 1
+
+
+def test_sessions_must_implement_the_browser_hooks():
+    class Incomplete(BrowserSession):
+        def _start(self):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete("https://shop.example/")
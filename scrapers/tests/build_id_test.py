@@ -0,0 +1,85 @@
+import os
+
+import pytest
+from build_id import BuildId, parse_build_id
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "coles_home.html")
+HOME_BUILD = "20251014.2-3f9a1c7e5d2b4a6c8e0f1a3b5c7d9e1f2a4b6c8d"
+
+
+@pytest.fixture
+def home_html():
+    with open(FIXTURE) as f:
+        return f.read()
+
+
+class FakeSite:
+    """Serves a home page whose build id can be changed, counting fetches"""
+
+    def __init__(self, build_id: str | None):
+        self.build_id = build_id
+        self.fetches = 0
+
+    def __call__(self) -> str:
+        self.fetches += 1
+        if self.build_id is None:
+            raise ConnectionError("offline")
+        return f'<script id="__NEXT_DATA__" type="application/json">{{"buildId":"{self.build_id}"}}</script>'
+
+
+def test_parse_build_id(home_html):
+    assert parse_build_id(home_html) == HOME_BUILD
+
+
+def test_parse_build_id_from_manifest_path(home_html):
+    without_next_data = home_html.replace('id="__NEXT_DATA__"', 'id="other"')
+    assert parse_build_id(without_next_data) == HOME_BUILD
+    assert parse_build_id("<html></html>") is None
+
+
+def test_discovered_id_is_cached_across_instances(tmp_path):
+    path = str(tmp_path / "build_ids.json")
+    site = FakeSite("a")
+    assert BuildId("coles", site, "fallback", path=path).get() == "a"
+    assert BuildId("coles", site, "fallback", path=path).get() == "a"
+    assert site.fetches == 1
+
+    # once the ttl passes the site is asked again
+    site.build_id = "b"
+    assert BuildId("coles", site, "fallback", ttl=-1, path=path).get() == "b"
+    assert site.fetches == 2
+
+
+def test_fallback_when_discovery_fails(tmp_path):
+    build = BuildId("coles", FakeSite(None), "fallback", path=str(tmp_path / "ids.json"))
+    assert build.get() == "fallback"
+
+
+def test_404_burst_rediscovers(tmp_path):
+    site = FakeSite("a")
+    build = BuildId("coles", site, "fallback", path=str(tmp_path / "ids.json"), burst=3, cooldown=0)
+    assert build.get() == "a"
+
+    site.build_id = "b"
+    assert not build.not_found("a")
+    build.found()  # a success in between ends the burst
+    assert not build.not_found("a")
+    assert not build.not_found("a")
+    assert site.fetches == 1
+    assert build.not_found("a")
+    assert build.get() == "b"
+    assert build.rediscoveries == 1
+
+    # requests still in flight with the old id just retry
+    assert build.not_found("a")
+    assert site.fetches == 2
+
+
+def test_404s_for_a_live_build_stop_after_one_lookup(tmp_path):
+    site = FakeSite("a")
+    build = BuildId("coles", site, "fallback", path=str(tmp_path / "ids.json"), cooldown=60)
+    build.get()
+    build._last_attempt -= 60
+    assert not build.not_found("a", force=True)
+    assert not build.not_found("a", force=True)
+    assert site.fetches == 2
@@ -0,0 +1,77 @@
+from json import dumps
+
+import pytest
+import requests
+from checkpoint import Checkpoint
+from scrapers.aldiV2 import AldiScraper
+from utils.model import PriceUpdates, Store
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+def update(i: int) -> PriceUpdates:
+    return PriceUpdates(store_product_id=i, store=Store.ALDI, product_name=f"p{i}", price=1.0)
+
+
+def test_pages_advance_cursor_and_keep_items(sqlite_dir):
+    checkpoint = Checkpoint("run-1")
+    assert checkpoint.progress("ALDI", "pantry") == (None, None, False)
+
+    checkpoint.save_page("ALDI", "pantry", 0, 1, [update(1), update(2)], total_pages=3)
+    checkpoint.save_page("ALDI", "pantry", 1, 2, [update(3)])
+    assert checkpoint.progress("ALDI", "pantry") == (2, 3, False)
+    assert [p.store_product_id for p in checkpoint.items("ALDI", "pantry")] == [1, 2, 3]
+
+    checkpoint.complete("ALDI", "pantry")
+    assert checkpoint.progress("ALDI", "pantry") == (2, 3, True)
+
+
+def test_other_runs_are_pruned(sqlite_dir):
+    Checkpoint("yesterday").save_page("ALDI", "pantry", 0, 1, [update(1)])
+    today = Checkpoint("today")
+    assert today.progress("ALDI", "pantry") == (None, None, False)
+    assert Checkpoint("yesterday").items("ALDI", "pantry") == []
+
+
+class FakeAldi:
+    """Serves two pages per category, optionally failing on one request"""
+
+    def __init__(self, fail_on: tuple | None = None):
+        self.fail_on = fail_on
+        self.requests = []
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        key = (params["categoryKey"], params["offset"] // params["limit"])
+        self.requests.append(key)
+        if key == self.fail_on:
+            raise requests.ConnectionError("reset")
+        res = requests.Response()
+        res.status_code = 200
+        page = key[1]
+        items = [] if page >= 2 else [
+            {"sku": str(key[0] % 1000 + page), "name": "x", "price": {"amountRelevantDisplay": "$1.00"}}
+        ]
+        res._content = dumps({"data": items}).encode()
+        return res
+
+
+def test_interrupted_run_resumes(sqlite_dir, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda _: None)
+    scraper = AldiScraper()
+    scraper.categories = {"a": 1000, "b": 2000}
+
+    fake = FakeAldi(fail_on=(2000, 1))
+    monkeypatch.setattr(requests, "get", fake.get)
+    first = scraper.scrape_category(Checkpoint("run"))
+    assert len(first) == 3
+
+    fake = FakeAldi()
+    monkeypatch.setattr(requests, "get", fake.get)
+    second = scraper.scrape_category(Checkpoint("run"))
+    # "a" is reused as is, "b" resumes at the page that failed
+    assert fake.requests == [(2000, 1), (2000, 2)]
+    assert [p.store_product_id for p in second] == [0, 1, 0, 1]
@@ -0,0 +1,88 @@
+import os
+import time
+
+from cookie_pool import CookiePool, fixture_fetcher
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "woolies_cookies.json")
+
+
+class CountingFetch:
+    """Hands out numbered jars, optionally failing after a few"""
+
+    def __init__(self, fail_after: int | None = None):
+        self.calls = 0
+        self.fail_after = fail_after
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ConnectionError("blocked")
+        return {"session": str(self.calls)}
+
+
+def wait_for(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_jars_rotate_across_workers():
+    fetch = CountingFetch()
+    pool = CookiePool(fetch, size=2).start()
+    try:
+        wait_for(lambda: pool.stats()["valid"] == 2)
+        jars = {pool.get()[1]["session"] for _ in range(4)}
+        assert jars == {"1", "2"}
+        assert fetch.calls == 2
+    finally:
+        pool.stop()
+
+
+def test_rejected_jar_is_replaced_in_the_background():
+    fetch = CountingFetch()
+    pool = CookiePool(fetch, size=1).start()
+    try:
+        slot, cookies = pool.get()
+        assert cookies == {"session": "1"}
+        pool.invalidate(slot)
+        wait_for(lambda: pool.stats()["refreshes"] == 2)
+        assert pool.get() == (0, {"session": "2"})
+        assert pool.stats()["invalidations"] == 1
+    finally:
+        pool.stop()
+
+
+def test_jars_are_refreshed_before_they_expire():
+    fetch = CountingFetch()
+    # with a 2s lifetime and a 1s margin, each jar is replaced after ~1s
+    pool = CookiePool(fetch, size=1, max_age=2.0, margin=1.0).start()
+    try:
+        wait_for(lambda: fetch.calls >= 2, timeout=3.0)
+        assert pool.get()[1]["session"] != "1"
+    finally:
+        pool.stop()
+
+
+def test_a_stale_jar_beats_none_while_refreshes_fail():
+    fetch = CountingFetch(fail_after=1)
+    pool = CookiePool(fetch, size=1, retry_delay=0.05).start()
+    try:
+        slot, _ = pool.get()
+        pool.invalidate(slot)
+        wait_for(lambda: pool.stats()["failures"] >= 1)
+        assert pool.get(timeout=0.1) == (0, {"session": "1"})
+    finally:
+        pool.stop()
+
+
+def test_fixture_jars():
+    pool = CookiePool(fixture_fetcher(FIXTURE), size=1, max_age=60).start()
+    try:
+        slot, cookies = pool.get()
+        assert cookies["_abck"].startswith("0F1E2D3C")
+        assert len(cookies) == 4
+        # the recorded expiry times are ignored, the jar is still valid
+        assert pool.stats()["valid"] == 1
+    finally:
+        pool.stop()
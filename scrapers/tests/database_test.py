@@ -0,0 +1,66 @@
+import pytest
+from database import MainDatabase
+from sqlalchemy import create_engine
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    """Databases live in a relative sqlite/ directory"""
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+def test_default_profile_keeps_sqlite_defaults(sqlite_dir):
+    db = MainDatabase("plain", profile="default")
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "delete"
+
+
+def test_fast_profile_pragmas(sqlite_dir):
+    db = MainDatabase("fast", profile="fast")
+    with db.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        # NORMAL
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+
+
+def test_fast_profile_batches_commits(sqlite_dir):
+    db = MainDatabase("batched", profile="fast")
+    other = MainDatabase("batched", profile="fast")
+
+    with db.batch():
+        assert db.add_simple_product("Coles", 1, "milk", 2.0)
+        assert not db.add_simple_product("Coles", 1, "milk", 2.0)
+        assert db.check_price("Coles", 1, 2.5)
+        # nothing committed yet, so a second connection can't see it
+        assert other.get_product_price("Coles", 1) is None
+
+    assert other.get_product_price("Coles", 1) == 2.5
+
+
+def test_failed_write_in_a_batch_keeps_the_others(sqlite_dir):
+    db = MainDatabase("batched", profile="fast")
+
+    with db.batch():
+        assert db.add_simple_product("Coles", 1, "milk", 2.0)
+        # sqlite can't store a dict, so only this insert fails
+        assert not db.add_simple_product("Coles", 2, "bread", {"price": 3.0})
+        assert db.add_simple_product("Coles", 3, "eggs", 5.0)
+
+    other = MainDatabase("batched", profile="fast")
+    assert other.get_product_price("Coles", 1) == 2.0
+    assert other.get_product_price("Coles", 2) is None
+    assert other.get_product_price("Coles", 3) == 5.0
+
+
+def test_details_hash_column_is_added_to_old_databases(sqlite_dir):
+    engine = create_engine("sqlite:///sqlite/old.db")
+    with engine.begin() as conn:
+        conn.exec_driver_sql(
+            "CREATE TABLE simple_products (store VARCHAR, id INTEGER, name VARCHAR, "
+            "price FLOAT, PRIMARY KEY (store, id))"
+        )
+        conn.exec_driver_sql("INSERT INTO simple_products VALUES ('ALDI', 1, 'eggs', 5.0)")
+
+    db = MainDatabase("old")
+    assert list(db.iter_prices()) == [("ALDI", 1, 5.0, None)]
@@ -0,0 +1,56 @@
+import json
+
+import fastjson
+import pytest
+
+LISTING = json.dumps({
+    "pageProps": {
+        "searchResults": {
+            "noOfResults": 97,
+            "results": [
+                {
+                    "_type": "PRODUCT",
+                    "id": 123,
+                    "brand": "Coles",
+                    "name": "Milk",
+                    "size": "2L",
+                    "pricing": {"now": 3.1, "was": 3.5, "unit": {"price": 1.55}},
+                    "imageUris": [{"uri": "/a.jpg"}],
+                },
+                {"_type": "SINGLE_TILE", "adId": "x"},
+                {"_type": "PRODUCT", "id": 456, "brand": "Dairy", "name": "Butter", "size": "250g", "pricing": None},
+            ],
+            "facets": [{"name": "brand", "values": list(range(50))}],
+        },
+        "other": {"big": "x" * 1000},
+    }
+}).encode()
+
+
+@pytest.fixture(params=["msgspec", "stdlib"])
+def backend(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(fastjson, "msgspec", None)
+    elif fastjson.msgspec is None:
+        pytest.skip("msgspec not installed")
+    return request.param
+
+
+def test_decode_coles_listing(backend):
+    total, n_items, items = fastjson.decode_coles_listing(LISTING)
+    assert total == 97
+    assert n_items == 3
+    assert items == [
+        (123, "Coles", "Milk", "2L", 3.1),
+        (456, "Dairy", "Butter", "250g", None),
+    ]
+
+
+def test_decode_coles_listing_without_results(backend):
+    assert fastjson.decode_coles_listing(b'{"pageProps": {}}') == (0, 0, [])
+
+
+def test_round_trip(backend):
+    body = {"products": [{"name": "Crème fraîche", "price": 4.5, "details": {"a": [1, None]}}]}
+    assert json.loads(fastjson.dumps(body)) == body
+    assert fastjson.loads(fastjson.dumps(body)) == body
@@ -0,0 +1,86 @@
+import random
+
+import pytest
+import requests
+from http_cache import CachedResponse, HttpCache
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+class FakeServer:
+    """Answers GETs with an ETag, honouring If-None-Match when `etag` is set"""
+
+    def __init__(self, body: bytes = b'{"a": 1}', etag: str | None = '"v1"'):
+        self.body = body
+        self.etag = etag
+        self.seen_headers = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.seen_headers.append(headers)
+        res = requests.Response()
+        res.url = url
+        if self.etag and headers.get("If-None-Match") == self.etag:
+            res.status_code = 304
+            return res
+        res.status_code = 200
+        res._content = self.body
+        res.headers["Content-Type"] = "application/json"
+        if self.etag:
+            res.headers["ETag"] = self.etag
+        return res
+
+
+def test_revalidates_with_etag(sqlite_dir):
+    cache = HttpCache()
+    server = FakeServer()
+
+    first = cache.get(server.get, "http://shop/p", params={"id": 1}, headers={"a": "b"})
+    assert first.json() == {"a": 1} and not first.from_cache
+
+    second = cache.get(server.get, "http://shop/p", params={"id": 1}, headers={"a": "b"})
+    assert server.seen_headers[-1] == {"a": "b", "If-None-Match": '"v1"'}
+    assert second.status_code == 200 and second.from_cache and second.unchanged
+    assert second.json() == {"a": 1}
+    assert cache.stats()["revalidated"] == 1
+
+
+def test_identical_body_short_circuits(sqlite_dir):
+    cache = HttpCache()
+    server = FakeServer(etag=None)
+    cache.get(server.get, "http://shop/p")
+    again = cache.get(server.get, "http://shop/p")
+    assert again.unchanged and not again.from_cache
+
+    server.body = b'{"a": 2}'
+    changed = cache.get(server.get, "http://shop/p")
+    assert not changed.unchanged
+    assert cache.stats()["misses"] == 2
+
+
+def test_custom_key_spans_changing_urls(sqlite_dir):
+    cache = HttpCache()
+    server = FakeServer(etag=None)
+    cache.get(server.get, "http://shop/_next/data/b1/p.json", key="http://shop/p")
+    again = cache.get(server.get, "http://shop/_next/data/b2/p.json", key="http://shop/p")
+    assert again.url == "http://shop/_next/data/b2/p.json"
+    assert again.unchanged
+    assert cache.stats()["misses"] == 1
+
+
+def test_evicts_least_recently_used(sqlite_dir):
+    cache = HttpCache(max_bytes=10_000)
+    server = FakeServer(etag=None)
+    for i in range(10):
+        # random bodies don't compress, so four entries fill the cache
+        server.body = random.Random(i).randbytes(2_500)
+        cache.get(server.get, f"http://shop/{i}")
+
+    session = cache.Session()
+    urls = {url for (url,) in session.query(CachedResponse.url)}
+    session.close()
+    assert cache.stats()["bytes"] <= 10_000
+    assert "http://shop/0" not in urls and "http://shop/9" in urls
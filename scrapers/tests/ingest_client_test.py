@@ -0,0 +1,128 @@
+import gzip
+from json import dumps, loads
+
+import requests
+from ingest_client import IngestClient
+from utils.model import PriceUpdates, ProductInfo, Store
+
+
+def response(status: int, body: dict | None = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status
+    res._content = dumps(body or {}).encode()
+    return res
+
+
+class FakeIngest:
+    """Stands in for session.post and records what was sent"""
+
+    def __init__(
+        self, batch_status: int = 200, reject: set = frozenset(), reject_status: int = 422
+    ):
+        self.batch_status = batch_status
+        self.reject = reject
+        self.reject_status = reject_status
+        self.batches = []
+        self.singles = []
+
+    def post(self, url, data=None, json=None, headers=None, timeout=None):
+        if url.endswith("/batch"):
+            if self.batch_status != 200:
+                return response(self.batch_status)
+            assert headers == {"Content-Encoding": "gzip"}
+            body = loads(gzip.decompress(data))
+            items = next(iter(body.values()))
+            self.batches.append(items)
+            return response(200, {"results": [
+                {"index": i, "status": "error", "status_code": self.reject_status}
+                if item.get("id") in self.reject
+                else {"index": i, "status": "success"}
+                for i, item in enumerate(items)
+            ]})
+        self.singles.append(json)
+        return response(200)
+
+
+def product(i: int) -> ProductInfo:
+    return ProductInfo(
+        store_product_id=i, store=Store.Coles, product_name=f"p{i}", price=1.0, details={}
+    )
+
+
+def test_batches_by_size_and_flush():
+    client = IngestClient("http://ingest", batch_size=3, max_delay=60)
+    fake = client.session = FakeIngest()
+
+    for i in range(7):
+        client.send_product(product(i))
+    assert [len(b) for b in fake.batches] == [3, 3]
+
+    client.flush()
+    assert [len(b) for b in fake.batches] == [3, 3, 1]
+    assert fake.batches[0][0] == {
+        "store": "Coles", "id": "0", "name": "p0", "price": 1.0, "details": {}
+    }
+    assert client.stats()["sent"] == 7
+
+
+def test_rejected_items_reach_failure_handler():
+    failures = []
+    client = IngestClient(
+        "http://ingest",
+        batch_size=2,
+        on_failure=lambda kind, payload, reason: failures.append((kind, payload["id"])),
+    )
+    client.session = FakeIngest(reject={"1"})
+
+    client.send_product(product(0))
+    client.send_product(product(1))
+
+    assert failures == [("product", "1")]
+    assert client.stats()["sent"] == 1
+    assert client.stats()["failed"] == 1
+
+
+def test_failures_say_whether_a_retry_can_help():
+    client = IngestClient("http://ingest", batch_size=2)
+
+    client.session = FakeIngest(reject={"1"})
+    errors = client.deliver("product", [{"id": "0"}, {"id": "1"}])
+    assert errors[0] is None
+    assert errors[1].status == 422 and not errors[1].retryable
+
+    client.session = FakeIngest(reject={"1"}, reject_status=429)
+    assert client.deliver("product", [{"id": "1"}])[0].retryable
+
+    client.session = FakeIngest(batch_status=503)
+    assert [e.retryable for e in client.deliver("product", [{"id": "0"}])] == [True]
+
+
+class Unreachable:
+    def post(self, *args, **kwargs):
+        raise requests.ConnectionError("connection refused")
+
+
+def test_transport_errors_are_retryable():
+    client = IngestClient("http://ingest")
+    client.session = Unreachable()
+    [error] = client.deliver("price", [{"id": "0"}])
+    assert error == "connection refused"
+    assert error.status is None and error.retryable
+
+
+def test_falls_back_to_single_posts():
+    client = IngestClient("http://ingest", batch_size=2)
+    fake = client.session = FakeIngest(batch_status=404)
+
+    client.send_price(
+        PriceUpdates(store_product_id=5, store=Store.ALDI, product_name="x", price=2.5)
+    )
+    client.flush()
+    client.send_product(product(1))
+    client.flush()
+
+    assert not client.batching
+    assert fake.singles == [
+        {"store": "ALDI", "store_product_id": "5", "new_price": 2.5},
+        {"store": "Coles", "id": "1", "name": "p1", "price": 1.0, "details": {}},
+    ]
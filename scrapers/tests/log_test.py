@@ -0,0 +1,50 @@
+import io
+
+import log
+import pytest
+
+
+class Expensive:
+    """Counts how often it is turned into a string"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "expensive"
+
+
+@pytest.fixture
+def output():
+    stream = io.StringIO()
+    yield stream
+    log.configure_logging()
+
+
+def test_levels_and_format(output):
+    log.configure_logging("normal", output)
+    log.log("hello %s", "world")
+    log.detailed_log("hidden")
+    log.flush()
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 1
+    assert lines[0].startswith("LOG [") and lines[0].endswith("]: hello world")
+
+
+def test_verbose_adds_detailed(output):
+    log.configure_logging("verbose", output)
+    log.detailed_log("page %d", 3)
+    log.flush()
+    assert output.getvalue().rstrip().endswith("]: page 3")
+    assert not output.getvalue().startswith("LOG")
+
+
+def test_disabled_messages_are_not_formatted(output):
+    log.configure_logging("quiet", output)
+    value = Expensive()
+    log.log("value %s", value)
+    log.detailed_log("value %s", value)
+    log.flush()
+    assert output.getvalue() == ""
+    assert value.formatted == 0
@@ -0,0 +1,52 @@
+import pickle
+
+from utils.model import PriceRecord, PriceUpdates, Store, validate_price_records
+
+
+def test_validate_coerces_like_pydantic():
+    records, dropped = validate_price_records(
+        [
+            PriceRecord("42", "Coles", "milk", "2.5"),
+            PriceRecord(7, Store.ALDI, "eggs", 5),
+        ]
+    )
+    assert dropped == 0
+    assert records[0] == PriceUpdates(
+        store_product_id=42, store=Store.Coles, product_name="milk", price=2.5
+    )
+    assert isinstance(records[1].price, float) and records[1].store is Store.ALDI
+
+
+def test_validate_drops_invalid_records():
+    records, dropped = validate_price_records(
+        [
+            PriceRecord(None, Store.Coles, "no id", 1.0),
+            PriceRecord(1, "Aldo", "bad store", 1.0),
+            PriceRecord(2, Store.Coles, None, 1.0),
+            PriceRecord(3, Store.Coles, "ok", 1.0),
+        ]
+    )
+    assert dropped == 3
+    assert [r.store_product_id for r in records] == [3]
+
+
+def test_validate_drops_lossy_ids_and_non_finite_prices():
+    records, dropped = validate_price_records(
+        [
+            PriceRecord(True, Store.Coles, "bool id", 1.0),
+            PriceRecord(4.5, Store.Coles, "fractional id", 1.0),
+            PriceRecord(float("nan"), Store.Coles, "nan id", 1.0),
+            PriceRecord(5, Store.Coles, "nan price", float("nan")),
+            PriceRecord(6, Store.Coles, "inf price", "inf"),
+            PriceRecord(7, Store.Coles, "-inf price", float("-inf")),
+            PriceRecord(8.0, Store.Coles, "whole float id", 1.0),
+        ]
+    )
+    assert dropped == 6
+    assert [r.store_product_id for r in records] == [8]
+    assert type(records[0].store_product_id) is int
+
+
+def test_records_pickle_for_shard_workers():
+    record = PriceRecord(1, Store.Coles, "milk", 2.0)
+    assert pickle.loads(pickle.dumps(record)) == record
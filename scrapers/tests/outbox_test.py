@@ -0,0 +1,104 @@
+import pytest
+from ingest_client import DeliveryError
+from outbox import Outbox, OutboxEntry
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+class FakeClient:
+    """Stands in for IngestClient.deliver, rejecting payloads with bad ids"""
+
+    def __init__(self, reject: set = frozenset(), status: int = 503):
+        self.reject = reject
+        self.status = status
+        self.calls = []
+
+    def deliver(self, kind, payloads):
+        self.calls.append((kind, [p["id"] for p in payloads]))
+        return [
+            DeliveryError(f"HTTP {self.status}", self.status)
+            if p["id"] in self.reject
+            else None
+            for p in payloads
+        ]
+
+
+def test_put_and_depth(sqlite_dir):
+    outbox = Outbox()
+    outbox.put("product", {"id": 1}, "HTTP 500")
+    outbox.put("price", {"id": 2}, "timeout")
+    assert outbox.depth() == {
+        "product": 1, "price": 1, "total": 2, "retryable": 2, "dead": 0
+    }
+
+
+def test_drain_delivers_in_batches_per_kind(sqlite_dir):
+    outbox = Outbox()
+    for i in range(5):
+        outbox.put("product", {"id": i})
+    outbox.put("price", {"id": 10})
+
+    client = FakeClient()
+    assert outbox.drain(client, batch_size=3) == (6, 0)
+    assert client.calls == [
+        ("product", [0, 1, 2]),
+        ("product", [3, 4]),
+        ("price", [10]),
+    ]
+    assert outbox.depth()["total"] == 0
+
+
+def test_failed_entries_back_off(sqlite_dir):
+    outbox = Outbox(base_backoff=30, max_attempts=2)
+    outbox.put("product", {"id": 1})
+    outbox.put("product", {"id": 2})
+
+    client = FakeClient(reject={2})
+    assert outbox.drain(client) == (1, 1)
+    # not due again yet
+    assert outbox.drain(client) == (0, 0)
+
+    session = outbox.Session()
+    entry = session.query(OutboxEntry).one()
+    assert entry.attempts == 1 and entry.reason == "HTTP 503"
+    entry.next_attempt_at = 0
+    session.commit()
+    session.close()
+
+    assert outbox.drain(client) == (0, 1)
+    assert outbox.depth() == {"product": 1, "total": 1, "retryable": 0, "dead": 1}
+
+
+def test_rejected_payloads_are_dead_right_away(sqlite_dir):
+    outbox = Outbox()
+    outbox.put("product", {"id": 1}, DeliveryError("422 bad price", 422))
+    outbox.put("product", {"id": 2}, DeliveryError("HTTP 429", 429))
+    outbox.put("product", {"id": 3}, DeliveryError("connection refused"))
+    assert outbox.depth() == {"product": 3, "total": 3, "retryable": 2, "dead": 1}
+
+
+def test_retry_rejected_by_ingest_is_not_retried_again(sqlite_dir):
+    outbox = Outbox(base_backoff=0)
+    outbox.put("price", {"id": 1}, "timeout")
+
+    assert outbox.drain(FakeClient(reject={1}, status=404)) == (0, 1)
+    assert outbox.depth() == {"price": 1, "total": 1, "retryable": 0, "dead": 1}
+    assert outbox.drain(FakeClient()) == (0, 0)
+
+
+def test_drain_tries_each_entry_once(sqlite_dir):
+    outbox = Outbox(base_backoff=0)
+    for i in range(7):
+        outbox.put("product", {"id": i})
+
+    client = FakeClient(reject=set(range(7)))
+    assert outbox.drain(client, batch_size=3) == (0, 7)
+    assert client.calls == [
+        ("product", [0, 1, 2]),
+        ("product", [3, 4, 5]),
+        ("product", [6]),
+    ]
@@ -0,0 +1,58 @@
+from datetime import date
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from parquet_export import ParquetExporter, open_exporter  # noqa: E402
+from utils.model import PriceRecord, ProductInfo, Store  # noqa: E402
+
+
+def test_listings_are_partitioned_by_store_and_date(tmp_path):
+    exporter = ParquetExporter(str(tmp_path), day=date(2025, 1, 2))
+    exporter.add_listings([
+        PriceRecord(1, Store.Coles, "Milk", 3.1),
+        PriceRecord(2, Store.Coles, "Bread", 4.0),
+        PriceRecord(7, Store.ALDI, "Eggs", 5.5),
+    ])
+    assert exporter.close() == {"files": 2, "rows": 3, "bytes": exporter.bytes}
+
+    coles = pq.read_table(tmp_path / "listings" / "store=Coles" / "date=2025-01-02")
+    assert coles.column("store_product_id").to_pylist() == [1, 2]
+    assert coles.column("price").to_pylist() == [3.1, 4.0]
+
+    # readers get the partition columns back from the paths
+    everything = pq.read_table(tmp_path / "listings", columns=["store_product_id", "store"])
+    assert sorted(zip(everything.column("store").to_pylist(), everything.column("store_product_id").to_pylist())) == [
+        ("ALDI", 7), ("Coles", 1), ("Coles", 2)
+    ]
+
+
+def test_details_schema_and_dictionary_columns(tmp_path):
+    exporter = ParquetExporter(str(tmp_path), day=date(2025, 1, 2), rows_per_file=2)
+    for i in range(3):
+        exporter.add_detail(ProductInfo(
+            store_product_id=i, store=Store.Woolworths, product_name=f"Milk {i}", price=3.0,
+            details={"brand": "Woolworths", "size": "2L", "ingredients": "Milk"},
+        ))
+    # failed fetches carry no details and are left out
+    exporter.add_detail(ProductInfo(
+        store_product_id=9, store=Store.Woolworths, product_name="x", price=1.0, details={}
+    ))
+    exporter.close()
+
+    directory = tmp_path / "details" / "store=Woolworths" / "date=2025-01-02"
+    files = sorted(directory.iterdir())
+    assert len(files) == 2
+    table = pq.read_table(directory, columns=["store_product_id", "brand", "details"])
+    assert table.column("store_product_id").to_pylist() == [0, 1, 2]
+    assert table.column("details").to_pylist()[0] == '{"brand":"Woolworths","size":"2L","ingredients":"Milk"}'
+
+    column = pq.ParquetFile(files[0]).metadata.row_group(0).column(3)
+    assert column.path_in_schema == "brand"
+    assert column.compression == "ZSTD"
+    assert "RLE_DICTIONARY" in column.encodings
+
+
+def test_export_is_off_without_a_directory():
+    assert open_exporter(None) is None
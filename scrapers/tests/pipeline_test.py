@@ -0,0 +1,137 @@
+import threading
+import time
+
+from mockscraper import MockScraperAldi
+from pipeline import fetch_and_send, send_all
+from snapshot import PriceSnapshot, StorePrices, details_hash
+from utils.model import PriceUpdates, Store
+
+
+def make_products(n):
+    return [
+        PriceUpdates(
+            store_product_id=i, store=Store.ALDI, product_name=f"item {i}", price=1.0
+        )
+        for i in range(n)
+    ]
+
+
+class SlowScraper(MockScraperAldi):
+    def scrape_product(self, product):
+        time.sleep(0.05)
+        if product.store_product_id == 3:
+            raise RuntimeError("boom")
+        info = super().scrape_product(product)
+        if product.store_product_id == 4:
+            info.details = {}
+        return info
+
+
+def test_fetch_and_send_counts():
+    sent = []
+    lock = threading.Lock()
+
+    def send(info):
+        with lock:
+            sent.append(info.store_product_id)
+        return info.store_product_id != 5
+
+    result = fetch_and_send(
+        SlowScraper(), make_products(10), send, detail_workers=4, send_workers=2
+    )
+
+    assert result.fetched == 8
+    assert result.failed_fetches == 2
+    assert result.sent == 7
+    assert result.failed_sends == 1
+    assert sorted(sent) == [0, 1, 2, 5, 6, 7, 8, 9]
+
+
+def test_failed_fetches_are_reported():
+    failed = []
+    result = fetch_and_send(
+        SlowScraper(),
+        make_products(5),
+        lambda _: True,
+        detail_workers=2,
+        send_workers=1,
+        on_failed_fetch=lambda product: failed.append(product.store_product_id),
+    )
+    assert result.failed_fetches == 2
+    assert sorted(failed) == [3, 4]
+
+
+def test_fetches_run_concurrently():
+    start = time.perf_counter()
+    fetch_and_send(
+        SlowScraper(), make_products(8), lambda _: True, detail_workers=8, send_workers=1
+    )
+    # 8 sequential fetches would take 0.4s
+    assert time.perf_counter() - start < 0.3
+
+
+def test_send_all_empty():
+    assert send_all([], lambda _: True, 2).sent == 0
+
+
+def test_should_send_skips_unchanged():
+    sent = []
+    result = fetch_and_send(
+        MockScraperAldi(),
+        make_products(6),
+        lambda info: sent.append(info.store_product_id) or True,
+        detail_workers=2,
+        send_workers=1,
+        should_send=lambda info: info.store_product_id % 2 == 0,
+    )
+    assert result.fetched == 6
+    assert result.unchanged == 3
+    assert sorted(sent) == [0, 2, 4]
+
+
+class CachedScraper(MockScraperAldi):
+    """Even ids come back as unchanged detail responses"""
+
+    def scrape_product(self, product):
+        info = super().scrape_product(product)
+        info.unchanged = product.store_product_id % 2 == 0
+        return info
+
+
+def test_unchanged_responses_are_not_sent_unless_new():
+    sent = []
+    fetched = []
+    result = fetch_and_send(
+        CachedScraper(),
+        make_products(6),
+        lambda info: sent.append(info.store_product_id) or True,
+        detail_workers=2,
+        send_workers=1,
+        on_fetched=lambda info: fetched.append(info.store_product_id),
+        is_new=lambda info: info.store_product_id == 4,
+    )
+    assert result.unchanged == 2
+    assert sorted(sent) == [1, 3, 4, 5]
+    assert sorted(fetched) == [0, 1, 2, 3, 4, 5]
+
+
+def test_unchanged_responses_still_record_details_hashes():
+    # known from before details were hashed, so the hash is still 0
+    snapshot = PriceSnapshot()
+    table = snapshot.stores["ALDI"] = StorePrices()
+    table.merge([(2, 1.0, 0)])
+
+    sent = []
+    result = fetch_and_send(
+        CachedScraper(),
+        make_products(3)[2:],
+        lambda info: sent.append(info.store_product_id) or True,
+        detail_workers=1,
+        send_workers=1,
+        should_send=lambda info: snapshot.check_details(
+            info.store, info.store_product_id, details_hash(info.details)
+        ),
+        is_new=lambda info: snapshot.is_new(info.store, info.store_product_id),
+    )
+    assert result.unchanged == 1 and sent == []
+    assert table.hashes[0] != 0
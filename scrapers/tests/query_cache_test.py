@@ -0,0 +1,156 @@
+import pytest
+import requests
+from api import coles_woolies
+from quota import Quota
+from query_cache import QueryCache, normalize_query
+from utils.model import ApiProduct, ApiProducts
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+class FakeApi:
+    """Answers every search with `pages` paid calls worth of one product"""
+
+    def __init__(self, pages: int = 3):
+        self.pages = pages
+        self.searches = 0
+
+    def fetch(self, name: str = "Milk"):
+        def fetch():
+            self.searches += 1
+            return ApiProducts(api_uses=self.pages, products=[ApiProduct(
+                store="Coles Store", price=3.1, product_name=name, brand="Coles",
+                weight="2L", product_url="https://example.com/milk",
+            )]), True
+        return fetch
+
+
+def test_normalize_query():
+    assert normalize_query("  Full-Cream   MILK, 2L ") == "full cream milk 2l"
+
+
+def test_repeated_queries_are_served_from_disk(sqlite_dir):
+    cache = QueryCache()
+    api = FakeApi()
+    first = cache.get("Coles Store", "Full Cream Milk", api.fetch())
+    again = cache.get("Coles Store", "full cream  milk!", api.fetch())
+
+    assert api.searches == 1
+    assert first.api_uses == 3
+    assert again.api_uses == 0
+    assert again.products == first.products
+    # other stores are searched separately
+    cache.get("Woolies Store", "full cream milk", api.fetch())
+    assert api.searches == 2
+    assert cache.stats()["api_uses_saved"] == 3
+
+    # and results outlive the process
+    assert QueryCache().get("Coles Store", "full cream milk", api.fetch()).api_uses == 0
+    assert api.searches == 2
+
+
+def test_expired_results_are_fetched_again(sqlite_dir):
+    cache = QueryCache(ttl=60)
+    api = FakeApi()
+    cache.get("Coles Store", "milk", api.fetch())
+    cache.ttl = 1e-9
+    cache.get("Coles Store", "milk", api.fetch())
+    assert api.searches == 2
+    assert cache.stats()["expired"] == 1
+
+
+def test_unpaid_results_are_not_cached(sqlite_dir):
+    cache = QueryCache()
+    cache.get("Coles Store", "milk", lambda: (ApiProducts(api_uses=0, products=[]), False))
+    api = FakeApi()
+    cache.get("Coles Store", "milk", api.fetch())
+    assert api.searches == 1
+
+
+def test_least_recently_used_results_are_evicted(sqlite_dir):
+    cache = QueryCache(max_bytes=10**6)
+    api = FakeApi()
+    for i in range(20):
+        cache.get("Coles Store", f"query {i}", api.fetch("x" * 2000 + str(i)))
+    cache.get("Coles Store", "query 0", api.fetch())
+    entry = cache._total_size()
+    cache.max_bytes = entry // 2
+    cache.evict()
+
+    assert cache.stats()["bytes"] <= cache.max_bytes * 0.9
+    cache.get("Coles Store", "query 0", api.fetch())
+    assert api.searches == 20
+    cache.get("Coles Store", "query 1", api.fetch())
+    assert api.searches == 21
+
+
+class FakeRapidApi:
+    """Three pages of results, answering `status` from page `fail_on` on"""
+
+    def __init__(self, status: int = 200, fail_on: int = 99):
+        self.status = status
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None):
+        self.calls += 1
+        res = requests.Response()
+        res.status_code = self.status if params["page"] >= self.fail_on else 200
+        res._content = b'{"total_pages": 3, "results": [{"product_name": "Milk", "current_price": 3.1}]}'
+        return res
+
+
+@pytest.fixture
+def rapidapi(sqlite_dir, monkeypatch):
+    monkeypatch.setenv("COLES_API_URL", "https://coles.example/search")
+    monkeypatch.setenv("COLES_API_HOST", "coles.example")
+    monkeypatch.setenv("COLES_API_KEY", "key")
+    quota = Quota("coles.example", per_month=10**6, per_minute=100, path="sqlite/quota.json")
+    monkeypatch.setattr(coles_woolies, "quota_for", lambda host: quota)
+
+    def search(api: FakeRapidApi, cache: QueryCache):
+        monkeypatch.setattr(coles_woolies.requests, "get", api.get)
+        return cache.get(
+            "Coles Store", "milk", lambda: coles_woolies.fetch_products("Coles Store", "milk")
+        )
+
+    return quota, search
+
+
+def test_complete_searches_are_cached(rapidapi):
+    _, search = rapidapi
+    cache = QueryCache()
+    api = FakeRapidApi()
+    assert len(search(api, cache).products) == 3
+    assert search(api, cache).api_uses == 0
+    assert api.calls == 3
+
+
+def test_failed_searches_are_not_cached(rapidapi):
+    _, search = rapidapi
+    cache = QueryCache()
+    result = search(FakeRapidApi(status=429, fail_on=1), cache)
+    assert (result.api_uses, result.products) == (1, [])
+
+    api = FakeRapidApi(status=503, fail_on=3)
+    assert len(search(api, cache).products) == 2
+    # a later search pays again instead of being served the partial result
+    assert len(search(FakeRapidApi(), cache).products) == 3
+    assert cache.stats()["hits"] == 0
+
+
+def test_searches_cut_short_by_the_quota_are_not_cached(rapidapi):
+    quota, search = rapidapi
+    cache = QueryCache()
+    quota.per_minute = 2
+    quota.acquire = lambda wait=True, acquire=quota.acquire: acquire(wait=False)
+    assert len(search(FakeRapidApi(), cache).products) == 2
+
+    quota.per_minute = 100
+    api = FakeRapidApi()
+    assert len(search(api, cache).products) == 3
+    assert api.calls == 3
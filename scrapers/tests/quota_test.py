@@ -0,0 +1,62 @@
+import calendar
+import json
+from datetime import date
+
+import pytest
+import requests
+from quota import Quota
+
+
+def days_left() -> int:
+    today = date.today()
+    return calendar.monthrange(today.year, today.month)[1] - today.day + 1
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "quota.json")
+
+
+def test_monthly_budget_is_spread_over_the_days_left(path):
+    quota = Quota("api", per_month=days_left() * 3, per_minute=100, path=path)
+    assert [quota.acquire() for _ in range(4)] == [True, True, True, False]
+    assert quota.stats() == {"used_month": 3, "used_today": 3, "remaining_today": 0, "denied": 1}
+
+
+def test_minute_window(path):
+    quota = Quota("api", per_month=10_000, per_minute=2, path=path)
+    assert quota.acquire(wait=False)
+    assert quota.acquire(wait=False)
+    assert not quota.acquire(wait=False)
+    assert quota.used == 2
+
+
+def test_usage_and_refreshes_persist_between_runs(path):
+    quota = Quota("api", per_month=days_left() * 3, per_minute=100, path=path)
+    quota.acquire()
+    quota.acquire()
+    quota.mark_fresh("milk")
+
+    again = Quota("api", per_month=days_left() * 3, per_minute=100, path=path)
+    assert again.used_today == 2
+    assert again.remaining() == 1
+    assert again.stale_first(["milk", "bread", "eggs"]) == ["bread", "eggs", "milk"]
+
+
+def test_a_new_month_starts_from_zero(path):
+    with open(path, "w") as f:
+        json.dump({"api": {"month": "1999-01", "day": "1999-01-31", "used": 500, "used_today": 20}}, f)
+    quota = Quota("api", per_month=500, per_minute=100, path=path)
+    assert (quota.used, quota.used_today) == (0, 0)
+    assert quota.acquire()
+
+
+def test_record_trusts_the_providers_count(path):
+    quota = Quota("api", per_month=10_000, per_minute=100, path=path)
+    quota.acquire()
+    response = requests.Response()
+    response.headers["x-ratelimit-requests-limit"] = "10000"
+    response.headers["x-ratelimit-requests-remaining"] = "9990"
+    quota.record(response)
+    assert quota.used == 10
+    assert quota.used_today == 10
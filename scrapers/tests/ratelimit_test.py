@@ -0,0 +1,66 @@
+import pytest
+import requests
+from ratelimit import AdaptiveLimiter
+
+
+def response(status: int, headers: dict | None = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status
+    res.headers.update(headers or {})
+    return res
+
+
+def test_healthy_responses_raise_rate_up_to_max():
+    limiter = AdaptiveLimiter("host", rate=1, max_rate=1.5, increase=0.2)
+    for _ in range(10):
+        limiter.record(200, 0.1)
+    assert limiter.rate == 1.5
+    assert limiter.backoffs == 0
+
+
+@pytest.mark.parametrize("status", [429, 503, None])
+def test_errors_halve_rate(status):
+    limiter = AdaptiveLimiter("host", rate=4, min_rate=0.5, max_rate=4, cooldown=0)
+    limiter.record(status, 0.1)
+    assert limiter.rate == 2
+    limiter.record(status, 0.1)
+    limiter.record(status, 0.1)
+    assert limiter.rate == 0.5
+
+
+def test_latency_spike_backs_off_once_per_cooldown():
+    limiter = AdaptiveLimiter("host", rate=4, max_rate=4, warmup=3, cooldown=60)
+    for _ in range(5):
+        limiter.record(200, 0.1)
+    limiter.record(200, 1.0)
+    limiter.record(200, 1.0)
+    assert limiter.rate == 2
+    assert limiter.backoffs == 1
+
+
+def test_request_paces_and_honours_retry_after(monkeypatch):
+    clock = [100.0]
+    slept = []
+    monkeypatch.setattr("time.monotonic", lambda: clock[0])
+    monkeypatch.setattr("time.sleep", slept.append)
+
+    limiter = AdaptiveLimiter("host", rate=2, max_rate=2)
+    limiter.request(lambda: response(200))
+    limiter.request(lambda: response(200))
+    assert slept == [0.5]
+
+    limiter.request(lambda: response(429, {"Retry-After": "3"}))
+    limiter.request(lambda: response(200))
+    assert slept[-1] >= 3
+    assert limiter.stats()["requests"] == 4
+
+
+def test_request_errors_are_recorded_and_raised():
+    limiter = AdaptiveLimiter("host", rate=2, max_rate=2)
+
+    def fail():
+        raise requests.ConnectionError("reset")
+
+    with pytest.raises(requests.ConnectionError):
+        limiter.request(fail)
+    assert limiter.backoffs == 1
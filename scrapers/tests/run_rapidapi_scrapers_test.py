@@ -0,0 +1,82 @@
+import gzip
+from json import dumps, loads
+
+import requests
+from ingest_client import IngestClient
+from quota import Quota
+from run_rapidapi_scrapers import product_payload, stream_to_ingest
+from scrapers.woolworths_rapidapi import WoolworthsRapidAPIScraper
+
+
+def response(body: dict) -> requests.Response:
+    res = requests.Response()
+    res.status_code = 200
+    res._content = dumps(body).encode()
+    return res
+
+
+class FakeApi:
+    """Three pages of two products, the last one without a barcode"""
+
+    def __init__(self, ingest: "FakeIngest"):
+        self.ingest = ingest
+        # how many batches ingest had received when each page was requested
+        self.batches_seen = []
+
+    def get(self, url, params=None):
+        self.batches_seen.append(len(self.ingest.batches))
+        page = params["page"]
+        return response({"totalPages": 3, "results": [
+            {"barcode": f"93{page}{i}" if page < 3 or i == 0 else "", "productName": f"p{page}{i}",
+             "productBrand": "Woolworths", "currentPrice": 1.5, "productSize": "1kg"}
+            for i in range(2)
+        ]})
+
+
+class FakeIngest:
+    def __init__(self):
+        self.batches = []
+
+    def post(self, url, data=None, json=None, headers=None, timeout=None):
+        assert url == "http://ingest/api/products/batch"
+        items = loads(gzip.decompress(data))["products"]
+        self.batches.append(items)
+        return response({"results": [{"index": i, "status": "success"} for i in range(len(items))]})
+
+    def close(self):
+        pass
+
+
+def test_product_payload_matches_product_create_request():
+    assert product_payload({
+        "store": "woolworths", "store_product_id": "9300", "product_name": "Oats",
+        "brand": "Macro", "category": "", "price": 3.5, "unit_price": "", "size": "750g",
+        "availability": True, "image_url": "", "product_url": "https://example.com/oats",
+    }) == {
+        "store": "woolworths", "id": "9300", "name": "Oats", "price": 3.5,
+        "details": {"brand": "Macro", "size": "750g", "availability": True,
+                    "product_url": "https://example.com/oats"},
+    }
+    assert product_payload({"store": "coles", "store_product_id": "", "price": 1.0}) is None
+    assert product_payload({"store": "coles", "store_product_id": "1", "price": None}) is None
+
+
+def test_pages_are_sent_as_they_arrive(tmp_path):
+    ingest = FakeIngest()
+    client = IngestClient("http://ingest", batch_size=2, max_delay=60)
+    client.session = ingest
+    scraper = WoolworthsRapidAPIScraper(
+        Quota("woolies", per_month=10**6, per_minute=100, path=str(tmp_path / "q.json"))
+    )
+    scraper.session = FakeApi(ingest)
+
+    assert stream_to_ingest(scraper.iter_all(), client, "woolworths") == 5
+    client.close()
+
+    # the first page was already in ingest before the later ones were fetched
+    assert scraper.session.batches_seen == [0, 1, 2]
+    assert [len(batch) for batch in ingest.batches] == [2, 2, 1]
+    assert ingest.batches[0][0] == {
+        "store": "woolworths", "id": "9310", "name": "p10", "price": 1.5,
+        "details": {"brand": "Woolworths", "size": "1kg", "availability": True},
+    }
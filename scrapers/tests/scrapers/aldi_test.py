@@ -1,6 +1,11 @@
+import os
+
+import pytest
 import scrapers.aldi as aldi
 from bs4 import BeautifulSoup
 
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "aldi_product.html")
+
 def test_clean_str():
     assert aldi.clean_str("t\t\n\tt") == "tt"
     assert aldi.clean_str("   a\t\nl   ") == "al"
@@ -27,6 +32,30 @@ def test_parse_amount():
     assert aldi.parse_amount(pricebox) == "2L"
 
 
+def test_parse_product():
+    with open(FIXTURE, "rb") as f:
+        content = f.read()
+    product = aldi.parse_product(content, "https://www.aldi.com.au/milk")
+    assert product.product_name == "Farmdale Full Cream Milk 2L"
+    assert product.category == "Dairy & Eggs"
+    assert (product.price, product.unit_price, product.original_price) == (3.1, 1.55, 3.39)
+    assert product.weight == "2L"
+    assert product.description == "Australian full cream milk, Permeate free, Keep refrigerated, below 4°C"
+    # the fast paths read the page the same as a full BeautifulSoup tree
+    assert product == aldi.product_from_soup(BeautifulSoup(content, "html.parser"), product.product_url)
+    assert product == aldi.product_from_soup(
+        BeautifulSoup(content, "html.parser", parse_only=aldi.PRODUCT_REGIONS), product.product_url
+    )
+
+
+@pytest.mark.skipif(aldi.lxml_html is None, reason="lxml is not installed")
+def test_parse_product_lxml_matches_soup():
+    with open(FIXTURE, "rb") as f:
+        content = f.read()
+    page = BeautifulSoup(content, "html.parser")
+    assert aldi.parse_product_lxml(content, "u") == aldi.product_from_soup(page, "u")
+
+
 desc_ul = BeautifulSoup("""
 <div>
  <h2>
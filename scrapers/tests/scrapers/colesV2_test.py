@@ -0,0 +1,62 @@
+import json
+
+import pytest
+import requests
+import scrapers.colesV2 as colesV2
+
+
+class Direct:
+    """Stands in for the limiter and the http cache, sending straight away"""
+
+    def request(self, send, *args, **kwargs):
+        return send(*args, **kwargs)
+
+    def get(self, send, url, **kwargs):
+        return send(url, **kwargs)
+
+
+def response(status: int, body: str = "") -> requests.Response:
+    res = requests.Response()
+    res.status_code = status
+    res._content = body.encode()
+    return res
+
+
+@pytest.fixture
+def coles(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(colesV2, "limiter_for", lambda *a, **kw: Direct())
+    monkeypatch.setattr(colesV2, "shared_cache", Direct)
+    scraper = colesV2.ColesScraper()
+    scraper.categories = {"Dairy": "dairy"}
+    scraper.build.cooldown = 0
+    return scraper
+
+
+def test_scrape_category_follows_a_redeploy(coles, monkeypatch):
+    live = {"build": "old"}
+    requested = []
+    listing = json.dumps({"pageProps": {"searchResults": {"noOfResults": 1, "results": [
+        {"_type": "PRODUCT", "id": 1, "brand": "Coles", "name": "Milk", "size": "2L", "pricing": {"now": 3.1}}
+    ]}}})
+
+    def get(url, **kwargs):
+        requested.append(url)
+        if url == coles.home_url:
+            return response(200, f'<script id="__NEXT_DATA__">{{"buildId":"{live["build"]}"}}</script>')
+        if f"/_next/data/{live['build']}/" not in url:
+            return response(404)
+        return response(200, listing)
+
+    monkeypatch.setattr(colesV2.requests, "get", get)
+    assert coles.build.get() == "old"
+
+    live["build"] = "new"
+    products = coles.scrape_category()
+
+    assert [p.store_product_id for p in products] == [1]
+    assert requested[1:] == [
+        "https://www.coles.com.au/_next/data/old/en/browse/dairy.json?slug=dairy",
+        "https://www.coles.com.au/",
+        "https://www.coles.com.au/_next/data/new/en/browse/dairy.json?slug=dairy",
+    ]
@@ -0,0 +1,64 @@
+import calendar
+from datetime import date
+
+import requests
+from quota import Quota
+from scrapers.coles_rapidapi import ColesRapidAPIScraper
+
+
+class FakeSession:
+    """Three pages of two results for any query"""
+
+    def __init__(self, fail_on: tuple | None = None):
+        self.queries = []
+        self.fail_on = fail_on
+
+    def get(self, url, params=None):
+        self.queries.append((params["query"], params["page"]))
+        if (params["query"], params["page"]) == self.fail_on:
+            raise requests.ConnectionError("connection reset")
+        response = requests.Response()
+        response.status_code = 200
+        response._content = (
+            b'{"totalPages": 3, "results": [{"productId": 1, "productName": "a", "currentPrice": 1.0},'
+            b' {"productId": 2, "productName": "b", "currentPrice": 2.0}]}'
+        )
+        return response
+
+
+def scraper(tmp_path, per_day: int) -> ColesRapidAPIScraper:
+    today = date.today()
+    days_left = calendar.monthrange(today.year, today.month)[1] - today.day + 1
+    quota = Quota("coles", per_month=per_day * days_left, per_minute=100, path=str(tmp_path / "q.json"))
+    scraper = ColesRapidAPIScraper(quota)
+    scraper.session = FakeSession()
+    return scraper
+
+
+def test_stalest_queries_are_scraped_first(tmp_path):
+    coles = scraper(tmp_path, per_day=4)
+    coles.quota.mark_fresh("milk")
+    products = coles.scrape_all(["milk", "bread"])
+
+    # bread was never refreshed; milk gets the one call left
+    assert coles.session.queries == [("bread", 1), ("bread", 2), ("bread", 3), ("milk", 1)]
+    assert len(products) == 8
+    assert products[0]["store_product_id"] == "1"
+    assert coles.quota.stale_first(["milk", "bread"]) == ["milk", "bread"]
+
+
+def test_budget_spent_stops_paging(tmp_path):
+    coles = scraper(tmp_path, per_day=2)
+    assert len(coles.get_all_products("")) == 4
+    assert coles.scrape_all() == []
+
+
+def test_failed_queries_stay_stale(tmp_path):
+    coles = scraper(tmp_path, per_day=10)
+    coles.session = FakeSession(fail_on=("milk", 2))
+    coles.quota.mark_fresh("bread")
+    coles.scrape_all(["milk", "bread"])
+
+    assert coles.session.queries == [("milk", 1), ("milk", 2), ("bread", 1), ("bread", 2), ("bread", 3)]
+    # bread was refreshed in full, milk was cut short
+    assert coles.quota.stale_first(["bread", "milk"]) == ["milk", "bread"]
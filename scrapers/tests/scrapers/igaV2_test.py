@@ -0,0 +1,111 @@
+import json
+
+import pytest
+import requests
+import scrapers.igaV2 as igaV2
+from utils.model import PriceUpdates, Store
+
+
+class Direct:
+    """Stands in for the limiter and the http cache, sending straight away"""
+
+    def request(self, send, *args, **kwargs):
+        return send(*args, **kwargs)
+
+    def get(self, send, url, **kwargs):
+        return send(url, **kwargs)
+
+
+def response(status: int, body: dict | None = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status
+    res._content = json.dumps(body or {}).encode()
+    return res
+
+
+class FakeSession:
+    """
+    Two stores sharing products 1-3; store 2 also stocks 4 and 5.
+    Each category lists them `limit` per page. Only store 2 has product details.
+    """
+
+    stock = {"1": [1, 2, 3], "2": [3, 4, 5, 1]}
+
+    def __init__(self):
+        self.gets = []
+
+    def get(self, url, params=None, **kwargs):
+        parts = url.split("/")
+        store_id = parts[parts.index("stores") + 1]
+        self.gets.append(url)
+        if "/products/" in url:
+            if store_id != "2":
+                return response(404)
+            return response(200, {
+                "productId": "4",
+                "name": "Rolled Oats",
+                "brand": "Community Co",
+                "defaultCategory": "Pantry",
+                "description": "Oats<br/>Australian grown",
+                "unitsOfSize": {"size": 750, "type": "gram"},
+                "price": "$3.40",
+                "wasPrice": "$4.00",
+                "available": True,
+                "primaryImage": {"default": "https://cdn.example.com/4.jpg"},
+            })
+        stock = self.stock[store_id]
+        page = stock[params["skip"]:params["skip"] + params["take"]]
+        return response(200, {
+            "total": len(stock),
+            "items": [
+                {"productId": str(pid), "name": f"p{pid}", "price": f"${pid}.50"}
+                for pid in page
+            ],
+        })
+
+
+@pytest.fixture
+def iga(monkeypatch):
+    monkeypatch.setenv("APP_IGA_STORES", "1, 2")
+    monkeypatch.setattr(igaV2, "limiter_for", lambda *a, **kw: Direct())
+    monkeypatch.setattr(igaV2, "shared_cache", Direct)
+    scraper = igaV2.IGAScraper()
+    scraper.limit = 2
+    scraper.session = FakeSession()
+    scraper.categories = {"Pantry": "pantry"}
+    return scraper
+
+
+def test_scrape_category_pages_every_store(iga):
+    iga.category_workers = 2
+    products = iga.scrape_category()
+
+    # store 1 wins the products both stores list
+    assert [p.store_product_id for p in products] == [1, 2, 3, 4, 5]
+    assert [p.price for p in products] == [1.5, 2.5, 3.5, 4.5, 5.5]
+    assert {p.store for p in products} == {Store.IGA}
+    assert iga.product_stores == {1: "1", 2: "1", 3: "1", 4: "2", 5: "2"}
+    # two pages from each store
+    assert len(iga.session.gets) == 4
+
+
+def test_scrape_product_uses_the_listing_store(iga):
+    iga.product_stores[4] = "2"
+    info = iga.scrape_product(
+        PriceUpdates(store_product_id=4, store=Store.IGA, product_name="p4", price=4.5)
+    )
+    assert info.price == 3.4
+    assert info.details["size"] == "750g"
+    assert info.details["description"] == "OatsAustralian grown"
+    assert info.details["store_id"] == "2"
+    assert info.details["product_url"] == "https://www.igashop.com.au/product/rolled-oats-4"
+    assert len(iga.session.gets) == 1
+
+
+def test_scrape_product_falls_back_to_other_stores(iga):
+    # listed in another process, so the store is unknown here
+    info = iga.scrape_product(
+        PriceUpdates(store_product_id=4, store=Store.IGA, product_name="p4", price=4.5)
+    )
+    assert info.details["brand"] == "Community Co"
+    assert [url.split("/")[-3] for url in iga.session.gets] == ["1", "2"]
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+import requests
+import scrapers.wooliesV2 as wooliesV2
+from utils.model import PriceUpdates, Store
+
+
+class Direct:
+    """Stands in for the limiter and the http cache, sending straight away"""
+
+    def request(self, send, *args, **kwargs):
+        return send(*args, **kwargs)
+
+    def get(self, send, url, **kwargs):
+        return send(url, **kwargs)
+
+
+def response(status: int, body: dict | None = None) -> requests.Response:
+    res = requests.Response()
+    res.status_code = status
+    res._content = json.dumps(body or {}).encode()
+    return res
+
+
+class FakeSession:
+    """Serves `pages` listing pages of `limit` products per category"""
+
+    def __init__(self, pages: int, limit: int):
+        self.pages = pages
+        self.limit = limit
+        self.posts = []
+
+    def get(self, url, **kwargs):
+        if "/product/detail/" in url:
+            return response(200, {
+                "Product": {"Stockcode": 42, "Name": "Milk", "DisplayName": "Milk 2L", "Brand": "Woolworths", "PackageSize": "2L", "Price": 3.2},
+                "AdditionalAttributes": {"ingredients": "Milk"},
+                "NutritionalInformation": [{"Name": "Energy", "Values": {"Quantity Per 100g / 100mL": "270kJ"}}],
+            })
+        return response(200)
+
+    def post(self, url, data=None, cookies=None, **kwargs):
+        assert cookies["_abck"]
+        payload = json.loads(data)
+        self.posts.append((payload["categoryId"], payload["pageNumber"]))
+        base = int(payload["categoryId"].split("-")[1]) * 1000 + payload["pageNumber"] * 100
+        return response(200, {
+            "TotalRecordCount": self.pages * self.limit,
+            "Bundles": [
+                {"Products": [{"Stockcode": base + i, "DisplayName": f"p{base + i}", "Price": 1.5}]}
+                for i in range(self.limit)
+            ],
+        })
+
+
+COOKIES = os.path.join(os.path.dirname(__file__), "..", "fixtures", "woolies_cookies.json")
+
+
+@pytest.fixture
+def woolies(monkeypatch):
+    monkeypatch.setenv("APP_COOKIES_WOOLWORTHS", COOKIES)
+    monkeypatch.setattr(wooliesV2, "limiter_for", lambda *a, **kw: Direct())
+    monkeypatch.setattr(wooliesV2, "shared_cache", Direct)
+    scraper = wooliesV2.WoolworthsScraper()
+    scraper.limit = 3
+    scraper.session = FakeSession(pages=2, limit=scraper.limit)
+    scraper.categories = {f"cat {i}": (f"1-{i}", f"cat-{i}") for i in range(1, 5)}
+    yield scraper
+    scraper.cookies.stop()
+
+
+def test_scrape_category_pages_categories_concurrently(woolies):
+    woolies.category_workers = 4
+    products = woolies.scrape_category()
+
+    assert len(products) == 4 * 2 * 3
+    # results keep category order however the workers interleave
+    assert [p.store_product_id for p in products[:6]] == [1100, 1101, 1102, 1200, 1201, 1202]
+    assert {p.store for p in products} == {Store.Woolworths}
+    assert sorted(woolies.session.posts) == [(f"1-{i}", page) for i in range(1, 5) for page in (1, 2)]
+
+
+def test_scrape_product(woolies):
+    info = woolies.scrape_product(
+        PriceUpdates(store_product_id=42, store=Store.Woolworths, product_name="Milk", price=3.0)
+    )
+    assert info.price == 3.2
+    assert info.product_name == "Milk 2L"
+    assert info.details["brand"] == "Woolworths"
+    assert info.details["ingredients"] == "Milk"
+    assert woolies.cookies.stats()["refreshes"] >= 1
+    assert info.details["nutrition"] == {"Energy": {"Quantity Per 100g / 100mL": "270kJ"}}
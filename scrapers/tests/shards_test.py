@@ -0,0 +1,61 @@
+import os
+
+import pytest
+from mockscraper import MockScraperAldi
+from shards import plan_rate_shares, plan_shards, scrape_sharded
+from utils.model import PriceUpdates, Store
+
+
+@pytest.fixture
+def sqlite_dir(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+
+
+class CategoryScraper(MockScraperAldi):
+    """Returns one product per category, tagged with the worker's pid"""
+
+    def __init__(self):
+        self.categories = {"a": 1, "b": 2, "c": 3}
+
+    def scrape_category(self, checkpoint=None):
+        products = []
+        for name, key in self.categories.items():
+            if checkpoint.progress("Fake", name)[2]:
+                continue
+            products.append(
+                PriceUpdates(
+                    store_product_id=key,
+                    store=Store.ALDI,
+                    product_name=f"{name} {os.getpid()}",
+                    price=1.0,
+                )
+            )
+            checkpoint.save_page("Fake", name, 0, 1, products[-1:])
+            checkpoint.complete("Fake", name)
+        return products
+
+    def get_store_name(self):
+        return "Fake"
+
+
+def test_plan_assigns_each_category_once():
+    tasks = plan_shards([CategoryScraper(), MockScraperAldi()])
+    assert [(i, c) for i, _, c in tasks] == [(0, "a"), (0, "b"), (0, "c"), (1, None)]
+
+
+def test_rate_shares_only_count_workers_a_store_can_use():
+    scrapers = [CategoryScraper(), MockScraperAldi()]
+    tasks = plan_shards(scrapers)
+    # three categories on four shards use three workers at most
+    assert plan_rate_shares(scrapers, tasks, 4) == {"Fake": 3, "Fake Aldi": 1}
+    assert plan_rate_shares(scrapers, tasks, 2) == {"Fake": 2, "Fake Aldi": 1}
+
+
+def test_results_are_merged_in_category_order(sqlite_dir):
+    stores = scrape_sharded([CategoryScraper()], shards=2, run_id="run")
+    assert [p.store_product_id for p in stores[0]] == [1, 2, 3]
+    assert {p.product_name.split()[1] for p in stores[0]} != {str(os.getpid())}
+
+    # completed categories are not scraped again in the same run
+    assert scrape_sharded([CategoryScraper()], shards=2, run_id="run") == [[]]
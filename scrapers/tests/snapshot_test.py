@@ -0,0 +1,89 @@
+import pytest
+from database import MainDatabase
+from snapshot import PriceSnapshot, details_hash
+from utils.model import Store
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    (tmp_path / "sqlite").mkdir()
+    monkeypatch.chdir(tmp_path)
+    db = MainDatabase("snapshot")
+    db.add_simple_product("Coles", 10, "milk", 2.0)
+    db.add_simple_product("Coles", 3, "bread", 3.5)
+    db.add_simple_product("ALDI", 7, "eggs", 5.0)
+    return db
+
+
+def test_load(db):
+    snapshot = PriceSnapshot.load(db)
+    assert len(snapshot) == 3
+    assert snapshot.get_price("Coles", 3) == 3.5
+    assert snapshot.get_price(Store.ALDI, 7) == 5.0
+    assert snapshot.get_price("Coles", 7) is None
+
+
+def test_change_detection_is_in_memory(db):
+    snapshot = PriceSnapshot.load(db)
+
+    assert not snapshot.add_product(Store.Coles, 10, "milk", 2.0)
+    assert snapshot.add_product(Store.Coles, 11, "cheese", 6.0)
+    assert not snapshot.check_price(Store.Coles, 10, 2.0)
+    assert snapshot.check_price(Store.Coles, 10, 2.2)
+    assert snapshot.check_price(Store.Coles, 11, 6.5)
+    assert not snapshot.check_price(Store.Coles, 99, 1.0)
+
+    # nothing written until flush
+    assert db.get_product_price("Coles", 10) == 2.0
+    assert db.get_product_price("Coles", 11) is None
+
+
+def test_discarded_new_products_are_new_again(db):
+    snapshot = PriceSnapshot.load(db)
+    assert snapshot.add_product(Store.Coles, 11, "cheese", 6.0)
+    snapshot.discard_new(Store.Coles, 11)
+    # known products are never discarded
+    snapshot.discard_new(Store.Coles, 10)
+
+    assert snapshot.flush(db) == (0, 0)
+    assert snapshot.get_price("Coles", 10) == 2.0
+    assert snapshot.add_product(Store.Coles, 11, "cheese", 6.0)
+
+
+def test_flush_writes_only_diffs(db):
+    snapshot = PriceSnapshot.load(db)
+    snapshot.add_product(Store.Coles, 11, "cheese", 6.0)
+    snapshot.add_product(Store.Coles, 1, "butter", 4.0)
+    snapshot.check_price(Store.Coles, 10, 2.2)
+
+    assert snapshot.flush(db) == (2, 1)
+    assert db.get_product_price("Coles", 10) == 2.2
+    assert db.get_product_price("Coles", 11) == 6.0
+    assert db.get_simple_product_count() == 5
+
+    # merged entries stay sorted and searchable
+    assert list(snapshot.stores["Coles"].ids) == [1, 3, 10, 11]
+    assert snapshot.get_price("Coles", 1) == 4.0
+    assert snapshot.flush(db) == (0, 0)
+
+
+def test_details_hash_is_stable():
+    assert details_hash({"a": 1, "b": [1, 2]}) == details_hash({"b": [1, 2], "a": 1})
+    assert details_hash({"a": 1}) != details_hash({"a": 2})
+    assert details_hash({}) != 0
+
+
+def test_details_changes_survive_flush(db):
+    snapshot = PriceSnapshot.load(db)
+    milk = details_hash({"size": "2L"})
+
+    assert snapshot.check_details(Store.Coles, 10, milk)
+    assert not snapshot.check_details(Store.Coles, 10, milk)
+    snapshot.add_product(Store.Coles, 11, "cheese", 6.0)
+    assert snapshot.check_details(Store.Coles, 11, details_hash({"size": "500g"}))
+    snapshot.flush(db)
+
+    reloaded = PriceSnapshot.load(db)
+    assert not reloaded.check_details(Store.Coles, 10, milk)
+    assert not reloaded.check_details(Store.Coles, 11, details_hash({"size": "500g"}))
+    assert reloaded.check_details(Store.Coles, 10, details_hash({"size": "3L"}))
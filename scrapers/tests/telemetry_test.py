@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from telemetry import RunStats
+
+
+def collect() -> RunStats:
+    stats = RunStats()
+    with stats.stage("product_scrape"):
+        stats.count("products_fetched", 20)
+    with stats.timed("etl_send"):
+        pass
+    stats.record_page("Coles", "Bakery", 48)
+    stats.record_page("Coles", "Bakery", 12)
+    stats.record_page("ALDI", "pantry", 30)
+    for i in range(1, 101):
+        stats.record_request("www.coles.com.au", i / 100, 1000, 200 if i < 100 else 503)
+    return stats
+
+
+def test_summary():
+    summary = collect().summary(ingest={"sent": 20})
+
+    assert summary["stores"]["Coles"] == {
+        "pages": 2, "listed_products": 60, "categories": {"Bakery": 2}
+    }
+    http = summary["http"]["www.coles.com.au"]
+    assert http["requests"] == 100 and http["errors"] == 1 and http["bytes"] == 100_000
+    # bucketed, so up to 5% high
+    assert (http["p50"], http["p90"], http["p99"]) == (
+        pytest.approx(0.51, rel=0.05), pytest.approx(0.91, rel=0.05), pytest.approx(1.0, rel=0.05)
+    )
+    assert http["p50"] >= 0.51
+    assert "etl_send" in summary["timings"]
+    assert summary["products_per_second"] > 0
+    assert summary["ingest"] == {"sent": 20}
+
+
+def test_merge_adds_worker_stats():
+    stats = collect()
+    stats.merge(collect().export())
+    summary = stats.summary()
+    assert summary["stores"]["Coles"]["pages"] == 4
+    assert summary["http"]["www.coles.com.au"]["requests"] == 200
+    assert summary["counters"]["products_fetched"] == 40
+
+
+def test_finish_writes_json_and_openmetrics(tmp_path):
+    stats = collect()
+    stats.finish(str(tmp_path / "stats" / "run.json"), str(tmp_path / "run.prom"))
+
+    assert json.loads((tmp_path / "stats" / "run.json").read_text())["stores"]["ALDI"]["pages"] == 1
+    metrics = (tmp_path / "run.prom").read_text()
+    assert 'scraper_pages{store="Coles",category="Bakery"} 2' in metrics
+    p99 = next(
+        line for line in metrics.splitlines()
+        if line.startswith('scraper_http_latency_seconds{host="www.coles.com.au",quantile="0.99"}')
+    )
+    assert float(p99.split()[-1]) == pytest.approx(1.0, rel=0.05)
+    assert metrics.endswith("# EOF\n")
+
+
+def test_latencies_take_fixed_memory():
+    stats = RunStats()
+    for i in range(100_000):
+        stats.record_request("shop", 0.2 + (i % 7) / 100, 10, 200)
+    summary = stats.summary()["http"]["shop"]
+    assert summary["requests"] == 100_000
+    assert len(stats.latencies["shop"]) <= 7
+    assert summary["p50"] == pytest.approx(0.23, rel=0.05)